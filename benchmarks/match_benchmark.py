@@ -0,0 +1,222 @@
+"""
+Benchmark da rodada de match sobre coortes sintéticas.
+
+Para cada tamanho de coorte o banco indicado é recriado e populado com
+`CohortGenerator`, e então a rodada (`MatchController.run_match`) é medida
+de ponta a ponta: tempo total e por fase, quantidade de comandos SQL e pico
+de memória (tracemalloc, só do processo principal). `_score_match` também é
+medido isoladamente, em pares por segundo.
+
+O banco é APAGADO a cada tamanho, então a URL precisa ser passada
+explicitamente e não pode ser a `DATABASE_URL` do `.env`:
+
+    python -m benchmarks.match_benchmark \\
+        --database-url postgresql://postgres@localhost:5432/stem_bench \\
+        --sizes 1000 10000 100000 --output benchmarks/results/atual.json
+
+Os resultados ficam num JSON com o commit atual, para comparar execuções.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from statistics import median
+from time import perf_counter
+from typing import Any
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark da rodada de match")
+    parser.add_argument("--database-url", required=True, help="banco descartável: é recriado a cada tamanho")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000], help="quantidade de mentoradas")
+    parser.add_argument(
+        "--mentor-ratio", type=float, default=1.25,
+        help="mentoras por mentorada; abaixo de 1, parte das mentoradas fica sem pedido",
+    )
+    parser.add_argument("--modes", nargs="+", choices=["greedy", "optimal"], default=["greedy", "optimal"])
+    parser.add_argument("--same-university", action="store_true")
+    parser.add_argument("--repeat", type=int, default=3, help="rodadas cronometradas por tamanho e modo")
+    parser.add_argument("--workers", type=int, default=None, help="sobrescreve MATCH_WORKERS")
+    parser.add_argument("--score-pairs", type=int, default=200_000, help="pares usados no benchmark de _score_match")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=None, help="JSON de uma execução anterior para comparar")
+    return parser.parse_args()
+
+
+def _commit_atual() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _comparar(relatorio: dict[str, Any], baseline: dict[str, Any]):
+    anteriores = {
+        (item["mentoradas"], item["modo"]): item for item in baseline["resultados"]
+    }
+    print(f"Comparação com {baseline.get('commit') or 'baseline'}:")
+    for item in relatorio["resultados"]:
+        anterior = anteriores.get((item["mentoradas"], item["modo"]))
+        if anterior is None:
+            continue
+        razao = item["tempo_ms"]["mediana"] / anterior["tempo_ms"]["mediana"]
+        print(
+            f"  [{item['mentoradas']}] {item['modo']}: tempo x{razao:.2f}, "
+            f"comandos SQL {anterior['comandos_sql']} -> {item['comandos_sql']}, "
+            f"memória {anterior['pico_memoria_mb']:.1f} -> {item['pico_memoria_mb']:.1f} MB"
+        )
+
+
+def main():
+    args = _parse_args()
+    baseline = json.loads(args.baseline.read_text()) if args.baseline is not None else None
+    os.environ.setdefault("DATABASE_URL", args.database_url)
+    if args.workers is not None:
+        os.environ["MATCH_WORKERS"] = str(args.workers)
+
+    # Importados depois de ajustar o ambiente: MATCH_WORKERS é lido no import
+    from dotenv import dotenv_values
+    from sqlalchemy import create_engine, delete, event
+    from sqlmodel import Session
+    from benchmarks.synthetic import CohortConfig, CohortGenerator
+    from src.controllers.match_controller import MatchController, MatchRequest
+    from src.schemas.tables import Mentora, Mentorada, PedidosMentoria
+    from src.services import match_scoring
+
+    if args.database_url == dotenv_values(".env").get("DATABASE_URL"):
+        sys.exit("--database-url é o banco da aplicação em .env; use um banco descartável")
+
+    engine = create_engine(args.database_url)
+    comandos = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        nonlocal comandos
+        comandos += 1
+
+    def rodada(request: MatchRequest) -> tuple[Any, float, int]:
+        nonlocal comandos
+        comandos = 0
+        inicio_rodada = datetime.now()
+        with Session(engine) as session:
+            inicio = perf_counter()
+            resultado = MatchController.run_match(request, session)
+            duracao = (perf_counter() - inicio) * 1000
+            total_comandos = comandos
+            # Desfaz a rodada para a próxima repetição partir do mesmo estado
+            session.execute(delete(PedidosMentoria).where(PedidosMentoria.data_pedido >= inicio_rodada))
+            session.commit()
+        return resultado, duracao, total_comandos
+
+    resultados: list[dict[str, Any]] = []
+    for tamanho in args.sizes:
+        config = CohortConfig(
+            mentoradas=tamanho,
+            mentoras=max(1, int(tamanho * args.mentor_ratio)),
+            seed=args.seed,
+        )
+        print(f"[{tamanho}] gerando coorte ({config.mentoras} mentoras)...", flush=True)
+        inicio = perf_counter()
+        linhas = CohortGenerator(config).write(engine)
+        geracao_s = perf_counter() - inicio
+
+        for modo in args.modes:
+            request = MatchRequest(assignment_mode=modo, same_university=args.same_university)
+            duracoes: list[float] = []
+            fases: list[dict[str, float]] = []
+            for _ in range(args.repeat):
+                resultado, duracao, total_comandos = rodada(request)
+                duracoes.append(duracao)
+                fases.append(resultado.tempos_ms)
+
+            # tracemalloc deixa o Python bem mais lento: memória numa rodada à parte
+            tracemalloc.start()
+            rodada(request)
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            item = {
+                "mentoradas": tamanho,
+                "mentoras": config.mentoras,
+                "modo": modo,
+                "linhas": linhas,
+                "geracao_s": round(geracao_s, 3),
+                "pedidos_criados": resultado.pedidos_criados,
+                "mentoradas_sem_match": resultado.mentoradas_sem_match,
+                "mentoradas_com_arestas_cortadas": resultado.mentoradas_com_arestas_cortadas,
+                "pontuacao_total": resultado.pontuacao_total,
+                "tempo_ms": {
+                    "mediana": round(median(duracoes), 3),
+                    "min": round(min(duracoes), 3),
+                    "max": round(max(duracoes), 3),
+                    "execucoes": [round(d, 3) for d in duracoes],
+                },
+                "fases_ms": {
+                    fase: round(median(f[fase] for f in fases), 3) for fase in fases[0]
+                },
+                "comandos_sql": total_comandos,
+                "pico_memoria_mb": round(pico / 2**20, 3),
+            }
+            resultados.append(item)
+            print(
+                f"[{tamanho}] {modo}: {item['tempo_ms']['mediana']:.1f} ms, "
+                f"{total_comandos} comandos SQL, {item['pico_memoria_mb']:.1f} MB, "
+                f"{item['pedidos_criados']} pedidos, {item['mentoradas_sem_match']} sem match",
+                flush=True,
+            )
+
+    # _score_match isolado, sobre pares sorteados de uma coorte sintética pequena
+    rng = random.Random(args.seed)
+    coorte = CohortGenerator(CohortConfig(mentoradas=1000, seed=args.seed)).rows()
+    mentoras = coorte[Mentora]
+    mentoradas = coorte[Mentorada]
+    pares = [(rng.choice(mentoras), rng.choice(mentoradas)) for _ in range(args.score_pairs)]
+    inicio = perf_counter()
+    for mentora, mentorada in pares:
+        MatchController._score_match(
+            mentora["competencias"],
+            mentora["hobbies"],
+            mentorada["competencias_interesse"],
+            mentorada["hobbies"],
+            mentorada["curso"],
+        )
+    score_s = perf_counter() - inicio
+
+    relatorio = {
+        "commit": _commit_atual(),
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "match_workers": match_scoring.MATCH_WORKERS,
+        "match_chunk_size": match_scoring.MATCH_CHUNK_SIZE,
+        "seed": args.seed,
+        "same_university": args.same_university,
+        "repeticoes": args.repeat,
+        "resultados": resultados,
+        "score_match": {
+            "pares": args.score_pairs,
+            "tempo_s": round(score_s, 4),
+            "pares_por_segundo": round(args.score_pairs / score_s) if score_s else None,
+        },
+    }
+    saida = args.output or Path("benchmarks/results") / f"match-{datetime.now():%Y%m%d-%H%M%S}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False))
+    print(f"Resultados em {saida}")
+    if baseline is not None:
+        _comparar(relatorio, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Sequence
+from sqlalchemy import Engine, insert
+from sqlmodel import SQLModel
+from src.schemas.tables import (
+    Mentora,
+    Mentorada,
+    Mentoria,
+    PedidosMentoria,
+    UniversidadeInstituicao,
+    Usuario,
+)
+
+COMPETENCIAS = [
+    "Python", "Ciência de Dados", "Machine Learning", "Desenvolvimento Web",
+    "Engenharia de Software", "Estatística", "Banco de Dados", "Cloud",
+    "Segurança da Informação", "DevOps", "Java", "JavaScript", "Robótica",
+    "Eletrônica", "Bioinformática", "Química Analítica", "Matemática Aplicada",
+    "Física", "Pesquisa Acadêmica", "Gestão de Projetos", "UX Design",
+    "Inteligência Artificial", "Computação Gráfica", "Redes", "Sistemas Embarcados",
+    "Biotecnologia", "Engenharia Civil", "Engenharia Elétrica", "Engenharia Química",
+    "Análise de Dados", "Empreendedorismo", "Liderança", "Comunicação",
+    "Carreira Internacional", "Mercado Financeiro", "Produto", "Blockchain",
+    "Visão Computacional", "Processamento de Linguagem Natural", "Otimização",
+]
+HOBBIES = [
+    "Leitura", "Música", "Corrida", "Viagens", "Fotografia", "Games", "Culinária",
+    "Yoga", "Cinema", "Séries", "Dança", "Desenho", "Trilhas", "Natação",
+    "Xadrez", "Jardinagem", "Podcasts", "Voluntariado", "Idiomas", "Artesanato",
+    "Ciclismo", "Teatro", "Escrita", "Astronomia", "Board games",
+]
+CURSOS = [
+    "Ciência da Computação", "Engenharia de Software", "Engenharia Civil",
+    "Engenharia Elétrica", "Engenharia Química", "Matemática", "Física",
+    "Química", "Biotecnologia", "Estatística", "Sistemas de Informação",
+    "Engenharia de Produção",
+]
+SENHA = "$2b$04$" + "x" * 53
+
+
+def _zipf(termos: Sequence[str], expoente: float) -> list[float]:
+    return [1 / (posicao + 1) ** expoente for posicao in range(len(termos))]
+
+
+@dataclass
+class CohortConfig:
+    """
+    Tamanho e forma de uma coorte sintética.
+
+    A popularidade de competências, hobbies e cursos segue uma lei de Zipf
+    (poucos termos muito comuns e uma cauda longa), e parte das mentoradas
+    repete uma competência, como acontece nos cadastros reais.
+    """
+
+    mentoradas: int
+    mentoras: int | None = None
+    universidades: int = 20
+    seed: int = 42
+    expoente_zipf: float = 1.1
+    mentoras_ativas: float = 0.85
+    mentoradas_ativas: float = 0.9
+    mentorias_ativas: float = 0.05
+    pedidos_pendentes: float = 0.05
+
+    def __post_init__(self):
+        if self.mentoras is None:
+            self.mentoras = max(1, self.mentoradas // 4)
+
+
+class CohortGenerator:
+    """Gera e grava uma coorte sintética determinística (mesma `seed`, mesmas linhas)."""
+
+    def __init__(self, config: CohortConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self._pesos_competencias = _zipf(COMPETENCIAS, config.expoente_zipf)
+        self._pesos_hobbies = _zipf(HOBBIES, config.expoente_zipf)
+        self._pesos_cursos = _zipf(CURSOS, config.expoente_zipf)
+
+    def _uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _amostra(self, termos: Sequence[str], pesos: list[float], minimo: int, maximo: int) -> list[str]:
+        quantidade = self.rng.randint(minimo, maximo)
+        escolhidos: list[str] = []
+        while len(escolhidos) < quantidade:
+            termo = self.rng.choices(termos, pesos)[0]
+            if termo not in escolhidos:
+                escolhidos.append(termo)
+        return escolhidos
+
+    def _usuario(self, prefixo: str, indice: int, nascimento: date) -> dict[str, Any]:
+        numero = f"{indice:09d}"
+        return {
+            "id_usuario": self._uuid(),
+            "nome_completo": f"{prefixo} {indice}",
+            "cpf": f"{numero[:3]}.{numero[3:6]}.{numero[6:]}-{'01' if prefixo == 'Mentora' else '02'}",
+            "email": f"{prefixo.lower()}{indice}@bench.local",
+            "senha": SENHA,
+            "data_nascimento": nascimento,
+        }
+
+    def rows(self) -> dict[type[SQLModel], list[dict[str, Any]]]:
+        config = self.config
+        universidades = [
+            {"id_universidade_instituicao": self._uuid(), "nome_instituicao": f"Universidade {i}"}
+            for i in range(config.universidades)
+        ]
+        ids_universidades = [u["id_universidade_instituicao"] for u in universidades]
+        usuarios: list[dict[str, Any]] = []
+        mentoras: list[dict[str, Any]] = []
+        mentoradas: list[dict[str, Any]] = []
+
+        for i in range(config.mentoras or 0):
+            usuario = self._usuario("Mentora", i, date(1985, 1, 1))
+            usuarios.append(usuario)
+            mentoras.append({
+                "id_mentora": self._uuid(),
+                "foto_perfil": None,
+                "linkedin": None,
+                "formacao": self.rng.choices(CURSOS, self._pesos_cursos)[0],
+                "cargo_atual": "Especialista",
+                "area_atuacao": "Tecnologia",
+                "cidade": "São Paulo",
+                "estado": "SP",
+                "etnia": "Não informado",
+                "genero": "Feminino",
+                "foi_mentora": self.rng.random() < 0.5,
+                "foi_mentorada": self.rng.random() < 0.3,
+                "perfil_interesse": "Graduação",
+                "foco_mentoria": ["Carreira"],
+                "idiomas": ["Português"],
+                "competencias": self._amostra(COMPETENCIAS, self._pesos_competencias, 1, 8),
+                "ajuda": "Orientação de carreira",
+                "bio": None,
+                "termo_assinado": None,
+                "conta_ativa": self.rng.random() < config.mentoras_ativas,
+                "disponibilidade": "Noite",
+                "hobbies": self._amostra(HOBBIES, self._pesos_hobbies, 0, 5),
+                "id_usuario": usuario["id_usuario"],
+                "id_universidade_instituicao": self.rng.choice(ids_universidades),
+            })
+
+        for i in range(config.mentoradas):
+            usuario = self._usuario("Mentorada", i, date(2003, 1, 1))
+            usuarios.append(usuario)
+            competencias = self._amostra(COMPETENCIAS, self._pesos_competencias, 0, 5)
+            if competencias and self.rng.random() < 0.1:
+                competencias.append(competencias[0])
+            mentoradas.append({
+                "id_mentorada": self._uuid(),
+                "foto_perfil": None,
+                "linkedin": None,
+                "genero": "Feminino",
+                "etnia": "Não informado",
+                "area_stem": "Tecnologia",
+                "curso": self.rng.choices(CURSOS, self._pesos_cursos)[0],
+                "ano_curso": 2025,
+                "semestre": self.rng.randint(1, 10),
+                "situacao_atual": "Estudante",
+                "foco_mentoria": "Carreira",
+                "idiomas": ["Português"],
+                "disponibilidade": "Noite",
+                "termo_assinado": None,
+                "conta_ativa": self.rng.random() < config.mentoradas_ativas,
+                "hobbies": self._amostra(HOBBIES, self._pesos_hobbies, 0, 4),
+                "competencias_interesse": competencias,
+                "id_usuario": usuario["id_usuario"],
+                "id_universidade_instituicao": self.rng.choice(ids_universidades),
+            })
+
+        # Parte da coorte já está ocupada antes da rodada, como em produção
+        quantidade_mentorias = int(min(len(mentoras), len(mentoradas)) * config.mentorias_ativas)
+        quantidade_pedidos = int(min(len(mentoras), len(mentoradas)) * config.pedidos_pendentes)
+        pares = list(zip(
+            self.rng.sample(mentoras, quantidade_mentorias + quantidade_pedidos),
+            self.rng.sample(mentoradas, quantidade_mentorias + quantidade_pedidos),
+        ))
+        mentorias = [
+            {
+                "id_mentoria": self._uuid(),
+                "estado_mentoria": "ativa",
+                "avaliacao_mentora": None,
+                "avaliacao_mentorada": None,
+                "nota_mentora": None,
+                "nota_mentorada": None,
+                "progresso_mentorada": 0,
+                "ano_mentoria": 2025,
+                "comeco_mentoria": date(2025, 3, 1),
+                "fim_mentoria": None,
+                "id_mentora": mentora["id_mentora"],
+                "id_mentorada": mentorada["id_mentorada"],
+            }
+            for mentora, mentorada in pares[:quantidade_mentorias]
+        ]
+        pedidos = [
+            {
+                "id_pedidos_mentoria": self._uuid(),
+                "estado_pedido": "pendente",
+                "data_pedido": datetime(2025, 3, 1),
+                "pontuacao": 0,
+                "motivo": [],
+                "id_mentora": mentora["id_mentora"],
+                "id_mentorada": mentorada["id_mentorada"],
+            }
+            for mentora, mentorada in pares[quantidade_mentorias:]
+        ]
+
+        return {
+            UniversidadeInstituicao: universidades,
+            Usuario: usuarios,
+            Mentora: mentoras,
+            Mentorada: mentoradas,
+            Mentoria: mentorias,
+            PedidosMentoria: pedidos,
+        }
+
+    def write(self, engine: Engine, batch_size: int = 5000) -> dict[str, int]:
+        """Recria o schema e grava a coorte. Devolve a quantidade de linhas por tabela."""
+        SQLModel.metadata.drop_all(engine)
+        SQLModel.metadata.create_all(engine)
+        totais: dict[str, int] = {}
+        with engine.begin() as conexao:
+            for tabela, linhas in self.rows().items():
+                for inicio in range(0, len(linhas), batch_size):
+                    conexao.execute(insert(tabela), linhas[inicio:inicio + batch_size])
+                totais[tabela.__tablename__] = len(linhas)
+        return totais
@@ -2,4 +2,8 @@ from src.database import create_db_and_tables
 
 
 if __name__ == "__main__":
-    create_db_and_tables()
+    aplicadas = create_db_and_tables()
+    if aplicadas:
+        print("Migrações aplicadas:", ", ".join(str(versao) for versao in aplicadas))
+    else:
+        print("Banco já estava na versão mais recente")
@@ -12,15 +12,53 @@ from src.routers import (
     admin
 )
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+from contextlib import asynccontextmanager
+from sqlmodel import Session
+from src.database import async_engine, async_replica_engines, engine
+from src.services.monitor_sql import MonitorSqlMiddleware
+from src.services.revogacao_service import TOKEN_REVOGADO_REFRESH_S, RevogacaoService
+from src.services.unicidade_service import UnicidadeService
 
-app = FastAPI(title="STEM Women Backend")
+
+def _atualizar_revogados():
+    with Session(engine) as session:
+        RevogacaoService.atualizar(session)
+
+
+async def _atualizar_revogados_periodicamente():
+    while True:
+        await asyncio.sleep(TOKEN_REVOGADO_REFRESH_S)
+        try:
+            await asyncio.to_thread(_atualizar_revogados)
+        except Exception as e:
+            print(e)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with Session(engine) as session:
+        UnicidadeService.carregar(session)
+        RevogacaoService.carregar(session)
+    tarefa = asyncio.create_task(_atualizar_revogados_periodicamente())
+    yield
+    tarefa.cancel()
+    # As conexões do asyncpg pertencem ao event loop que as abriu
+    for engine_async in (async_engine, *async_replica_engines):
+        await engine_async.dispose()
+
+
+app = FastAPI(title="STEM Women Backend", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins="*",
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Sem isso o navegador esconde do front (outra origem) o cursor da paginação
+    expose_headers=["X-Next-Cursor"],
 )
+app.add_middleware(MonitorSqlMiddleware)
 
 app.include_router(mentors.router, prefix="/mentors", tags=["Mentores"])
 app.include_router(users.router, prefix="/users", tags=["Usuários"])
@@ -1,10 +1,12 @@
 from fastapi import HTTPException
 from pydantic import BaseModel
 from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.status import HTTP_400_BAD_REQUEST, HTTP_401_UNAUTHORIZED
 
-from src.models.login import get_current_user
-from src.schemas.tables import Administrador, Mentora, Mentorada, Usuario
+from src.schemas.tables import FotoPerfil, Mentora, Mentorada, Usuario
+from src.services.foto_service import url_foto
+from src.services.match_index import mentor_index
 
 
 class UpdateApproval(BaseModel):
@@ -16,17 +18,12 @@ class UpdateApprovalMentee(BaseModel):
     approved : bool
 
 class AdminController:
+    """Endpoints administrativos; o router só chega aqui com um admin (`AdminUser`)"""
+
     @staticmethod
-    def get_approvals(token : str, session : Session) -> list[dict[str,any]]:
-        user = get_current_user(token, session)
+    async def get_approvals(session : AsyncSession) -> list[dict[str,any]]:
         try:
-            if user is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
-            statement = select(Administrador).where(Administrador.id_usuario == user.id_usuario)
-            admin = session.exec(statement).one_or_none()
-            if admin is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
-            mentors = session.exec(
+            mentors = (await session.exec(
                 select(
                     col(Mentora.id_mentora).label("id"),
                     col(Usuario.nome_completo).label("nome"),
@@ -34,26 +31,24 @@ class AdminController:
                     col(Mentora.formacao).label("formacao"),
                     col(Mentora.linkedin).label("linkedin"),
                     col(Mentora.competencias).label("skills"),
-                    col(Mentora.foto_perfil).label("foto"),
+                    col(Usuario.id_usuario).label("id_usuario"),
+                    col(FotoPerfil.hash).label("foto_hash"),
                 )\
                 .where(Mentora.conta_ativa == False)\
-                .join(Usuario)
-            ).mappings().all()
-            return mentors
+                .join(Usuario, col(Usuario.id_usuario) == Mentora.id_usuario)\
+                .outerjoin(FotoPerfil, col(FotoPerfil.id_usuario) == Usuario.id_usuario)
+            )).mappings().all()
+            return [
+                {**mentor, "foto_url": url_foto(mentor["id_usuario"], mentor["foto_hash"])}
+                for mentor in mentors
+            ]
         except Exception as e:
             print(e)
             raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
 
     @staticmethod
-    def update_approval(data : UpdateApproval,token : str, session : Session):
-        user = get_current_user(token, session)
+    def update_approval(data : UpdateApproval, session : Session):
         try:
-            if user is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
-            statement = select(Administrador).where(Administrador.id_usuario == user.id_usuario)
-            admin = session.exec(statement).one_or_none()
-            if admin is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
             mentor = session.exec(
                 select(Mentora)\
                 .where(Mentora.id_mentora == data.mentor_id)
@@ -62,47 +57,42 @@ class AdminController:
                 raise HTTPException(status_code=HTTP_400_BAD_REQUEST)
             mentor.conta_ativa = data.approved
             session.commit()
+            if data.approved:
+                mentor_index.add(mentor.id_mentora, mentor.competencias, mentor.hobbies)
+            else:
+                mentor_index.discard(mentor.id_mentora)
         except Exception as e:
             print(e)
             raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
         
     @staticmethod
-    def get_approvals_mentee(token : str, session : Session) -> list[dict[str,any]]:
-        user = get_current_user(token, session)
+    async def get_approvals_mentee(session : AsyncSession) -> list[dict[str,any]]:
         try:
-            if user is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
-            statement = select(Administrador).where(Administrador.id_usuario == user.id_usuario)
-            admin = session.exec(statement).one_or_none()
-            if admin is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
-            mentees = session.exec(
+            mentees = (await session.exec(
                 select(
                     col(Mentorada.id_mentorada).label("id"),
                     col(Usuario.nome_completo).label("nome"),
                     col(Mentorada.curso).label("curso"),
                     col(Mentorada.competencias_interesse).label("skills"),
                     col(Mentorada.linkedin).label("linkedin"),
-                    col(Mentorada.foto_perfil).label("foto")
+                    col(Usuario.id_usuario).label("id_usuario"),
+                    col(FotoPerfil.hash).label("foto_hash")
                 )\
                 .where(Mentorada.conta_ativa == False)\
-                .join(Usuario)\
-            ).mappings().all()
-            return mentees
+                .join(Usuario, col(Usuario.id_usuario) == Mentorada.id_usuario)\
+                .outerjoin(FotoPerfil, col(FotoPerfil.id_usuario) == Usuario.id_usuario)
+            )).mappings().all()
+            return [
+                {**mentee, "foto_url": url_foto(mentee["id_usuario"], mentee["foto_hash"])}
+                for mentee in mentees
+            ]
         except Exception as e:
             print(e)
             raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
 
     @staticmethod
-    def update_approval_mentee(data : UpdateApprovalMentee,token : str, session : Session):
-        user = get_current_user(token, session)
+    def update_approval_mentee(data : UpdateApprovalMentee, session : Session):
         try:
-            if user is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
-            statement = select(Administrador).where(Administrador.id_usuario == user.id_usuario)
-            admin = session.exec(statement).one_or_none()
-            if admin is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
             mentee = session.exec(
                 select(Mentorada)\
                 .where(Mentorada.id_mentorada == data.mentee_id)
@@ -1,5 +1,6 @@
 from fastapi import HTTPException, status
 from pydantic import BaseModel
+from sqlmodel import Session
 from src.models.login import CadastroCoordenador, Login, LoginModel, Cadastro, CadastroMentora, CadastroMentorada
 
 
@@ -30,8 +31,8 @@ class AuthController:
             )
 
     @staticmethod
-    def signup_mentor(credentials: CadastroMentora) -> dict:
-        signup = Cadastro.fazer_cadastro_mentora(credentials)
+    def signup_mentor(credentials: CadastroMentora, session: Session) -> dict:
+        signup = Cadastro.fazer_cadastro_mentora(credentials, session)
         if signup is None:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -40,8 +41,8 @@ class AuthController:
         return {"message": "Mentora registrada com sucesso"}
 
     @staticmethod
-    def signup_mentee(credentials: CadastroMentorada) -> dict:
-        signup = Cadastro.fazer_cadastro_mentorada(credentials)
+    def signup_mentee(credentials: CadastroMentorada, session: Session) -> dict:
+        signup = Cadastro.fazer_cadastro_mentorada(credentials, session)
         if signup is None:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
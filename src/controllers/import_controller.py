@@ -0,0 +1,263 @@
+import csv
+import io
+import logging
+import os
+from itertools import islice
+from types import NoneType
+from typing import IO, Iterator, get_args
+from uuid import UUID
+import dotenv
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, col, or_, select
+from src.models.login import (
+    CadastroMentora,
+    CadastroMentorada,
+    Identidade,
+    TipoUsuario,
+    montar_mentora,
+    montar_mentorada,
+    montar_usuario,
+)
+from src.schemas.tables import Coordenador, Mentora, Mentorada, UniversidadeInstituicao, Usuario
+from src.services.senha_service import SenhaService
+from src.services.unicidade_service import UnicidadeService
+
+dotenv.load_dotenv()
+
+logger = logging.getLogger("src.importacao")
+
+# Linhas do CSV validadas, com senha gerada e gravadas por vez
+IMPORTACAO_CHUNK_SIZE = int(os.getenv("IMPORTACAO_CHUNK_SIZE", 500))
+# Separador dos campos de lista (idiomas, competências, hobbies...) dentro de uma célula
+SEPARADOR_LISTA = "|"
+# Marcador com o tamanho de um hash bcrypt, trocado pelo hash real antes do INSERT
+SENHA_PENDENTE = "*" * 60
+
+
+class ErroImportacao(BaseModel):
+    linha: int
+    email: str | None
+    erro: str
+
+
+class ResultadoImportacao(BaseModel):
+    total: int
+    criados: int
+    erros: list[ErroImportacao]
+
+
+class _Linha:
+    """Uma linha válida do CSV, com o usuário e o perfil prontos para gravar."""
+
+    def __init__(self, numero: int, cadastro: CadastroMentora | CadastroMentorada, usuario: Usuario, perfil: Mentora | Mentorada):
+        self.numero = numero
+        self.cadastro = cadastro
+        self.usuario = usuario
+        self.perfil = perfil
+
+
+def _colunas(tabela) -> list[str]:
+    return [coluna.key for coluna in tabela.__table__.columns]
+
+
+class ImportController:
+    @staticmethod
+    def _converter(modelo: type[CadastroMentora] | type[CadastroMentorada], linha: dict[str, str | None]) -> dict:
+        """Células do CSV para os campos do cadastro: listas separadas por `|`, vazio = None."""
+        dados = {}
+        for campo, info in modelo.model_fields.items():
+            valor = (linha.get(campo) or "").strip()
+            if info.annotation == list[str]:
+                dados[campo] = [item.strip() for item in valor.split(SEPARADOR_LISTA) if item.strip()]
+            elif valor == "" and NoneType in get_args(info.annotation):
+                dados[campo] = None
+            elif valor != "":
+                dados[campo] = valor
+        return dados
+
+    @staticmethod
+    def _blocos(arquivo: IO[bytes]) -> Iterator[list[tuple[int, dict]]]:
+        """Lê o CSV aos poucos, em blocos de `IMPORTACAO_CHUNK_SIZE` linhas."""
+        leitor = csv.DictReader(io.TextIOWrapper(arquivo, encoding="utf-8-sig", newline=""))
+        linhas = ((leitor.line_num, linha) for linha in leitor)
+        while bloco := list(islice(linhas, IMPORTACAO_CHUNK_SIZE)):
+            yield bloco
+
+    @staticmethod
+    def _universidade_coordenador(identidade: Identidade, session: Session) -> UUID | None:
+        if identidade.tipo != TipoUsuario.COORDENADOR:
+            return None
+        return session.exec(
+            select(Coordenador.id_universidade_instituicao)
+            .where(Coordenador.id_coordenador == identidade.id_perfil)
+        ).one()
+
+    @staticmethod
+    def _validar_bloco(
+        tipo: TipoUsuario,
+        bloco: list[tuple[int, dict]],
+        universidade_coordenador: UUID | None,
+        vistos: set[str],
+        erros: list[ErroImportacao],
+        session: Session,
+    ) -> list[_Linha]:
+        modelo = CadastroMentorada if tipo == TipoUsuario.MENTORADA else CadastroMentora
+        validas: list[_Linha] = []
+        for numero, linha in bloco:
+            email = (linha.get("email") or "").strip() or None
+            try:
+                cadastro = modelo.model_validate(ImportController._converter(modelo, linha))
+                # A senha entra depois, no lote de hashes das linhas válidas
+                usuario = montar_usuario(cadastro, SENHA_PENDENTE)
+                if tipo == TipoUsuario.MENTORADA:
+                    perfil = montar_mentorada(cadastro, usuario.id_usuario)
+                else:
+                    perfil = montar_mentora(cadastro, usuario.id_usuario)
+                # Tamanhos de e-mail, CPF e nome conferidos aqui, e não no INSERT do bloco
+                Usuario.model_validate(usuario.model_dump())
+            except ValidationError as e:
+                erros.append(ErroImportacao(linha=numero, email=email, erro="; ".join(
+                    f"{'.'.join(str(parte) for parte in erro['loc'])}: {erro['msg']}" for erro in e.errors()
+                )))
+                continue
+            except (ValueError, IndexError) as e:
+                erros.append(ErroImportacao(linha=numero, email=email, erro=f"Valor inválido: {e}"))
+                continue
+            if "email:" + cadastro.email in vistos or "cpf:" + cadastro.cpf in vistos:
+                erros.append(ErroImportacao(linha=numero, email=email, erro="E-mail ou CPF repetido no arquivo"))
+                continue
+            vistos.add("email:" + cadastro.email)
+            vistos.add("cpf:" + cadastro.cpf)
+            if (
+                universidade_coordenador is not None
+                and tipo == TipoUsuario.MENTORADA
+                and perfil.id_universidade_instituicao != universidade_coordenador
+            ):
+                erros.append(ErroImportacao(linha=numero, email=email, erro="Universidade diferente da do coordenador"))
+                continue
+            validas.append(_Linha(numero, cadastro, usuario, perfil))
+
+        if not validas:
+            return validas
+        # Uma consulta por bloco para o que já existe no banco
+        existentes = session.exec(
+            select(Usuario.email, Usuario.cpf).where(or_(
+                col(Usuario.email).in_([linha.cadastro.email for linha in validas]),
+                col(Usuario.cpf).in_([linha.cadastro.cpf for linha in validas]),
+            ))
+        ).all()
+        emails = {email for email, _ in existentes}
+        cpfs = {cpf for _, cpf in existentes}
+        universidades = set()
+        if tipo == TipoUsuario.MENTORADA:
+            universidades = set(session.exec(
+                select(UniversidadeInstituicao.id_universidade_instituicao).where(
+                    col(UniversidadeInstituicao.id_universidade_instituicao).in_(
+                        {linha.perfil.id_universidade_instituicao for linha in validas}
+                    )
+                )
+            ).all())
+        restantes = []
+        for linha in validas:
+            if linha.cadastro.email in emails:
+                erro = "E-mail já cadastrado"
+            elif linha.cadastro.cpf in cpfs:
+                erro = "CPF já cadastrado"
+            elif tipo == TipoUsuario.MENTORADA and linha.perfil.id_universidade_instituicao not in universidades:
+                erro = "Universidade não encontrada"
+            else:
+                restantes.append(linha)
+                continue
+            erros.append(ErroImportacao(linha=linha.numero, email=linha.cadastro.email, erro=erro))
+        return restantes
+
+    @staticmethod
+    def _inserir(tabela, usuarios: list[dict], perfis: dict[UUID, dict], session: Session) -> set[UUID]:
+        """INSERT em lote dos usuários (ignorando repetidos) e dos perfis dos que entraram."""
+        inseridos = set(session.execute(
+            pg_insert(Usuario).on_conflict_do_nothing().returning(Usuario.id_usuario),
+            usuarios,
+        ).scalars())
+        if inseridos:
+            session.execute(pg_insert(tabela), [perfis[id_usuario] for id_usuario in inseridos])
+        return inseridos
+
+    @staticmethod
+    def _gravar_bloco(tipo: TipoUsuario, linhas: list[_Linha], erros: list[ErroImportacao], session: Session) -> int:
+        """
+        Gera as senhas no pool do bcrypt e grava usuários e perfis com dois
+        INSERTs em lote, numa transação por bloco. Quem esbarrar nos índices
+        únicos (cadastrado por fora no meio da importação) vira erro da linha.
+        Se o lote falhar, as linhas são regravadas uma a uma, cada uma num
+        savepoint, para apontar quais deram erro.
+        """
+        hashes = SenhaService.gerar_hashes([linha.cadastro.senha for linha in linhas])
+        tabela = Mentorada if tipo == TipoUsuario.MENTORADA else Mentora
+        colunas_usuario = _colunas(Usuario)
+        colunas_perfil = _colunas(tabela)
+        usuarios: list[dict] = []
+        perfis: dict[UUID, dict] = {}
+        for linha, hash_senha in zip(linhas, hashes):
+            linha.usuario.senha = hash_senha
+            usuarios.append({coluna: getattr(linha.usuario, coluna) for coluna in colunas_usuario})
+            perfis[linha.usuario.id_usuario] = {coluna: getattr(linha.perfil, coluna) for coluna in colunas_perfil}
+        falhas: dict[int, str] = {}
+        try:
+            inseridos = ImportController._inserir(tabela, usuarios, perfis, session)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.warning("Lote de %d linhas falhou, regravando uma a uma: %s", len(linhas), e)
+            inseridos = set()
+            for linha, usuario in zip(linhas, usuarios):
+                try:
+                    with session.begin_nested():
+                        inseridos |= ImportController._inserir(tabela, [usuario], perfis, session)
+                except Exception as e:
+                    falhas[linha.numero] = f"Erro ao gravar: {str(e.orig if hasattr(e, 'orig') else e).splitlines()[0]}"
+            session.commit()
+        for linha in linhas:
+            if linha.usuario.id_usuario in inseridos:
+                UnicidadeService.registrar(linha.cadastro.email, linha.cadastro.cpf)
+            else:
+                erro = falhas.get(linha.numero, "E-mail ou CPF já cadastrado")
+                erros.append(ErroImportacao(linha=linha.numero, email=linha.cadastro.email, erro=erro))
+        return len(inseridos)
+
+    @staticmethod
+    def import_csv(tipo: TipoUsuario, arquivo: IO[bytes], identidade: Identidade, session: Session) -> ResultadoImportacao:
+        """
+        Cadastra as mentoradas ou mentoras de um CSV (uma coluna por campo
+        do cadastro). Linhas com problema vão para o relatório de erros e
+        não impedem as demais; cada bloco gravado fica gravado. Um trecho
+        ilegível (encoding, aspas) encerra a leitura ali e vira um erro do
+        relatório, com o que foi gravado antes dele.
+        """
+        universidade_coordenador = ImportController._universidade_coordenador(identidade, session)
+        vistos: set[str] = set()
+        erros: list[ErroImportacao] = []
+        total = criados = 0
+        try:
+            for bloco in ImportController._blocos(arquivo):
+                total += len(bloco)
+                validas = ImportController._validar_bloco(tipo, bloco, universidade_coordenador, vistos, erros, session)
+                if validas:
+                    criados += ImportController._gravar_bloco(tipo, validas, erros, session)
+        except (UnicodeDecodeError, csv.Error) as e:
+            if total == 0:
+                # Nada foi lido nem gravado: o arquivo inteiro é inválido
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"CSV inválido perto da linha {total + 2}: {e}",
+                )
+            # Os blocos anteriores já foram gravados: a leitura para aqui e
+            # o relatório diz até onde o arquivo foi importado
+            erros.append(ErroImportacao(
+                linha=total + 2,
+                email=None,
+                erro=f"CSV inválido a partir daqui, o restante do arquivo não foi importado: {e}",
+            ))
+        erros.sort(key=lambda erro: erro.linha)
+        return ResultadoImportacao(total=total, criados=criados, erros=erros)
@@ -1,16 +1,32 @@
-from typing import Literal
-from uuid import UUID
+import base64
+import json
+from time import perf_counter
+from typing import Any, Callable, Generator, Iterator, Literal
+from uuid import UUID, uuid4
 from fastapi import HTTPException, status
-from sqlmodel import Session, select
-from src.models.login import TipoUsuario, get_current_user, get_tipo_usuario
+from sqlalchemy import and_, delete, or_, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased
+from sqlmodel import Session, col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.models.login import Identidade
+from src.services.foto_service import url_foto
+from src.services.match_assignment import MATCH_OPTIMAL_ARESTAS, optimal_assignment
+from src.services.match_availability import MatchAvailability
+from src.services.match_cache import match_score_cache
+from src.services.match_jobs import MatchJobService
 from src.schemas.tables import (
+    ExecucaoMatch,
+    FotoPerfil,
     PedidosMentoria,
     Mentorada,
     Mentora,
     Mentoria,
     Usuario,
 )
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+import numpy as np
 
 
 from datetime import datetime
@@ -20,13 +36,15 @@ class MatchSugerido(BaseModel):
         nome : str
         cargo : str
         skills : list[str]
-        foto : bytes | None
+        foto_url : str | None
+        foto_hash : str | None
 
     class MentoradaOptional(BaseModel):
         nome : str
         curso : str
         objetivo : str
-        foto : bytes | None
+        foto_url : str | None
+        foto_hash : str | None
         
     id : UUID
     score : int
@@ -54,6 +72,9 @@ class MatchRequest(BaseModel):
     min_score: int | None = 1
     id_universidade : str | None = None
     same_university: bool | None = False
+    # "greedy": cada mentorada, na ordem do banco, fica com a melhor mentora livre
+    # "optimal": emparelhamento de peso máximo da coorte inteira
+    assignment_mode: Literal["greedy", "optimal"] = "greedy"
 
 class MatchItem(BaseModel):
     id_mentora: str
@@ -77,6 +98,85 @@ class MatchResponse(BaseModel):
     matches: list[MatchItem]
 
 
+class MatchRunResponse(BaseModel):
+    message: str
+    assignment_mode: str
+    pedidos_criados: int
+    pontuacao_total: int
+    # Mentoradas que terminaram a rodada sem pedido (sem mentora livre, ou
+    # sem aresta no modo optimal)
+    mentoradas_sem_match: int = 0
+    # Modo optimal com MATCH_OPTIMAL_ARESTAS: mentoradas que tiveram arestas
+    # descartadas pelo limite. Acima de 0 a pontuação pode ficar abaixo do
+    # ótimo exato
+    mentoradas_com_arestas_cortadas: int = 0
+    # Tempo de cada fase da rodada em milissegundos: load, cache, score e write
+    tempos_ms: dict[str, float] = {}
+
+
+class SugestaoMatch(BaseModel):
+    id_pedidos_mentoria: UUID
+    id_mentora: UUID
+    nome_mentora: str
+    id_mentorada: UUID
+    nome_mentorada: str
+    pontuacao: int
+    motivo: list[str]
+
+
+# Estados que, numa atualização de pedido, aceitam a mentoria
+ESTADOS_ACEITE = ("aceita", "aceito", "aprovado", "accepted")
+
+
+class DecisaoPedido(BaseModel):
+    id_pedidos_mentoria: UUID
+    estado: str = Field(max_length=10)
+
+
+class DecisoesPedidos(BaseModel):
+    decisoes: list[DecisaoPedido] = Field(max_length=5000)
+
+
+class ResultadoDecisao(BaseModel):
+    id_pedidos_mentoria: UUID
+    estado: str
+    # "aceito": mentoria criada; "atualizado": só o estado mudou;
+    # "conflito": mentora ou mentorada já tem mentoria ativa ou, para
+    # "pendente", já tem outro pedido pendente;
+    # "removido": apagado por um pedido aceito no mesmo lote, antes ou depois;
+    # "nao_encontrado" e "duplicado": nada foi feito
+    resultado: Literal["aceito", "atualizado", "conflito", "removido", "nao_encontrado", "duplicado"]
+
+
+class MatchJobResponse(BaseModel):
+    id_execucao: UUID
+    estado: str
+    total_mentoradas: int
+    mentoradas_processadas: int
+    pedidos_criados: int
+    tempo_decorrido_s: float
+    resultado: MatchRunResponse | None = None
+    erro: str | None = None
+
+    @classmethod
+    def from_execucao(cls, execucao: ExecucaoMatch) -> "MatchJobResponse":
+        if execucao.iniciado_em is None:
+            decorrido = 0.0
+        else:
+            fim = execucao.finalizado_em or datetime.now()
+            decorrido = (fim - execucao.iniciado_em).total_seconds()
+        return cls(
+            id_execucao=execucao.id_execucao_match,
+            estado=execucao.estado,
+            total_mentoradas=execucao.total_mentoradas,
+            mentoradas_processadas=execucao.mentoradas_processadas,
+            pedidos_criados=execucao.pedidos_criados,
+            tempo_decorrido_s=decorrido,
+            resultado=execucao.resultado,
+            erro=execucao.erro,
+        )
+
+
 class MatchController:
 
     @staticmethod
@@ -117,118 +217,365 @@ class MatchController:
         return score, shared_comp, shared_hob
 
     @staticmethod
-    def create_match(token: str,request : MatchRequest, session: Session) -> str | None:
-        user = get_current_user(token, session)
-        if user is None:
+    def _novo_pedido(mentora, mentorada, data_pedido: datetime) -> tuple[dict[str, Any], int]:
+        score, shared_comp, shared_hob = MatchController._score_match(
+            mentora.competencias or [],
+            mentora.hobbies or [],
+            mentorada.competencias_interesse or [],
+            mentorada.hobbies or [],
+            mentorada.curso,
+        )
+        MAX_POINTS = 45
+        pedido = {
+            "id_pedidos_mentoria": uuid4(),
+            "estado_pedido": "pendente",
+            "pontuacao": round((score / MAX_POINTS) * 100),
+            "motivo": shared_comp + shared_hob,
+            "data_pedido": data_pedido,
+            "id_mentora": mentora.id_mentora,
+            "id_mentorada": mentorada.id_mentorada,
+        }
+        return pedido, score
+
+    @staticmethod
+    def _gravar_lote(pedidos: list[dict[str, Any]], session: Session):
+        """
+        INSERT em lote (executemany) sem commit: a rodada inteira fica numa
+        única transação e ou é gravada, ou nada é. Os índices únicos parciais
+        garantem um pedido pendente por mentora e por mentorada; se algum
+        pedido esbarrar num criado por fora da rodada, ela é desfeita (409).
+        """
+        if pedidos:
+            inseridos = session.execute(
+                pg_insert(PedidosMentoria)
+                .on_conflict_do_nothing()
+                .returning(PedidosMentoria.id_pedidos_mentoria),
+                pedidos,
+            ).all()
+            if len(inseridos) != len(pedidos):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Pedidos de mentoria criados durante a rodada de match",
+                )
+
+    @staticmethod
+    def _commit_pedidos(session: Session):
+        """
+        Commit de alterações de estado de pedidos: voltar um pedido para
+        "pendente" esbarra no índice de um pedido pendente por pessoa (409).
+        """
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado"
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Mentora ou mentorada já tem um pedido pendente",
             )
-        user_type = get_tipo_usuario(user)
-        if user_type == TipoUsuario.ADMIN:
-            mentoradas = session.exec(select(Mentorada)\
-                                      .where(Mentorada.conta_ativa)
-                                      ).all()
-            for mentorada in mentoradas:
-                existing_active = session.exec(
-                    select(Mentoria).where(
-                        Mentoria.id_mentorada == mentorada.id_mentorada,
-                        Mentoria.estado_mentoria == "ativa",
-                    )
-                ).first()
-                existing_pending = session.exec(
-                    select(PedidosMentoria).where(
-                        PedidosMentoria.id_mentorada == mentorada.id_mentorada,
-                        PedidosMentoria.estado_pedido == "pendente",
-                    )
-                ).first()
 
-                if existing_active or existing_pending:
+    @staticmethod
+    def _sse(evento: str, dados: str) -> str:
+        return f"event: {evento}\ndata: {dados}\n\n"
+
+    @staticmethod
+    def create_match(admin: Identidade, request : MatchRequest, session: Session) -> MatchJobResponse:
+        """
+        Agenda uma rodada de match em segundo plano e devolve a execução.
+        Se já houver uma rodada em andamento, devolve essa mesma execução.
+        """
+        execucao = MatchJobService.submit(
+            admin.id_usuario,
+            request.model_dump(),
+            lambda job_session, progresso: MatchController.iter_match(request, job_session, progresso),
+            session,
+        )
+        return MatchJobResponse.from_execucao(execucao)
+
+    @staticmethod
+    def stream_match(admin: Identidade, request: MatchRequest, session: Session) -> Iterator[str]:
+        """
+        Roda a rodada de match na própria requisição e devolve os eventos
+        Server-Sent Events: `inicio` com a execução, um `sugestao` para cada
+        pedido criado, assim que a mentora é escolhida, e por fim `resumo`
+        (ou `erro`). Os pedidos só são gravados se a rodada terminar: as
+        sugestões chegam antes do commit e, se vier `erro`, as já enviadas
+        foram descartadas (`pedidos_descartados` diz quantas).
+        """
+        # O 409 sai aqui como resposta HTTP; a execução só é criada dentro
+        # do stream, para que o `finally` que a finaliza sempre rode
+        MatchJobService.verificar_livre(session)
+
+        def eventos() -> Iterator[str]:
+            try:
+                execucao = MatchJobService.iniciar(admin.id_usuario, request.model_dump())
+            except HTTPException as e:
+                yield MatchController._sse("erro", json.dumps({"detail": e.detail}))
+                return
+            rodada = MatchJobService.executar(
+                execucao.id_execucao_match,
+                lambda job_session, progresso: MatchController.iter_match(request, job_session, progresso),
+            )
+            enviadas = 0
+            try:
+                yield MatchController._sse("inicio", MatchJobResponse.from_execucao(execucao).model_dump_json())
+                while True:
+                    sugestao = next(rodada)
+                    yield MatchController._sse("sugestao", sugestao.model_dump_json())
+                    enviadas += 1
+            except StopIteration as fim:
+                yield MatchController._sse("resumo", fim.value.model_dump_json())
+            except HTTPException as e:
+                yield MatchController._sse("erro", json.dumps({"detail": e.detail, "pedidos_descartados": enviadas}))
+            except Exception:
+                yield MatchController._sse("erro", json.dumps({
+                    "detail": "Erro inesperado na rodada de match", "pedidos_descartados": enviadas,
+                }))
+            finally:
+                # Cliente que desconecta fecha o gerador aqui; se `executar`
+                # nem começou, a execução ainda está em andamento
+                rodada.close()
+                MatchJobService.abandonar(execucao.id_execucao_match)
+
+        return eventos()
+
+    @staticmethod
+    def get_match_job(id_execucao: UUID, session: Session) -> MatchJobResponse:
+        execucao = MatchJobService.get(id_execucao, session)
+        if execucao is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Execução não encontrada"
+            )
+        return MatchJobResponse.from_execucao(execucao)
+
+    @staticmethod
+    def run_match(
+        request: MatchRequest,
+        session: Session,
+        progresso: Callable[[int, int, int], None] | None = None,
+    ) -> MatchRunResponse:
+        """Executa a rodada de match inteira, sem repassar as sugestões."""
+        rodada = MatchController.iter_match(request, session, progresso)
+        while True:
+            try:
+                next(rodada)
+            except StopIteration as fim:
+                return fim.value
+
+    @staticmethod
+    def iter_match(
+        request: MatchRequest,
+        session: Session,
+        progresso: Callable[[int, int, int], None] | None = None,
+        batch_size: int = 1000,
+    ) -> Generator[SugestaoMatch, None, MatchRunResponse]:
+        """
+        Executa a rodada de match gerando cada sugestão assim que a mentora é
+        escolhida, e devolve o resumo no fim. Os pedidos são gravados em lotes
+        de `batch_size` numa única transação, confirmada só no fim da rodada:
+        nada fica acumulado em memória e, se o consumidor desistir no meio,
+        nada é gravado. `progresso(processadas, total, pedidos)` é chamado a
+        cada mentorada processada.
+        """
+        if progresso is None:
+            progresso = lambda processadas, total, pedidos: None
+        tempos_ms: dict[str, float] = {}
+        inicio_fase = perf_counter()
+        availability = MatchAvailability.load(session)
+        # Só as colunas usadas no match: linhas não expiram a cada commit
+        # e não carregam foto_perfil/termo_assinado
+        mentoradas = session.exec(select(
+            Mentorada.id_mentorada,
+            Mentorada.id_universidade_instituicao,
+            Mentorada.competencias_interesse,
+            Mentorada.hobbies,
+            Mentorada.curso,
+            Mentorada.versao_perfil,
+            col(Usuario.nome_completo).label("nome"),
+        ).join(Usuario).where(Mentorada.conta_ativa)).all()
+        mentoras = session.exec(select(
+            Mentora.id_mentora,
+            Mentora.id_universidade_instituicao,
+            Mentora.competencias,
+            Mentora.hobbies,
+            Mentora.versao_perfil,
+            col(Usuario.nome_completo).label("nome"),
+        ).join(Usuario).where(
+            Mentora.conta_ativa == True,
+        )).all()
+        mentoradas = [
+            mentorada for mentorada in mentoradas
+            if availability.mentorada_livre(mentorada.id_mentorada)
+        ]
+        mentoras_livres = np.array(
+            [availability.mentora_livre(mentora.id_mentora) for mentora in mentoras],
+            dtype=bool,
+        )
+        codigos_universidade: dict[UUID | None, int] = {}
+        universidades_mentoras = np.array([
+            codigos_universidade.setdefault(mentora.id_universidade_instituicao, len(codigos_universidade))
+            for mentora in mentoras
+        ], dtype=np.int64)
+        tempos_ms["load"] = (perf_counter() - inicio_fase) * 1000
+        inicio_fase = perf_counter()
+        progresso(0, len(mentoradas), 0)
+
+        # Só os pares de perfis alterados desde a última rodada são
+        # repontuados (em processos, ver `rank_mentoradas`); o resto vem do cache
+        match_score_cache.atualizar(mentoradas, mentoras)
+        tempos_ms["cache"] = (perf_counter() - inicio_fase) * 1000
+        inicio_fase = perf_counter()
+        ranking = match_score_cache.ranking(
+            mentoradas,
+            mentoras,
+            mentoras_livres,
+            universidades_mentoras,
+            np.array([
+                codigos_universidade.get(mentorada.id_universidade_instituicao, -1)
+                for mentorada in mentoradas
+            ], dtype=np.int64),
+            bool(request.same_university),
+        )
+
+        optimal = request.assignment_mode == "optimal"
+        min_score = request.min_score if request.min_score is not None else 1
+        # Arestas (mentorada, mentora, score) do modo optimal
+        arestas: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+
+        current_time = datetime.now()
+        pendentes: list[dict[str, Any]] = []
+        pedidos_criados = 0
+        pontuacao_total = 0
+        sem_match = 0
+        arestas_cortadas = 0
+        tempo_escrita = 0.0
+
+        def criar_pedido(mentora, mentorada) -> SugestaoMatch:
+            nonlocal pedidos_criados, pontuacao_total, tempo_escrita, pendentes
+            pedido, score = MatchController._novo_pedido(mentora, mentorada, current_time)
+            pendentes.append(pedido)
+            availability.reservar(mentora.id_mentora, mentorada.id_mentorada)
+            pedidos_criados += 1
+            pontuacao_total += score
+            if len(pendentes) >= batch_size:
+                inicio_escrita = perf_counter()
+                MatchController._gravar_lote(pendentes, session)
+                tempo_escrita += perf_counter() - inicio_escrita
+                pendentes = []
+            return SugestaoMatch(
+                id_pedidos_mentoria=pedido["id_pedidos_mentoria"],
+                id_mentora=mentora.id_mentora,
+                nome_mentora=mentora.nome,
+                id_mentorada=mentorada.id_mentorada,
+                nome_mentorada=mentorada.nome,
+                pontuacao=pedido["pontuacao"],
+                motivo=pedido["motivo"],
+            )
+
+        try:
+            for i, (candidatas, scores) in enumerate(ranking):
+                mentorada = mentoradas[i]
+                progresso(i, len(mentoradas), pedidos_criados)
+
+                if optimal:
+                    # Sem o fallback de "pelo menos um match": uma aresta
+                    # de score 0 não muda a pontuação total. O ranking vem
+                    # por score decrescente, então as que passam formam um
+                    # prefixo; ficam as MATCH_OPTIMAL_ARESTAS primeiras
+                    manter = int(np.count_nonzero(scores >= max(min_score, 1)))
+                    if MATCH_OPTIMAL_ARESTAS is not None and manter > MATCH_OPTIMAL_ARESTAS:
+                        manter = MATCH_OPTIMAL_ARESTAS
+                        arestas_cortadas += 1
+                    arestas.append((
+                        np.full(manter, i, dtype=np.int64),
+                        candidatas[:manter],
+                        scores[:manter],
+                    ))
                     continue
 
-                # TODO precisa ser da mesma faculdade?
-                if request.same_university:
-                    statement = select(Mentora).where(
-                        Mentora.id_universidade_instituicao
-                        == mentorada.id_universidade_instituicao,
-                        Mentora.conta_ativa == True,
-                    )
+                # Só um pedido por mentorada: com ou sem score >= min_score, o
+                # escolhido é a melhor mentora ainda disponível. O ranking já vem
+                # desempatado pela ordem do banco, como o sort estável original.
+                livres = mentoras_livres[candidatas]
+                if livres.any():
+                    j = int(candidatas[np.argmax(livres)])
                 else:
-                    statement = select(Mentora).where(
-                        Mentora.conta_ativa == True,
-                    )
-                mentoras_disponiveis = session.exec(statement).all()
-
-                available_mentors : list[Mentora] = []
-                for mentora in mentoras_disponiveis:
-                    mentor_active = session.exec(
-                        select(Mentoria).where(
-                            Mentoria.id_mentora == mentora.id_mentora,
-                            Mentoria.estado_mentoria == "ativa",
-                        )
-                    ).first()
-                    mentor_pending = session.exec(
-                        select(PedidosMentoria).where(
-                            PedidosMentoria.id_mentora == mentora.id_mentora,
-                            PedidosMentoria.estado_pedido == "pendente",
+                    # Nenhuma candidata livre: todas as disponíveis têm score 0 e
+                    # o "pelo menos um match" fica com a primeira delas
+                    # TODO precisa ser da mesma faculdade?
+                    available = mentoras_livres
+                    if request.same_university:
+                        available = available & (
+                            universidades_mentoras
+                            == codigos_universidade.get(mentorada.id_universidade_instituicao, -1)
                         )
-                    ).first()
-                    if mentor_active or mentor_pending:
+                    if not available.any():
+                        # Sem mentora livre para esta mentorada: ela fica de
+                        # fora e a rodada segue com as demais
+                        sem_match += 1
                         continue
-                    available_mentors.append(mentora)
+                    j = int(np.argmax(available))
+                mentoras_livres[j] = False
+                yield criar_pedido(mentoras[j], mentorada)
 
-                if not available_mentors:
+            if optimal:
+                if mentoradas and not mentoras_livres.any():
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail="No available mentors found",
                     )
+                pares = optimal_assignment(
+                    len(mentoradas),
+                    len(mentoras),
+                    *(np.concatenate(coluna) for coluna in zip(*arestas)),
+                ) if arestas else []
+                emparelhadas = set()
+                for i, j in pares:
+                    mentoras_livres[j] = False
+                    emparelhadas.add(i)
+                    yield criar_pedido(mentoras[j], mentoradas[i])
+                # Com o limite de arestas, quem ficou sem par porque as suas
+                # melhores mentoras foram para outras recebe a melhor ainda
+                # livre, como no greedy. Sem o limite nada muda: uma aresta
+                # livre aumentaria o ótimo
+                for i, (candidatas, scores) in enumerate(ranking):
+                    if i in emparelhadas:
+                        continue
+                    candidatas = candidatas[(scores >= max(min_score, 1)) & mentoras_livres[candidatas]]
+                    if len(candidatas):
+                        j = int(candidatas[0])
+                        mentoras_livres[j] = False
+                        emparelhadas.add(i)
+                        yield criar_pedido(mentoras[j], mentoradas[i])
+                sem_match = len(mentoradas) - len(emparelhadas)
+            elif sem_match and not pedidos_criados:
+                # Só é erro quando nenhuma mentorada conseguiu mentora; senão
+                # os pedidos criados são gravados e as que sobraram vão no resumo
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="No available mentors found",
+                )
 
-                # TODO atualmente as areas de atuacao da mentora e
-                # competencias de interesse da mentorada devem ser exatamente iguais
-                scored: list[tuple[int, Mentora, list[str], list[str]]] = []
-                for mentora in available_mentors:
-                    score, shared_comp, shared_hob = MatchController._score_match(
-                        mentora.competencias,
-                        mentora.hobbies,
-                        mentorada.competencias_interesse,
-                        mentorada.hobbies,
-                        mentorada.curso,
-                    )
-                    scored.append((score, mentora, shared_comp, shared_hob))
-
-                # x[0] é o score
-                scored.sort(key=lambda x: x[0], reverse=True)
-
-                min_score = request.min_score if request.min_score is not None else 1
-                top_k = request.top_k if request.top_k is not None else 3
-
-                # score, mentora, shared_comp, shared_hob
-                selected = [ (s, m, sc, sh) for s, m, sc, sh in scored if s >= min_score ]
-
-                # TODO fazer ter pelo menos um match?
-                if not selected and scored:
-                    selected = [scored[0]]
-                    
-                selected = selected[:top_k]
-                current_time = datetime.now()
-                MAX_POINTS = 45
-                for score, mentora, shared_comp, shared_hob in selected:
-                    pedido = PedidosMentoria(
-                        estado_pedido="pendente",
-                        pontuacao = round((score / MAX_POINTS) * 100),
-                        motivo = (shared_comp + shared_hob),
-                        data_pedido=current_time,
-                        id_mentora=mentora.id_mentora,
-                        id_mentorada=mentorada.id_mentorada,
-                    )
-                    session.add(pedido)
-                    session.commit()
-                    break
-            return "Os matches foram criados"
-        else:
-            raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Houve um erro ao criar os matches",
-                    )
+            inicio_escrita = perf_counter()
+            MatchController._gravar_lote(pendentes, session)
+            session.commit()
+            tempo_escrita += perf_counter() - inicio_escrita
+        except BaseException:
+            # Inclui GeneratorExit, quando quem consome a rodada desiste
+            session.rollback()
+            raise
+        tempos_ms["score"] = (perf_counter() - inicio_fase - tempo_escrita) * 1000
+        tempos_ms["write"] = tempo_escrita * 1000
+        progresso(len(mentoradas), len(mentoradas), pedidos_criados)
+
+        return MatchRunResponse(
+            message="Os matches foram criados",
+            assignment_mode=request.assignment_mode,
+            pedidos_criados=pedidos_criados,
+            pontuacao_total=pontuacao_total,
+            mentoradas_sem_match=sem_match,
+            mentoradas_com_arestas_cortadas=arestas_cortadas,
+            tempos_ms=tempos_ms,
+        )
 
     # @staticmethod
     # def create_mentorship_request(
@@ -470,153 +817,383 @@ class MatchController:
         )
 
     @staticmethod
-    def list_mentorship_requests(token: str, session: Session) -> list[MatchSugerido] | None:
-        user = get_current_user(token, session)
-        if user is None:
+    def _cursor(pontuacao: int, id_pedido: UUID) -> str:
+        return base64.urlsafe_b64encode(json.dumps([pontuacao, str(id_pedido)]).encode()).decode()
+
+    @staticmethod
+    def _ler_cursor(cursor: str) -> tuple[int, UUID]:
+        try:
+            pontuacao, id_pedido = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return int(pontuacao), UUID(id_pedido)
+        except (ValueError, TypeError):
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado"
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido"
             )
-        user_type = get_tipo_usuario(user)
-        if user_type == TipoUsuario.ADMIN:
-            pedidos = list(session.exec(select(PedidosMentoria)\
-                                        .where(
-                                            PedidosMentoria.estado_pedido == "pendente"
-                                        )).all())
-            results: list[MatchSugerido] = []
-            for pedido in pedidos:
-                mentorada = session.get(Mentorada, pedido.id_mentorada)
-                mentora = session.get(Mentora, pedido.id_mentora)
-                if mentorada is None or mentora is None:
-                    return []
-                usuario_mentora = session.exec(select(Usuario).where(
-                    Usuario.id_usuario == mentora.id_usuario
-                )).one()
-                usuario_mentorada = session.exec(select(Usuario).where(
-                    Usuario.id_usuario == mentorada.id_usuario
-                )).one()
-                objetivo = mentorada.foco_mentoria if mentorada else ""
-                results.append(
-                    MatchSugerido(
-                        id = pedido.id_pedidos_mentoria,
-                        score = pedido.pontuacao,
-                        motivo = "\n".join(pedido.motivo),
-                        mentora = MatchSugerido.MentoraOptional(
-                            nome = usuario_mentora.nome_completo,
-                            cargo= mentora.cargo_atual,
-                            skills= mentora.competencias,
-                            foto = mentora.foto_perfil
-                        ),
-                        mentorada = MatchSugerido.MentoradaOptional(
-                            nome = usuario_mentorada.nome_completo,
-                            curso = mentorada.curso,
-                            objetivo = mentorada.foco_mentoria,
-                            foto = mentorada.foto_perfil
-                        )
-                    )
+
+    @staticmethod
+    async def list_mentorship_requests(
+        session: AsyncSession,
+        limit: int = 50,
+        cursor: str | None = None,
+        id_universidade: UUID | None = None,
+        min_score: int | None = None,
+    ) -> tuple[list[MatchSugerido], str | None]:
+        """
+        Pedidos pendentes por pontuação decrescente, uma página por vez.
+
+        Paginação por chave (pontuacao, id): o cursor é a chave do último
+        item da página anterior, então cada página custa o mesmo não importa
+        a profundidade (sem OFFSET). Devolve os itens e o cursor da próxima
+        página, ou None se esta for a última.
+        """
+        UsuarioMentora = aliased(Usuario)
+        UsuarioMentorada = aliased(Usuario)
+        FotoMentora = aliased(FotoPerfil)
+        FotoMentorada = aliased(FotoPerfil)
+        chave = tuple_(PedidosMentoria.pontuacao, PedidosMentoria.id_pedidos_mentoria)
+        # Uma consulta só, com as colunas que MatchSugerido usa
+        query = (
+            select(
+                PedidosMentoria.id_pedidos_mentoria,
+                PedidosMentoria.pontuacao,
+                PedidosMentoria.motivo,
+                UsuarioMentora.nome_completo.label("nome_mentora"),
+                Mentora.cargo_atual,
+                Mentora.competencias,
+                Mentora.id_usuario.label("id_usuario_mentora"),
+                FotoMentora.hash.label("foto_mentora"),
+                UsuarioMentorada.nome_completo.label("nome_mentorada"),
+                Mentorada.curso,
+                Mentorada.foco_mentoria,
+                Mentorada.id_usuario.label("id_usuario_mentorada"),
+                FotoMentorada.hash.label("foto_mentorada"),
+            )
+            .join(Mentora, col(Mentora.id_mentora) == PedidosMentoria.id_mentora)
+            .join(UsuarioMentora, col(UsuarioMentora.id_usuario) == Mentora.id_usuario)
+            .join(Mentorada, col(Mentorada.id_mentorada) == PedidosMentoria.id_mentorada)
+            .join(UsuarioMentorada, col(UsuarioMentorada.id_usuario) == Mentorada.id_usuario)
+            .outerjoin(FotoMentora, col(FotoMentora.id_usuario) == Mentora.id_usuario)
+            .outerjoin(FotoMentorada, col(FotoMentorada.id_usuario) == Mentorada.id_usuario)
+            .where(PedidosMentoria.estado_pedido == "pendente")
+            .order_by(col(PedidosMentoria.pontuacao).desc(), col(PedidosMentoria.id_pedidos_mentoria).desc())
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            query = query.where(chave < tuple_(*MatchController._ler_cursor(cursor)))
+        if min_score is not None:
+            query = query.where(PedidosMentoria.pontuacao >= min_score)
+        if id_universidade is not None:
+            query = query.where(or_(
+                Mentora.id_universidade_instituicao == id_universidade,
+                Mentorada.id_universidade_instituicao == id_universidade,
+            ))
+
+        linhas = (await session.exec(query)).all()
+        proximo = None
+        if len(linhas) > limit:
+            linhas = linhas[:limit]
+            proximo = MatchController._cursor(linhas[-1].pontuacao, linhas[-1].id_pedidos_mentoria)
+        results = [
+            MatchSugerido(
+                id = linha.id_pedidos_mentoria,
+                score = linha.pontuacao,
+                motivo = "\n".join(linha.motivo),
+                mentora = MatchSugerido.MentoraOptional(
+                    nome = linha.nome_mentora,
+                    cargo = linha.cargo_atual,
+                    skills = linha.competencias,
+                    foto_url = url_foto(linha.id_usuario_mentora, linha.foto_mentora),
+                    foto_hash = linha.foto_mentora
+                ),
+                mentorada = MatchSugerido.MentoradaOptional(
+                    nome = linha.nome_mentorada,
+                    curso = linha.curso,
+                    objetivo = linha.foco_mentoria,
+                    foto_url = url_foto(linha.id_usuario_mentorada, linha.foto_mentorada),
+                    foto_hash = linha.foto_mentorada
                 )
-            return results
-        else:
-            return None
+            )
+            for linha in linhas
+        ]
+        return results, proximo
 
     @staticmethod
     def update_mentorship_request(
-            token: str, id_pedidos_mentoria: str, estado_pedido: str, session: Session
-    ) -> PedidosMentoria | None:
-        user = get_current_user(token, session)
-        if user is None:
+            id_pedidos_mentoria: str, estado_pedido: str, session: Session
+    ) -> PedidosMentoria:
+        pedido = session.get(PedidosMentoria, id_pedidos_mentoria)
+        if not pedido:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado"
+                status_code=status.HTTP_404_NOT_FOUND, detail="Pedido não encontrado"
             )
-        user_type = get_tipo_usuario(user)
-        if user_type == TipoUsuario.ADMIN:
-            pedido = session.get(PedidosMentoria, id_pedidos_mentoria)
-            if not pedido:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND, detail="Pedido não encontrado"
-                )
 
-            # If the mentor accepts the pedido, create an active Mentoria and clear other pending requests
-            if estado_pedido.lower() in ("aceita", "aceito", "aprovado", "accepted"):
-                # Ensure neither mentor nor mentee already have active mentorships
-                mentor_active = session.exec(
-                    select(Mentoria).where(
-                        Mentoria.id_mentora == pedido.id_mentora,
-                        Mentoria.estado_mentoria == "ativa",
-                    )
-                ).first()
-                mentee_active = session.exec(
-                    select(Mentoria).where(
-                        Mentoria.id_mentorada == pedido.id_mentorada,
-                        Mentoria.estado_mentoria == "ativa",
-                    )
-                ).first()
-                if mentor_active or mentee_active:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Mentor or mentored already has an active mentorship",
-                    )
-                # Create active mentorship
-                mentoria = Mentoria(
+        # If the mentor accepts the pedido, create an active Mentoria and clear other pending requests
+        if estado_pedido.lower() in ESTADOS_ACEITE:
+            # Os índices únicos parciais de Mentoria recusam uma segunda
+            # mentoria ativa da mentora ou da mentorada, sem consulta
+            # prévia e sem corrida entre dois admins
+            agora = datetime.now()
+            id_mentoria = session.execute(
+                pg_insert(Mentoria)
+                .values(
+                    id_mentoria=uuid4(),
                     estado_mentoria="ativa",
                     avaliacao_mentora=None,
                     avaliacao_mentorada=None,
-                    ano_mentoria = datetime.now().year,
-                    comeco_mentoria = datetime.now(),
-                    fim_mentoria = None,
                     nota_mentora=None,
                     nota_mentorada=None,
+                    progresso_mentorada=0,
+                    ano_mentoria=agora.year,
+                    comeco_mentoria=agora.date(),
+                    fim_mentoria=None,
                     id_mentora=pedido.id_mentora,
                     id_mentorada=pedido.id_mentorada,
                 )
-                session.add(mentoria)
-
-                # Mark this pedido as accepted
-                pedido.estado_pedido = estado_pedido
-                session.add(pedido)
-
-                # Remove other pending pedidos involving these users
-                other_pedidos = session.exec(
-                    select(PedidosMentoria).where(
-                        (PedidosMentoria.id_mentora == pedido.id_mentora)
-                        | (PedidosMentoria.id_mentorada == pedido.id_mentorada),
-                        PedidosMentoria.estado_pedido == "pendente",
-                    )
-                ).all()
-                for op in other_pedidos:
-                    if op.id_pedidos_mentoria == pedido.id_pedidos_mentoria:
-                        continue
-                    session.delete(op)
-
-                session.commit()
-                session.refresh(pedido)
-                return pedido
+                .on_conflict_do_nothing()
+                .returning(Mentoria.id_mentoria)
+            ).scalar_one_or_none()
+            if id_mentoria is None:
+                session.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Mentor or mentored already has an active mentorship",
+                )
 
-            # Otherwise just update the pedido state (e.g., 'rejeitado')
+            # Mark this pedido as accepted
             pedido.estado_pedido = estado_pedido
             session.add(pedido)
+            session.flush()
+
+            # Remove other pending pedidos involving these users
+            session.execute(
+                delete(PedidosMentoria).where(
+                    (PedidosMentoria.id_mentora == pedido.id_mentora)
+                    | (PedidosMentoria.id_mentorada == pedido.id_mentorada),
+                    PedidosMentoria.estado_pedido == "pendente",
+                )
+            )
+
             session.commit()
             session.refresh(pedido)
             return pedido
 
+        # Otherwise just update the pedido state (e.g., 'rejeitado')
+        pedido.estado_pedido = estado_pedido
+        session.add(pedido)
+        MatchController._commit_pedidos(session)
+        session.refresh(pedido)
+        return pedido
+
+    @staticmethod
+    def update_mentorship_requests(
+        decisoes: list[DecisaoPedido], session: Session
+    ) -> list[ResultadoDecisao]:
+        """
+        Aplica várias decisões de uma vez, na ordem recebida, com as mesmas
+        regras de `update_mentorship_request`. Pedidos e mentorias ativas são
+        lidos numa consulta cada e os conflitos resolvidos em memória; as
+        mentorias, os estados e a remoção dos pedidos pendentes superados
+        são gravados com poucos comandos, numa única transação. Conflitos não
+        interrompem o lote: cada decisão tem seu resultado.
+        """
+
+        ids = {decisao.id_pedidos_mentoria for decisao in decisoes}
+        # Na mesma consulta, os pedidos pendentes das mentoras e mentoradas
+        # do lote: voltar um pedido para "pendente" é conferido em memória
+        # contra eles, em vez de esbarrar nos índices únicos no UPDATE
+        lote = col(PedidosMentoria.id_pedidos_mentoria).in_(ids)
+        linhas = session.exec(
+            select(
+                PedidosMentoria.id_pedidos_mentoria,
+                PedidosMentoria.estado_pedido,
+                PedidosMentoria.id_mentora,
+                PedidosMentoria.id_mentorada,
+            ).where(or_(
+                lote,
+                and_(
+                    PedidosMentoria.estado_pedido == "pendente",
+                    or_(
+                        col(PedidosMentoria.id_mentora).in_(select(PedidosMentoria.id_mentora).where(lote)),
+                        col(PedidosMentoria.id_mentorada).in_(select(PedidosMentoria.id_mentorada).where(lote)),
+                    ),
+                ),
+            ))
+        ).all()
+        pedidos = {linha.id_pedidos_mentoria: linha for linha in linhas if linha.id_pedidos_mentoria in ids}
+        # Pedido pendente de cada pessoa, acompanhando as decisões do lote
+        pendente_mentora = {linha.id_mentora: linha.id_pedidos_mentoria for linha in linhas if linha.estado_pedido == "pendente"}
+        pendente_mentorada = {linha.id_mentorada: linha.id_pedidos_mentoria for linha in linhas if linha.estado_pedido == "pendente"}
+        ativas = session.exec(
+            select(Mentoria.id_mentora, Mentoria.id_mentorada).where(
+                Mentoria.estado_mentoria == "ativa",
+                or_(
+                    col(Mentoria.id_mentora).in_({pedido.id_mentora for pedido in pedidos.values()}),
+                    col(Mentoria.id_mentorada).in_({pedido.id_mentorada for pedido in pedidos.values()}),
+                ),
+            )
+        ).all()
+        mentoras_ocupadas = {mentoria.id_mentora for mentoria in ativas}
+        mentoradas_ocupadas = {mentoria.id_mentorada for mentoria in ativas}
+        # Quem ganhou mentoria neste lote: os pedidos pendentes delas são apagados
+        mentoras_aceitas: set[UUID] = set()
+        mentoradas_aceitas: set[UUID] = set()
+        removidos: set[UUID] = set()
+
+        resultados: list[ResultadoDecisao] = []
+        posicao_resultado: dict[UUID, int] = {}
+        mentorias: list[dict[str, Any]] = []
+        novos_estados: dict[str, list[UUID]] = {}
+        agora = datetime.now()
+
+        def sair_de_pendente(id_pedido: UUID | None):
+            """O pedido deixa de ser o pendente da mentora e da mentorada dele."""
+            for pendentes in (pendente_mentora, pendente_mentorada):
+                for pessoa in [pessoa for pessoa, id_pendente in pendentes.items() if id_pendente == id_pedido]:
+                    del pendentes[pessoa]
+
+        for decisao in decisoes:
+            pedido = pedidos.get(decisao.id_pedidos_mentoria)
+            if decisao.id_pedidos_mentoria in posicao_resultado:
+                resultado = "duplicado"
+            elif pedido is None:
+                resultado = "nao_encontrado"
+            elif pedido.id_pedidos_mentoria in removidos:
+                resultado = "removido"
+            elif decisao.estado.lower() in ESTADOS_ACEITE:
+                if pedido.id_mentora in mentoras_ocupadas or pedido.id_mentorada in mentoradas_ocupadas:
+                    resultado = "conflito"
+                else:
+                    resultado = "aceito"
+                    mentorias.append({
+                        "id_mentoria": uuid4(),
+                        "estado_mentoria": "ativa",
+                        "avaliacao_mentora": None,
+                        "avaliacao_mentorada": None,
+                        "nota_mentora": None,
+                        "nota_mentorada": None,
+                        "progresso_mentorada": 0,
+                        "ano_mentoria": agora.year,
+                        "comeco_mentoria": agora.date(),
+                        "fim_mentoria": None,
+                        "id_mentora": pedido.id_mentora,
+                        "id_mentorada": pedido.id_mentorada,
+                    })
+                    mentoras_ocupadas.add(pedido.id_mentora)
+                    mentoradas_ocupadas.add(pedido.id_mentorada)
+                    mentoras_aceitas.add(pedido.id_mentora)
+                    mentoradas_aceitas.add(pedido.id_mentorada)
+                    sair_de_pendente(pedido.id_pedidos_mentoria)
+                    # Os outros pendentes das duas caem no DELETE do fim,
+                    # inclusive os que voltaram para "pendente" antes no lote
+                    for id_pendente in (
+                        pendente_mentora.get(pedido.id_mentora),
+                        pendente_mentorada.get(pedido.id_mentorada),
+                    ):
+                        if id_pendente is None:
+                            continue
+                        removidos.add(id_pendente)
+                        sair_de_pendente(id_pendente)
+                        if id_pendente in posicao_resultado:
+                            resultados[posicao_resultado[id_pendente]].resultado = "removido"
+            elif decisao.estado == "pendente":
+                ja_pendente = pendente_mentora.get(pedido.id_mentora) == pedido.id_pedidos_mentoria
+                if ja_pendente:
+                    resultado = "atualizado"
+                elif (
+                    pedido.id_mentora in mentoras_aceitas
+                    or pedido.id_mentorada in mentoradas_aceitas
+                    or pedido.id_mentora in pendente_mentora
+                    or pedido.id_mentorada in pendente_mentorada
+                ):
+                    # Um pedido pendente por pessoa, e quem já foi aceita
+                    # neste lote não volta a ter pedido pendente
+                    resultado = "conflito"
+                else:
+                    resultado = "atualizado"
+                    pendente_mentora[pedido.id_mentora] = pedido.id_pedidos_mentoria
+                    pendente_mentorada[pedido.id_mentorada] = pedido.id_pedidos_mentoria
+            else:
+                resultado = "atualizado"
+                sair_de_pendente(pedido.id_pedidos_mentoria)
+            if resultado in ("aceito", "atualizado"):
+                novos_estados.setdefault(decisao.estado, []).append(pedido.id_pedidos_mentoria)
+            if resultado != "duplicado":
+                posicao_resultado[decisao.id_pedidos_mentoria] = len(resultados)
+            resultados.append(ResultadoDecisao(
+                id_pedidos_mentoria=decisao.id_pedidos_mentoria,
+                estado=decisao.estado,
+                resultado=resultado,
+            ))
+
+        try:
+            if mentorias:
+                inseridas = session.execute(
+                    pg_insert(Mentoria).on_conflict_do_nothing().returning(Mentoria.id_mentoria),
+                    mentorias,
+                ).all()
+                if len(inseridas) != len(mentorias):
+                    # Outra mentoria ativa foi criada depois da leitura: as
+                    # decisões seguintes do lote dependiam dela
+                    raise HTTPException(
+                        status_code=status.HTTP_409_CONFLICT,
+                        detail="Mentorias alteradas durante o lote; tente novamente",
+                    )
+            # Os pedidos que voltam a "pendente" vão por último, depois do
+            # DELETE: as vagas que eles ocupam foram liberadas por decisões
+            # anteriores do lote. Os que um aceite posterior apagou
+            # ("removido") são apagados pelo id, sem passar por "pendente"
+            voltam_a_pendente = [
+                id_pedido for id_pedido in novos_estados.pop("pendente", []) if id_pedido not in removidos
+            ]
+            for estado, ids_estado in novos_estados.items():
+                session.execute(
+                    update(PedidosMentoria)
+                    .where(col(PedidosMentoria.id_pedidos_mentoria).in_(ids_estado))
+                    .values(estado_pedido=estado)
+                )
+            if mentoras_aceitas:
+                session.execute(
+                    delete(PedidosMentoria).where(or_(
+                        and_(
+                            PedidosMentoria.estado_pedido == "pendente",
+                            or_(
+                                col(PedidosMentoria.id_mentora).in_(mentoras_aceitas),
+                                col(PedidosMentoria.id_mentorada).in_(mentoradas_aceitas),
+                            ),
+                        ),
+                        col(PedidosMentoria.id_pedidos_mentoria).in_(removidos),
+                    ))
+                )
+            if voltam_a_pendente:
+                session.execute(
+                    update(PedidosMentoria)
+                    .where(col(PedidosMentoria.id_pedidos_mentoria).in_(voltam_a_pendente))
+                    .values(estado_pedido="pendente")
+                )
+            MatchController._commit_pedidos(session)
+        except IntegrityError:
+            # Pedido pendente criado por fora depois da leitura
+            session.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Mentora ou mentorada já tem um pedido pendente",
+            )
+        except BaseException:
+            session.rollback()
+            raise
+        return resultados
+
     @staticmethod
     def delete_mentorship_request(
-            token: str, id_pedidos_mentoria: int, session: Session
+            id_pedidos_mentoria: int, session: Session
     ) -> dict:
-        user = get_current_user(token, session)
-        if user is None:
+        pedido = session.get(PedidosMentoria, id_pedidos_mentoria)
+        if not pedido:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado"
+                status_code=status.HTTP_404_NOT_FOUND, detail="Pedido não encontrado"
             )
-        user_type = get_tipo_usuario(user)
-        if user_type == TipoUsuario.ADMIN:
-            pedido = session.get(PedidosMentoria, id_pedidos_mentoria)
-            if not pedido:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND, detail="Pedido não encontrado"
-                )
 
-            session.delete(pedido)
-            session.commit()
-            return {"message": "Pedido deletado com sucesso"}
-        else:
-            return {"message": "O usuário não é um administrador"}
+        session.delete(pedido)
+        session.commit()
+        return {"message": "Pedido deletado com sucesso"}
+
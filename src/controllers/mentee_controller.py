@@ -2,9 +2,11 @@ from datetime import datetime
 from fastapi import HTTPException, status
 from sqlalchemy import label
 from sqlmodel import Session, col, desc, literal, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.status import HTTP_404_NOT_FOUND
-from src.models.login import get_current_user
+from src.models.login import Identidade, invalidar_usuario, revogar_usuario
 from src.schemas.tables import Mentorada, Mentoria, Usuario
+from src.services.match_cache import invalidar_se_alterou
 from pydantic import BaseModel
 
 
@@ -78,6 +80,7 @@ class MenteeController:
         update_data = data.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(mentorada, key, value)
+        invalidar_se_alterou(mentorada, update_data)
 
         session.add(mentorada)
         session.commit()
@@ -92,25 +95,25 @@ class MenteeController:
                 status_code=status.HTTP_404_NOT_FOUND, detail="Mentorada não encontrada"
             )
 
+        # Tokens emitidos com o perfil de mentorada não valem mais
+        revogar_usuario(mentorada.id_usuario, session)
         session.delete(mentorada)
         session.commit()
+        invalidar_usuario(mentorada.id_usuario)
         return {"message": "Mentorada deletada com sucesso"}
 
     @staticmethod
-    def get_card_info(token : str, session: Session) -> dict:
-        user = get_current_user(token, session)
+    async def get_card_info(identidade : Identidade, session: AsyncSession) -> dict:
         try:
-            if user is None:
-                raise Exception()
             
             statement = select(Mentoria.estado_mentoria)\
                 .join(Mentorada, Mentoria.id_mentorada == Mentoria.id_mentorada)\
-                .where(Mentorada.id_usuario == user.id_usuario)\
+                .where(Mentorada.id_usuario == identidade.id_usuario)\
                 .where(Mentoria.ano_mentoria == datetime.now().year)\
                 .order_by(desc(Mentoria.comeco_mentoria))\
                 .limit(1)
             
-            mentoring_status = session.exec(statement).one_or_none()
+            mentoring_status = (await session.exec(statement)).one_or_none()
             if mentoring_status is None:
                 mentoring_status = "pendente"
             print(mentoring_status)
@@ -121,9 +124,9 @@ class MenteeController:
                 col(Mentorada.disponibilidade).label("availability"),
                 literal(mentoring_status).label("status")
             )\
-            .where(Mentorada.id_usuario == user.id_usuario)\
+            .where(Mentorada.id_usuario == identidade.id_usuario)\
             .join(Usuario)
-            mentee = session.exec(statement)\
+            mentee = (await session.exec(statement))\
                 .mappings().one_or_none()
             if mentee is None:
                 raise Exception()
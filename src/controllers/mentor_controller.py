@@ -1,6 +1,8 @@
 from fastapi import HTTPException, status
 from sqlmodel import Session, select
 from src.schemas.tables import Mentora, Usuario, UniversidadeInstituicao
+from src.models.login import invalidar_usuario, revogar_usuario
+from src.services.match_cache import invalidar_se_alterou
 from pydantic import BaseModel
 
 
@@ -85,6 +87,7 @@ class MentorController:
         update_data = data.dict(exclude_unset=True)
         for key, value in update_data.items():
             setattr(mentora, key, value)
+        invalidar_se_alterou(mentora, update_data)
 
         session.add(mentora)
         session.commit()
@@ -99,6 +102,9 @@ class MentorController:
                 status_code=status.HTTP_404_NOT_FOUND, detail="Mentora não encontrada"
             )
 
+        # Os tokens já emitidos trazem o perfil de mentora nos claims
+        revogar_usuario(mentora.id_usuario, session)
         session.delete(mentora)
         session.commit()
+        invalidar_usuario(mentora.id_usuario)
         return {"message": "Mentora deletada com sucesso"}
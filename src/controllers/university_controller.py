@@ -1,9 +1,10 @@
 from uuid import UUID
 from fastapi import HTTPException, status
 from sqlmodel import Session, col, distinct, func, select, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette.status import HTTP_401_UNAUTHORIZED, HTTP_500_INTERNAL_SERVER_ERROR
-from src.models.login import get_current_user, get_password_hash
-from src.schemas.tables import Administrador, ConviteCoordenador, Coordenador, Mentora, Mentoria, UniversidadeInstituicao, Usuario
+from src.models.login import get_password_hash
+from src.schemas.tables import ConviteCoordenador, Coordenador, Mentora, Mentoria, UniversidadeInstituicao, Usuario
 from pydantic import BaseModel, EmailStr
 import secrets
 import string
@@ -26,16 +27,9 @@ class UniversityUpdate(BaseModel):
 
 class UniversityController:
     @staticmethod
-    def list_universities(token : str, session: Session) -> list[dict]:
-        user = get_current_user(token, session)
+    async def list_universities(session: AsyncSession) -> list[dict]:
         try:
-            if user is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
-            statement = select(Administrador).where(Administrador.id_usuario == user.id_usuario)
-            admin = session.exec(statement).one_or_none()
-            if admin is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
-            universidades = session.exec(
+            universidades = (await session.exec(
                     select(col(UniversidadeInstituicao.id_universidade_instituicao).label("id"),
                            col(UniversidadeInstituicao.nome_instituicao).label("name"),
                            col(Usuario.nome_completo).label("coord"),
@@ -51,7 +45,7 @@ class UniversityController:
                               Usuario.nome_completo
                               )\
                     .where((Mentoria.estado_mentoria == "ativa") | (Mentoria.estado_mentoria == None))
-                ).mappings().all()
+                )).mappings().all()
             print(universidades)
             return universidades
         except Exception as e:
@@ -73,16 +67,9 @@ class UniversityController:
             raise HTTPException(status_code=HTTP_500_INTERNAL_SERVER_ERROR)
         
     @staticmethod
-    def get_count(token: str, session: Session) -> dict[str,int]:
-        user = get_current_user(token, session)
+    async def get_count(session: AsyncSession) -> dict[str,int]:
         try:
-            if user is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
-            statement = select(Administrador).where(Administrador.id_usuario == user.id_usuario)
-            admin = session.exec(statement).one_or_none()
-            if admin is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
-            count = session.exec(select(func.count()).select_from(UniversidadeInstituicao)).one()
+            count = (await session.exec(select(func.count()).select_from(UniversidadeInstituicao))).one()
             return {"count" : count}
         except Exception as e:
             print(e)
@@ -103,17 +90,10 @@ class UniversityController:
 
     
     @staticmethod
-    def create_university(token:str,
+    def create_university(
         data: UniversityCreate, session: Session
     ) -> dict[str,str] | None:
-        user = get_current_user(token, session)
         try:
-            if user is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
-            statement = select(Administrador).where(Administrador.id_usuario == user.id_usuario)
-            admin = session.exec(statement).one_or_none()
-            if admin is None:
-                raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
             if data.nome_instituicao == "":
                 raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
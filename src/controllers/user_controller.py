@@ -1,6 +1,10 @@
-from fastapi import HTTPException, status
-from sqlmodel import Session, select
-from src.schemas.tables import Usuario
+from uuid import UUID
+from fastapi import BackgroundTasks, HTTPException, status
+from sqlmodel import Session, col, delete, select
+from src.models.login import Identidade, TipoUsuario, invalidar_usuario, revogar_usuario
+from src.schemas.tables import FotoPerfil, Mentora, Mentorada, TokenRevogado, Usuario
+from src.services.foto_service import FotoService
+from src.services.unicidade_service import UnicidadeService
 from pydantic import BaseModel, EmailStr
 
 
@@ -55,6 +59,7 @@ class UserController:
         session.add(usuario)
         session.commit()
         session.refresh(usuario)
+        UnicidadeService.registrar(usuario.email, usuario.cpf)
         return usuario
 
     @staticmethod
@@ -71,6 +76,7 @@ class UserController:
 
         session.add(usuario)
         session.commit()
+        invalidar_usuario(usuario.id_usuario)
         session.refresh(usuario)
         return usuario
 
@@ -82,6 +88,39 @@ class UserController:
                 status_code=status.HTTP_404_NOT_FOUND, detail="Usuário não encontrado"
             )
 
+        # Antes de apagar: os tokens já emitidos valeriam até o exp. Os revogados
+        # um a um no logout caem no mesmo corte e deixam de ser necessários
+        revogar_usuario(usuario.id_usuario, session)
+        session.exec(delete(TokenRevogado).where(col(TokenRevogado.id_usuario) == usuario.id_usuario))
         session.delete(usuario)
         session.commit()
+        invalidar_usuario(usuario.id_usuario)
         return {"message": "Usuário deletado com sucesso"}
+
+    @staticmethod
+    def upload_foto(identidade: Identidade, dados: bytes, background_tasks: BackgroundTasks, session: Session) -> dict:
+        """Salva a foto original no perfil e agenda a geração da miniatura"""
+        perfil = None
+        if identidade.tipo == TipoUsuario.MENTORA:
+            perfil = session.get(Mentora, identidade.id_perfil)
+        elif identidade.tipo == TipoUsuario.MENTORADA:
+            perfil = session.get(Mentorada, identidade.id_perfil)
+        if perfil is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Usuário não tem perfil de mentora ou mentorada"
+            )
+        FotoService.validar(dados)
+        perfil.foto_perfil = dados
+        session.add(perfil)
+        session.commit()
+        background_tasks.add_task(FotoService.processar, identidade.id_usuario)
+        return {"message": "Foto recebida; a miniatura será gerada em segundo plano"}
+
+    @staticmethod
+    def get_foto(id_usuario: UUID, session: Session) -> FotoPerfil:
+        foto = session.get(FotoPerfil, id_usuario)
+        if not foto:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Foto não encontrada"
+            )
+        return foto
@@ -1,22 +1,152 @@
+import os
+import random
 from typing import Annotated
 from dotenv import dotenv_values
-from fastapi import Depends
+from fastapi import Depends, Request
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.sql.dml import UpdateBase
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 from .schemas.tables import *
+from .migrations import migrar
+from .services import metricas_pool, monitor_sql
+from .services.roteamento_replicas import METODOS_LEITURA, RoteamentoReplicas
 
 config = dotenv_values(".env")
-DATABASE_URL = config["DATABASE_URL"]
+DATABASE_URL = config.get("DATABASE_URL") or os.getenv("DATABASE_URL")
 assert DATABASE_URL != None
 
-connect_args = {"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-engine = create_engine(DATABASE_URL, echo=True, connect_args=connect_args)
+def _config(nome: str, padrao: str) -> str:
+    return config.get(nome) or os.getenv(nome) or padrao
 
-def create_db_and_tables():
-    SQLModel.metadata.drop_all(engine)
+# Conexões mantidas abertas, extras permitidas em picos e quanto esperar
+# por uma antes de desistir. O total por processo é size + overflow:
+# multiplicado pelos workers do uvicorn, precisa caber no max_connections
+DB_POOL_SIZE = int(_config("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(_config("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(_config("DB_POOL_TIMEOUT", "30"))
+# Conexões mais velhas que isso (s) são reabertas; -1 desliga
+DB_POOL_RECYCLE = int(_config("DB_POOL_RECYCLE", "1800"))
+# Testa a conexão ao tirá-la do pool, descartando as derrubadas pelo banco
+DB_POOL_PRE_PING = _config("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "sim")
+# Log de todo comando SQL, só para depuração local; o normal é o log de
+# comandos lentos de `monitor_sql`
+SQL_ECHO = _config("SQL_ECHO", "false").lower() in ("1", "true", "sim")
+
+# Réplicas de leitura (URLs separadas por vírgula), opcionais: sem elas
+# toda sessão usa o primário
+DATABASE_REPLICA_URLS = [url.strip() for url in _config("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+def _criar_engine(url: str) -> Engine:
+    if "sqlite" in url:
+        criado = create_engine(url, echo=SQL_ECHO, connect_args={"check_same_thread": False})
+    else:
+        criado = create_engine(
+            url,
+            echo=SQL_ECHO,
+            poolclass=metricas_pool.QueuePoolMedido,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+    metricas_pool.instrumentar(criado)
+    monitor_sql.instrumentar(criado)
+    return criado
+
+def _url_async(url: str) -> str:
+    return url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)\
+        .replace("postgresql://", "postgresql+asyncpg://", 1)\
+        .replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+def _criar_engine_async(url: str) -> AsyncEngine:
+    if "sqlite" in url:
+        criado = create_async_engine(url, echo=SQL_ECHO)
+    else:
+        criado = create_async_engine(
+            url,
+            echo=SQL_ECHO,
+            poolclass=metricas_pool.AsyncQueuePoolMedido,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+        )
+    metricas_pool.instrumentar(criado.sync_engine)
+    monitor_sql.instrumentar(criado.sync_engine)
+    return criado
+
+engine = _criar_engine(DATABASE_URL)
+replica_engines = [_criar_engine(url) for url in DATABASE_REPLICA_URLS]
+
+# Engine assíncrono (asyncpg), ao lado do síncrono, para as rotas de leitura
+# mais acessadas: elas esperam o banco sem ocupar uma thread do threadpool.
+# Tem o próprio pool, com as mesmas configurações
+ASYNC_DATABASE_URL = _config("ASYNC_DATABASE_URL", _url_async(DATABASE_URL))
+async_engine = _criar_engine_async(ASYNC_DATABASE_URL)
+async_replica_engines = [_criar_engine_async(_url_async(url)) for url in DATABASE_REPLICA_URLS]
+
+
+class SessaoRoteada(Session):
+    """
+    Sessão que lê da `replica` e escreve no engine principal. Na primeira
+    escrita (flush ou INSERT/UPDATE/DELETE) a réplica é largada e o resto
+    da sessão, leituras inclusive, segue no primário.
+    """
+
+    def __init__(self, *args, replica: Engine | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.replica is not None:
+            if not self._flushing and not isinstance(clause, UpdateBase):
+                return self.replica
+            self.replica = None
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+# expire_on_commit=False: num AsyncSession, ler um atributo expirado exigiria
+# um await implícito, que não existe
+async_session_factory = async_sessionmaker(
+    async_engine, class_=AsyncSession, sync_session_class=SessaoRoteada, expire_on_commit=False
+)
+
+def _replica(request: Request, replicas: list):
+    if not replicas or not RoteamentoReplicas.usar_replica(request):
+        return None
+    return random.choice(replicas)
+
+def create_db_and_tables() -> list[int]:
+    """
+    Cria as tabelas que faltam e aplica as migrações pendentes de
+    `src.migrations`; não apaga nada. Devolve as versões aplicadas.
+    """
     SQLModel.metadata.create_all(engine)
+    return migrar(engine)
 
-def get_session():
-    with Session(engine) as session:
-        yield session
+def get_session(request: Request):
+    """Sessão da requisição: numa réplica para GET, no primário para o resto"""
+    replica = _replica(request, replica_engines)
+    try:
+        with SessaoRoteada(engine, replica=replica) as session:
+            yield session
+    finally:
+        # A janela do "leia o que escreveu" conta a partir do fim da escrita
+        if request.method not in METODOS_LEITURA:
+            RoteamentoReplicas.marcar_escrita(request)
 
 SessionDep = Annotated[Session, Depends(get_session)]
+
+async def get_async_session(request: Request):
+    replica = _replica(request, async_replica_engines)
+    try:
+        async with async_session_factory(replica=None if replica is None else replica.sync_engine) as session:
+            yield session
+    finally:
+        if request.method not in METODOS_LEITURA:
+            RoteamentoReplicas.marcar_escrita(request)
+
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_session)]
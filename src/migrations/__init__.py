@@ -0,0 +1,89 @@
+"""
+Migrações versionadas do banco, só aditivas: nenhuma apaga dados.
+
+Cada módulo `mNNNN_<nome>.py` deste pacote define `VERSAO` (inteiro, a
+ordem de aplicação), `DESCRICAO` e `COMANDOS`, a lista de comandos SQL.
+`migrar` aplica as pendentes em ordem, cada uma na sua transação, e grava
+a versão em `versao_schema`. Uma migração que falha é desfeita inteira e
+para as seguintes. Comandos que apagam dados (DROP TABLE/COLUMN,
+TRUNCATE, DELETE) são recusados antes de qualquer coisa rodar.
+
+Os comandos usam IF NOT EXISTS: num banco novo o `create_all` já criou o
+que está nos modelos, e a migração só registra a versão. Um módulo
+aplicado não muda mais; alterações entram numa migração nova, e os
+modelos em `src/schemas/tables.py` acompanham.
+"""
+import importlib
+import logging
+import pkgutil
+import re
+from datetime import datetime
+from types import ModuleType
+from sqlalchemy import insert, select, text
+from sqlalchemy.engine import Engine
+from src.schemas.tables import VersaoSchema
+
+logger = logging.getLogger("src.migrations")
+
+# Advisory lock do Postgres: com vários processos subindo juntos, só um migra
+_CHAVE_LOCK = 0x5753_4D47
+
+_DESTRUTIVO = re.compile(
+    r"\bDROP\s+(TABLE|COLUMN|SCHEMA|DATABASE)\b"
+    r"|\bTRUNCATE\b"
+    r"|\bDELETE\s+FROM\b"
+    r"|\bALTER\s+TABLE\s+\S+\s+DROP\s+(?!CONSTRAINT\b|DEFAULT\b|NOT\s+NULL\b)",
+    re.IGNORECASE,
+)
+
+
+def migracoes() -> list[ModuleType]:
+    """Módulos de migração do pacote, em ordem de versão, já validados."""
+    modulos = [
+        importlib.import_module(f"{__name__}.{info.name}")
+        for info in pkgutil.iter_modules(__path__)
+        if re.fullmatch(r"m\d{4}_\w+", info.name)
+    ]
+    modulos.sort(key=lambda modulo: modulo.VERSAO)
+    versoes = [modulo.VERSAO for modulo in modulos]
+    if len(set(versoes)) != len(versoes):
+        raise ValueError(f"Versões de migração repetidas: {versoes}")
+    for modulo in modulos:
+        for comando in modulo.COMANDOS:
+            if _DESTRUTIVO.search(comando):
+                raise ValueError(f"Migração {modulo.VERSAO} apagaria dados: {comando.strip()}")
+    return modulos
+
+
+def migrar(engine: Engine) -> list[int]:
+    """Aplica as migrações ainda não registradas no banco; devolve as versões aplicadas."""
+    pendentes = migracoes()
+    if engine.dialect.name != "postgresql":
+        # Os comandos são do Postgres (GIN, índices parciais); nos outros
+        # bancos, de desenvolvimento, o schema vem só do create_all
+        logger.warning("Migrações ignoradas: o banco é %s, não PostgreSQL", engine.dialect.name)
+        return []
+    aplicadas: list[int] = []
+    with engine.connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:chave)"), {"chave": _CHAVE_LOCK})
+        conn.commit()
+        try:
+            VersaoSchema.__table__.create(conn, checkfirst=True)
+            feitas = set(conn.execute(select(VersaoSchema.versao)).scalars())
+            conn.commit()
+            for migracao in pendentes:
+                if migracao.VERSAO in feitas:
+                    continue
+                with conn.begin():
+                    for comando in migracao.COMANDOS:
+                        conn.execute(text(comando))
+                    conn.execute(insert(VersaoSchema).values(
+                        versao=migracao.VERSAO, descricao=migracao.DESCRICAO, aplicada_em=datetime.now(),
+                    ))
+                logger.info("Migração %04d aplicada: %s", migracao.VERSAO, migracao.DESCRICAO)
+                aplicadas.append(migracao.VERSAO)
+        finally:
+            conn.rollback()
+            conn.execute(text("SELECT pg_advisory_unlock(:chave)"), {"chave": _CHAVE_LOCK})
+            conn.commit()
+    return aplicadas
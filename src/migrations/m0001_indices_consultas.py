@@ -0,0 +1,40 @@
+"""
+Índices para os predicados das consultas mais frequentes: listagem e
+decisão de pedidos (`match_controller.py`), painéis da mentora
+(`mentor.py`), mensagens e arquivos (`mentoring.py`), fila de aprovação
+(`admin_controller.py`) e a resolução da identidade no login. Mais GIN
+nas listas de competências e hobbies, para buscas com && e @>.
+"""
+
+VERSAO = 1
+DESCRICAO = "Índices das consultas mais frequentes e GIN nas listas de competências e hobbies"
+
+COMANDOS = [
+    # Identidade do usuário (um perfil por tabela, pelo id_usuario)
+    "CREATE INDEX IF NOT EXISTS ix_administrador_id_usuario ON administrador (id_usuario)",
+    "CREATE INDEX IF NOT EXISTS ix_coordenador_id_usuario ON coordenador (id_usuario)",
+    "CREATE INDEX IF NOT EXISTS ix_coordenador_id_universidade_instituicao ON coordenador (id_universidade_instituicao)",
+    "CREATE INDEX IF NOT EXISTS ix_mentora_id_usuario ON mentora (id_usuario)",
+    "CREATE INDEX IF NOT EXISTS ix_mentorada_id_usuario ON mentorada (id_usuario)",
+    # Contas por universidade e fila de aprovação
+    "CREATE INDEX IF NOT EXISTS ix_mentora_universidade ON mentora (id_universidade_instituicao, conta_ativa)",
+    "CREATE INDEX IF NOT EXISTS ix_mentorada_universidade ON mentorada (id_universidade_instituicao, conta_ativa)",
+    "CREATE INDEX IF NOT EXISTS ix_mentora_aguardando_aprovacao ON mentora (id_usuario) WHERE NOT conta_ativa",
+    "CREATE INDEX IF NOT EXISTS ix_mentorada_aguardando_aprovacao ON mentorada (id_usuario) WHERE NOT conta_ativa",
+    # Competências e hobbies
+    "CREATE INDEX IF NOT EXISTS ix_mentora_competencias ON mentora USING gin (competencias)",
+    "CREATE INDEX IF NOT EXISTS ix_mentora_hobbies ON mentora USING gin (hobbies)",
+    "CREATE INDEX IF NOT EXISTS ix_mentorada_competencias_interesse ON mentorada USING gin (competencias_interesse)",
+    "CREATE INDEX IF NOT EXISTS ix_mentorada_hobbies ON mentorada USING gin (hobbies)",
+    # Pedidos: pendentes por pontuação e os de cada mentora/mentorada
+    "CREATE INDEX IF NOT EXISTS ix_pedidos_mentoria_pendentes ON pedidos_mentoria (pontuacao, id_pedidos_mentoria)"
+    " WHERE estado_pedido = 'pendente'",
+    "CREATE INDEX IF NOT EXISTS ix_pedidos_mentoria_mentora ON pedidos_mentoria (id_mentora, estado_pedido)",
+    "CREATE INDEX IF NOT EXISTS ix_pedidos_mentoria_mentorada ON pedidos_mentoria (id_mentorada, estado_pedido)",
+    # Mentorias, encontros, materiais e mensagens
+    "CREATE INDEX IF NOT EXISTS ix_mentoria_mentora ON mentoria (id_mentora, id_mentorada)",
+    "CREATE INDEX IF NOT EXISTS ix_mentoria_mentorada ON mentoria (id_mentorada, ano_mentoria, comeco_mentoria)",
+    "CREATE INDEX IF NOT EXISTS ix_encontro_id_mentoria ON encontro (id_mentoria)",
+    "CREATE INDEX IF NOT EXISTS ix_material_mentoria_id_mentoria ON material_mentoria (id_mentoria)",
+    "CREATE INDEX IF NOT EXISTS ix_mensagem_mentoria_id_mentoria ON mensagem_mentoria (id_mentoria)",
+]
@@ -0,0 +1,12 @@
+"""
+Coluna `versao_perfil` de mentoras e mentoradas, usada para invalidar o
+cache de pontuações do match. Bancos criados antes dela não a têm.
+"""
+
+VERSAO = 2
+DESCRICAO = "versao_perfil em mentora e mentorada"
+
+COMANDOS = [
+    "ALTER TABLE mentora ADD COLUMN IF NOT EXISTS versao_perfil INTEGER NOT NULL DEFAULT 1",
+    "ALTER TABLE mentorada ADD COLUMN IF NOT EXISTS versao_perfil INTEGER NOT NULL DEFAULT 1",
+]
@@ -0,0 +1,20 @@
+"""
+No máximo um pedido pendente e uma mentoria ativa por mentora e por
+mentorada, garantido no banco. Se já houver duplicados, a criação do
+índice falha e nada desta migração é aplicado: resolva os duplicados
+(aceitando, recusando ou encerrando) e rode de novo.
+"""
+
+VERSAO = 3
+DESCRICAO = "Unicidade de pedido pendente e de mentoria ativa"
+
+COMANDOS = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_pedidos_mentoria_mentora_pendente ON pedidos_mentoria (id_mentora)"
+    " WHERE estado_pedido = 'pendente'",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_pedidos_mentoria_mentorada_pendente ON pedidos_mentoria (id_mentorada)"
+    " WHERE estado_pedido = 'pendente'",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_mentoria_mentora_ativa ON mentoria (id_mentora)"
+    " WHERE estado_mentoria = 'ativa'",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_mentoria_mentorada_ativa ON mentoria (id_mentorada)"
+    " WHERE estado_mentoria = 'ativa'",
+]
@@ -0,0 +1,12 @@
+"""
+Coluna `heartbeat_em` de `execucao_match`: a execução em andamento a
+atualiza periodicamente, e uma sem batimento recente é dada como
+abandonada. Bancos criados antes dela não a têm.
+"""
+
+VERSAO = 4
+DESCRICAO = "heartbeat_em em execucao_match"
+
+COMANDOS = [
+    "ALTER TABLE execucao_match ADD COLUMN IF NOT EXISTS heartbeat_em TIMESTAMP WITHOUT TIME ZONE",
+]
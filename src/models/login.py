@@ -1,26 +1,42 @@
 import enum
-from typing import Tuple
-from uuid import UUID
-from fastapi import HTTPException
+import hashlib
+from typing import Annotated, Tuple
+from uuid import UUID, uuid4
+from fastapi import Depends, HTTPException, Request
 from pydantic import BaseModel
+from sqlalchemy import literal, union_all
+from sqlalchemy.orm import make_transient_to_detached
 from sqlalchemy.sql.base import _NoneName
 from sqlmodel import Session, select
-import bcrypt
 import jwt
 from datetime import date, timedelta, timezone, datetime
 import dotenv
 import os
 
-from starlette.status import HTTP_401_UNAUTHORIZED
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_401_UNAUTHORIZED
 
-from src.database import engine
-from src.schemas.tables import ConviteCoordenador, Coordenador, Mentora, Mentorada, UniversidadeInstituicao, Usuario
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.database import AsyncSessionDep, async_session_factory, engine
+from src.schemas.tables import Administrador, ConviteCoordenador, Coordenador, Mentora, Mentorada, UniversidadeInstituicao, Usuario
+from src.services.revogacao_service import RevogacaoService
+from src.services.senha_service import SenhaService
+from src.services.ttl_cache import TTLCache
+from src.services.unicidade_service import UnicidadeService
 
 dotenv.load_dotenv()
 
 SECRET_KEY = os.getenv("SECRET_KEY", "")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 14 # 14 days
+# Por quanto tempo o Usuario e o perfil de quem se autenticou ficam em memória
+AUTH_CACHE_TTL_S = float(os.getenv("AUTH_CACHE_TTL_S", "60"))
+
+_usuarios: TTLCache[UUID, dict] = TTLCache(maxsize=10_000, ttl_s=AUTH_CACHE_TTL_S)
+_perfis: TTLCache[UUID, tuple["TipoUsuario", UUID | None]] = TTLCache(maxsize=10_000, ttl_s=AUTH_CACHE_TTL_S)
+# Tokens já verificados (sha256 do token -> Identidade, jti e iat), cada um até o seu exp
+_tokens: TTLCache[bytes, tuple["Identidade", UUID | None, float | None]] = TTLCache(
+    maxsize=int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000")), ttl_s=ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
 
 class TipoUsuario(enum.StrEnum):
     ADMIN       = enum.auto()
@@ -102,101 +118,100 @@ class CadastroCoordenador(BaseModel):
     data_nascimento : str
     senha_temporaria : str
     
+def montar_usuario(cadastro: CadastroModel, senha_hash: str) -> Usuario:
+    return Usuario(
+        nome_completo=cadastro.nome_completo,
+        email=cadastro.email,
+        senha=senha_hash,
+        cpf=cadastro.cpf,
+        data_nascimento = date(
+            int(cadastro.data_nascimento.split("/")[2]),
+            int(cadastro.data_nascimento.split("/")[1]),
+            int(cadastro.data_nascimento.split("/")[0])
+        )
+    )
+
+def montar_mentorada(cadastro: CadastroMentorada, id_usuario: UUID) -> Mentorada:
+    return Mentorada(
+        foto_perfil = None,
+        linkedin = cadastro.linkedin if cadastro.linkedin is not None else None,
+        genero = Genero(cadastro.genero.lower()),
+        etnia = Etnia(cadastro.etnia.lower()),
+        area_stem = cadastro.area_stem,
+        curso = cadastro.curso,
+        ano_curso = cadastro.ano_curso,
+        semestre = cadastro.semestre,
+        situacao_atual = cadastro.situacao_atual,
+        foco_mentoria = cadastro.foco_mentoria,
+        idiomas = cadastro.idiomas,
+        competencias_interesse = cadastro.desenvolver_competencias,
+        hobbies = cadastro.hobbies_interesses,
+        disponibilidade = cadastro.disponibilidade,
+        id_usuario = id_usuario,
+        id_universidade_instituicao=UUID(cadastro.universidade_instituicao),
+        termo_assinado = None
+    )
+
+def montar_mentora(cadastro: CadastroMentora, id_usuario: UUID) -> Mentora:
+    return Mentora(
+        foto_perfil=None,
+        linkedin=cadastro.linkedin if cadastro.linkedin is not None else None,
+        formacao=cadastro.formacao,
+        cargo_atual=cadastro.cargo_atual,
+        area_atuacao=cadastro.area_atuacao,
+        cidade=cadastro.cidade,
+        estado=cadastro.estado,
+        etnia=cadastro.etnia,
+        genero=cadastro.genero,
+        foi_mentora=cadastro.foi_mentora,
+        foi_mentorada=cadastro.foi_mentorada,
+        perfil_interesse=cadastro.perfil_interesse,
+        foco_mentoria=cadastro.foco_mentoria,
+        idiomas=cadastro.idiomas,
+        competencias=cadastro.competencias,
+        hobbies=cadastro.hobbies,
+        disponibilidade=cadastro.disponibilidade,
+        ajuda=cadastro.ajuda,
+        bio=cadastro.bio,
+        id_usuario=id_usuario,
+        id_universidade_instituicao=None,
+        termo_assinado=None
+    )
+
 class Cadastro:
     @classmethod
-    def fazer_cadastro_mentorada(cls, cadastro: CadastroMentorada):
-        session = Session(engine)
+    def fazer_cadastro_mentorada(cls, cadastro: CadastroMentorada, session: Session):
         try:
-            usuario = Usuario(
-                nome_completo= cadastro.nome_completo,
-                email=cadastro.email,
-                senha=get_password_hash(cadastro.senha),
-                cpf=cadastro.cpf,
-                data_nascimento = date(
-                    int(cadastro.data_nascimento.split("/")[2]),
-                    int(cadastro.data_nascimento.split("/")[1]),
-                    int(cadastro.data_nascimento.split("/")[0])
-                )
-            )
+            # Repetidos saem aqui, antes do bcrypt
+            UnicidadeService.verificar(cadastro.email, cadastro.cpf, session)
+            usuario = montar_usuario(cadastro, get_password_hash(cadastro.senha))
             session.add(usuario)
-            mentorada = Mentorada(
-                foto_perfil = None,
-                linkedin = cadastro.linkedin if cadastro.linkedin is not None else None,
-                genero = Genero(cadastro.genero.lower()),
-                etnia = Etnia(cadastro.etnia.lower()),
-                area_stem = cadastro.area_stem,
-                curso = cadastro.curso,
-                ano_curso = cadastro.ano_curso,
-                semestre = cadastro.semestre,
-                situacao_atual = cadastro.situacao_atual,
-                foco_mentoria = cadastro.foco_mentoria,
-                idiomas = cadastro.idiomas,
-                competencias_interesse = cadastro.desenvolver_competencias,
-                hobbies = cadastro.hobbies_interesses,
-                disponibilidade = cadastro.disponibilidade,
-                id_usuario = usuario.id_usuario,
-                id_universidade_instituicao=UUID(cadastro.universidade_instituicao),
-                termo_assinado = None
-            )
-            session.add(mentorada)
+            session.add(montar_mentorada(cadastro, usuario.id_usuario))
             session.commit()
-            session.close()
+            UnicidadeService.registrar(usuario.email, usuario.cpf)
             return True
+        except HTTPException:
+            raise
         except Exception as e:
             print(e)
             return None
-        finally:
-            session.close()
             
     @classmethod
-    def fazer_cadastro_mentora(cls, cadastro: CadastroMentora):
-        session = Session(engine)
+    def fazer_cadastro_mentora(cls, cadastro: CadastroMentora, session: Session):
         try:
-            usuario = Usuario(
-                nome_completo=cadastro.nome_completo,
-                email=cadastro.email,
-                senha=get_password_hash(cadastro.senha),
-                cpf=cadastro.cpf,
-                data_nascimento = date(
-                    int(cadastro.data_nascimento.split("/")[2]),
-                    int(cadastro.data_nascimento.split("/")[1]),
-                    int(cadastro.data_nascimento.split("/")[0])
-                )
-            )
+            # Repetidos saem aqui, antes do bcrypt
+            UnicidadeService.verificar(cadastro.email, cadastro.cpf, session)
+            usuario = montar_usuario(cadastro, get_password_hash(cadastro.senha))
             session.add(usuario)
-            mentora = Mentora(
-                foto_perfil=None,
-                linkedin=cadastro.linkedin if cadastro.linkedin is not None else None,
-                formacao=cadastro.formacao,
-                cargo_atual=cadastro.cargo_atual,
-                area_atuacao=cadastro.area_atuacao,
-                cidade=cadastro.cidade,
-                estado=cadastro.estado,
-                etnia=cadastro.etnia,
-                genero=cadastro.genero,
-                foi_mentora=cadastro.foi_mentora,
-                foi_mentorada=cadastro.foi_mentorada,
-                perfil_interesse=cadastro.perfil_interesse,
-                foco_mentoria=cadastro.foco_mentoria,
-                idiomas=cadastro.idiomas,
-                competencias=cadastro.competencias,
-                hobbies=cadastro.hobbies,
-                disponibilidade=cadastro.disponibilidade,
-                ajuda=cadastro.ajuda,
-                bio=cadastro.bio,
-                id_usuario=usuario.id_usuario,
-                id_universidade_instituicao=None,
-                termo_assinado=None
-            )
-            session.add(mentora)
+            session.add(montar_mentora(cadastro, usuario.id_usuario))
             session.commit()
-            session.close()
+            UnicidadeService.registrar(usuario.email, usuario.cpf)
             return True
+        except HTTPException:
+            raise
         except Exception as e:
             print(e)
             return None
-        finally:
-            session.close()
 
     @classmethod
     def fazer_cadastro_coordenador(cls, cadastro : CadastroCoordenador):
@@ -246,14 +261,23 @@ class Login:
             statement = select(Usuario).where(Usuario.email == login.email)
             usuario = session.exec(statement).one()
             if verify_password(login.senha, usuario.senha):
-                return (create_access_token(data={
-                    "nome" : usuario.nome_completo,
-                    "email" : usuario.email,
-                }, expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)),
+                novo_hash = SenhaService.rehash(login.senha, usuario.senha)
+                if novo_hash is not None:
+                    usuario.senha = novo_hash
+                    session.add(usuario)
+                    session.commit()
+                    invalidar_usuario(usuario.id_usuario)
+                # Id, tipo e perfil vão no token: as requisições seguintes
+                # se identificam sem consultar o banco
+                identidade = get_identidade_usuario(usuario, session)
+                return (create_access_token(data=claims_identidade(identidade),
+                                            expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)),
                         {"nome_completo" : usuario.nome_completo,
-                         "tipo_usuario" : get_tipo_usuario(usuario).value}
+                         "tipo_usuario" : identidade.tipo.value}
                         )
             session.close()
+        except HTTPException:
+            raise
         except Exception as e:
             print(e)
             return (None, None)
@@ -263,42 +287,244 @@ class Login:
 
 
 def verify_password(plain_password, hashed_password):
-    return bcrypt.checkpw(
-        plain_password.encode("utf-8"),
-        hashed_password.encode("utf-8"),
-    )
+    return SenhaService.verificar(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    return SenhaService.gerar_hash(password)
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
+    agora = datetime.now(timezone.utc)
     if expires_delta:
-        expire = datetime.now(timezone.utc) + expires_delta
+        expire = agora + expires_delta
     else:
-        expire = datetime.now(timezone.utc) + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+        expire = agora + timedelta(minutes=15)
+    # jti identifica o token para revogá-lo no logout; iat, para revogar
+    # de uma vez os tokens de um usuário removido
+    to_encode.update({"exp": expire, "iat": agora, "jti": str(uuid4())})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+class Identidade(BaseModel):
+    """Quem fez a requisição, como está nos claims do token."""
+    id_usuario : UUID
+    email : str
+    nome : str
+    tipo : TipoUsuario
+    # id_mentora, id_mentorada, id_coordenador ou id_administrador, conforme o tipo
+    id_perfil : UUID | None
+
+
+def _perfil_usuario(id_usuario : UUID, session : Session) -> tuple[TipoUsuario, UUID | None]:
+    """Tipo e id do perfil numa consulta só: administrador, coordenador, mentora e mentorada, nessa prioridade."""
+    perfis = union_all(
+        select(literal(0).label("ordem"), Administrador.id_administrador.label("id_perfil"))
+        .where(Administrador.id_usuario == id_usuario),
+        select(literal(1), Coordenador.id_coordenador).where(Coordenador.id_usuario == id_usuario),
+        select(literal(2), Mentora.id_mentora).where(Mentora.id_usuario == id_usuario),
+        select(literal(3), Mentorada.id_mentorada).where(Mentorada.id_usuario == id_usuario),
+    ).subquery()
+    perfil = session.execute(select(perfis).order_by(perfis.c.ordem).limit(1)).first()
+    if perfil is None:
+        raise Exception("O usuário não foi cadastrado corretamente")
+    tipos = [TipoUsuario.ADMIN, TipoUsuario.COORDENADOR, TipoUsuario.MENTORA, TipoUsuario.MENTORADA]
+    return tipos[perfil.ordem], perfil.id_perfil
+
+
+def get_identidade_usuario(usuario : Usuario, session : Session) -> Identidade:
+    perfil = _perfis.get(usuario.id_usuario)
+    if perfil is None:
+        perfil = _perfil_usuario(usuario.id_usuario, session)
+        _perfis.set(usuario.id_usuario, perfil)
+    tipo, id_perfil = perfil
+    return Identidade(
+        id_usuario=usuario.id_usuario,
+        email=usuario.email,
+        nome=usuario.nome_completo,
+        tipo=tipo,
+        id_perfil=id_perfil,
+    )
+
+
+def claims_identidade(identidade : Identidade) -> dict:
+    return {
+        "sub": str(identidade.id_usuario),
+        "email": identidade.email,
+        "nome": identidade.nome,
+        "tipo": identidade.tipo.value,
+        "id_perfil": str(identidade.id_perfil) if identidade.id_perfil is not None else None,
+    }
+
+
+def _identidade_payload(payload : dict, token : str, session : Session) -> Identidade | None:
+    if "sub" in payload and "tipo" in payload:
+        return Identidade(
+            id_usuario=payload["sub"],
+            email=payload["email"],
+            nome=payload["nome"],
+            tipo=payload["tipo"],
+            id_perfil=payload.get("id_perfil"),
+        )
+    # Tokens emitidos antes dos claims de perfil (só `email`)
+    usuario = get_current_user(token, session)
+    if usuario is None:
+        return None
+    return get_identidade_usuario(usuario, session)
+
+
+def _verificar_token(token: str, session : Session) -> tuple[Identidade, UUID | None, float | None] | None:
+    """
+    Identidade, jti e iat do token. Tokens já verificados ficam num LRU pelo
+    sha256 até o `exp`: a assinatura é conferida uma vez, não a cada
+    requisição. Tokens antigos, resolvidos pelo banco, ficam só
+    `AUTH_CACHE_TTL_S`.
+    """
+    chave = hashlib.sha256(token.encode()).digest()
+    verificado = _tokens.get(chave)
+    if verificado is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        identidade = _identidade_payload(payload, token, session)
+        if identidade is None:
+            return None
+        jti = UUID(payload["jti"]) if "jti" in payload else None
+        validade = payload["exp"] - datetime.now(timezone.utc).timestamp()
+        if "sub" not in payload:
+            validade = min(validade, AUTH_CACHE_TTL_S)
+        verificado = (identidade, jti, payload.get("iat"))
+        _tokens.set(chave, verificado, ttl_s=validade)
+    return verificado
+
+
+def get_identidade(token: str, session : Session) -> Identidade | None:
+    """Identidade do token, conferindo a revogação sempre, mesmo com o token no LRU."""
+    verificado = _verificar_token(token, session)
+    if verificado is None:
+        return None
+    identidade, jti, emitido_em = verificado
+    if jti is not None and RevogacaoService.revogado(jti, session):
+        return None
+    if RevogacaoService.usuario_revogado(identidade.id_usuario, emitido_em, session):
+        return None
+    return identidade
+
+
+async def get_identidade_async(token: str, session : AsyncSession) -> Identidade | None:
+    """
+    `get_identidade` no AsyncSession. O caso comum (token no LRU e fora do
+    filtro de revogados) não toca no banco; o resto reaproveita o código
+    síncrono com `run_sync`, na conexão assíncrona. A revogação é
+    confirmada no primário.
+    """
+    verificado = _tokens.get(hashlib.sha256(token.encode()).digest())
+    if verificado is None:
+        verificado = await session.run_sync(lambda sync_session: _verificar_token(token, sync_session))
+        if verificado is None:
+            return None
+    identidade, jti, emitido_em = verificado
+    talvez_jti = jti is not None and RevogacaoService.talvez_revogado(jti)
+    if talvez_jti or RevogacaoService.talvez_usuario_revogado(identidade.id_usuario, emitido_em):
+        # A confirmação vai sempre ao primário: a sessão da requisição pode
+        # estar numa réplica que ainda não recebeu o logout
+        def revogado(sync_session : Session) -> bool:
+            return ((talvez_jti and RevogacaoService.revogado(jti, sync_session))
+                    or RevogacaoService.usuario_revogado(identidade.id_usuario, emitido_em, sync_session))
+
+        async with async_session_factory() as primario:
+            if await primario.run_sync(revogado):
+                return None
+    return identidade
+
+
+def revogar_token(token: str, session : Session):
+    """Logout: o token deixa de valer antes do exp. Tokens sem jti (antigos) não são revogáveis."""
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    if "jti" not in payload:
+        raise HTTPException(status_code=HTTP_400_BAD_REQUEST, detail="Token sem jti; faça login novamente")
+    identidade = get_identidade(token, session)
+    if identidade is None:
+        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+    RevogacaoService.revogar(UUID(payload["jti"]), identidade.id_usuario, datetime.fromtimestamp(payload["exp"]), session)
+    _tokens.discard(hashlib.sha256(token.encode()).digest())
+
+
 def get_current_user(token: str, session : Session):
+    """
+    Usuário do token. As colunas ficam num cache de `AUTH_CACHE_TTL_S`
+    segundos por id: num acerto o Usuario é anexado à sessão sem consulta.
+    """
     payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    email = payload.get("email")
-    if email is None:
-        return None
-    user = session.exec(select(Usuario).where(Usuario.email == email)).one()
+    if "sub" in payload:
+        id_usuario = UUID(payload["sub"])
+        if "tipo" in payload and _perfis.get(id_usuario) is None:
+            id_perfil = payload.get("id_perfil")
+            _perfis.set(id_usuario, (TipoUsuario(payload["tipo"]), UUID(id_perfil) if id_perfil else None))
+        dados = _usuarios.get(id_usuario)
+        if dados is not None:
+            usuario = Usuario(**dados)
+            make_transient_to_detached(usuario)
+            return session.merge(usuario, load=False)
+        user = session.get(Usuario, id_usuario)
+    else:
+        email = payload.get("email")
+        if email is None:
+            return None
+        user = session.exec(select(Usuario).where(Usuario.email == email)).one()
     if user is None:
         return None
+    _usuarios.set(user.id_usuario, {coluna.key: getattr(user, coluna.key) for coluna in Usuario.__table__.columns})
     return user
 
-def get_tipo_usuario(usuario : Usuario) -> TipoUsuario:
-    if usuario.administradores is not None and len(usuario.administradores) > 0:
-        return TipoUsuario.ADMIN
-    if usuario.coordenadores is not None and len(usuario.coordenadores) > 0:
-        return TipoUsuario.COORDENADOR
-    if usuario.mentoras is not None and len(usuario.mentoras) > 0:
-        return TipoUsuario.MENTORA
-    if usuario.mentoradas is not None and len(usuario.mentoradas) > 0:
-        return TipoUsuario.MENTORADA
-    else:
-        raise Exception("O usuário não foi cadastrado corretamente") 
+
+def invalidar_usuario(id_usuario : UUID):
+    """Tira o usuário dos caches de autenticação (alteração ou remoção)."""
+    _usuarios.discard(id_usuario)
+    _perfis.discard(id_usuario)
+
+
+def revogar_usuario(id_usuario : UUID, session : Session):
+    """
+    Remoção do usuário ou de um perfil dele: todos os tokens já emitidos
+    deixam de valer (o tipo e o perfil estão nos claims) e saem do LRU.
+    """
+    expira_em = datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    RevogacaoService.revogar_usuario(id_usuario, expira_em, session)
+    _tokens.discard_where(lambda _, verificado: verificado[0].id_usuario == id_usuario)
+
+
+def token_requisicao(request : Request) -> str:
+    """Token do header `Authorization: Bearer <token>`, ou 401."""
+    authorization = request.headers.get("authorization")
+    partes = authorization.split(" ") if authorization is not None else []
+    if len(partes) < 2:
+        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+    return partes[1]
+
+
+async def usuario_atual(request : Request, session : AsyncSessionDep) -> Identidade:
+    """
+    Dependência: identidade do header Authorization, ou 401. Assíncrona:
+    resolver quem fez a requisição não ocupa uma thread do threadpool.
+    """
+    try:
+        identidade = await get_identidade_async(token_requisicao(request), session)
+    except jwt.InvalidTokenError:
+        identidade = None
+    if identidade is None:
+        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+    return identidade
+
+
+CurrentUser = Annotated[Identidade, Depends(usuario_atual)]
+
+
+def RequireRole(*tipos : TipoUsuario):
+    """Dependência: como `CurrentUser`, mas só para os tipos de usuário indicados."""
+    async def exigir_tipo(identidade : CurrentUser) -> Identidade:
+        if identidade.tipo not in tipos:
+            raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+        return identidade
+    return exigir_tipo
+
+
+AdminUser = Annotated[Identidade, Depends(RequireRole(TipoUsuario.ADMIN))]
+GestorUser = Annotated[Identidade, Depends(RequireRole(TipoUsuario.ADMIN, TipoUsuario.COORDENADOR))]
@@ -1,98 +1,91 @@
 from typing import Literal
 from uuid import UUID
-from sqlmodel import Session, desc, select
-from src.database import engine
-from src.models.login import get_current_user
-from src.schemas.tables import Mentora, Mentoria 
+from sqlmodel import col, desc, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from src.models.login import Identidade, TipoUsuario
+from src.schemas.tables import Encontro, Mentorada, Mentoria, Usuario
 
 
 class MentorModel:
+    """
+    Painel da mentora. As consultas trazem tudo num select só, com joins
+    explícitos: no AsyncSession não há carga preguiçosa de relacionamento
+    (`mentoria.mentorada` faria IO implícito e falha).
+    """
+
     @classmethod
-    def get_current_mentee_info(cls, token : str) -> dict[Literal["name","course","semester","progress", "status", "id"],str | int | UUID] | None:
-        session = Session(engine)
-        user = get_current_user(token, session)
+    async def get_current_mentee_info(cls, identidade : Identidade, session : AsyncSession) -> dict[Literal["name","course","semester","progress", "status", "id"],str | int | UUID] | None:
         try:
-            if user is None:
-                return None
-            statement = select(Mentora).where(Mentora.id_usuario == user.id_usuario)
-            mentor = session.exec(statement).one_or_none()
-            if mentor is None:
+            if identidade.tipo != TipoUsuario.MENTORA:
                 return None
 
-            statement = select(Mentoria)\
-                .where(Mentoria.mentora == mentor)\
+            statement = select(
+                    col(Mentorada.id_mentorada).label("id"),
+                    col(Usuario.nome_completo).label("name"),
+                    col(Mentorada.curso).label("course"),
+                    col(Mentorada.semestre).label("semester"),
+                    col(Mentoria.progresso_mentorada).label("progress"),
+                    col(Mentoria.estado_mentoria).label("status"),
+                )\
+                .join(Mentorada, col(Mentorada.id_mentorada) == Mentoria.id_mentorada)\
+                .join(Usuario, col(Usuario.id_usuario) == Mentorada.id_usuario)\
+                .where(Mentoria.id_mentora == identidade.id_perfil)\
                 .order_by(desc(Mentoria.comeco_mentoria))\
                 .limit(1)
-            
-            mentoring = session.exec(statement).one_or_none()
-            if mentoring is None:
-                return None
 
-            mentee = mentoring.mentorada
-            id_mentee = mentee.id_mentorada
-            mentee_user = mentee.usuario
-            response : dict[Literal["name","course","semester","progress", "status", "id"],str | int | UUID] = {
-                "id" : id_mentee,
-                "name" : mentee_user.nome_completo,
-                "course" : mentee.curso,
-                "semester" : mentee.semestre,
-                "progress" : mentoring.progresso_mentorada,
-                "status" : mentoring.estado_mentoria
-            }
-            session.close()
-            return response
+            mentee = (await session.exec(statement)).mappings().one_or_none()
+            if mentee is None:
+                return None
+            return dict(mentee)
         except Exception as e:
             print(e)
-            session.close()
             return None
-        
+
     @classmethod
-    def get_all_mentee_info(cls, token : str) -> list[dict[Literal["name", "course", "status", "period", "meetings", "id"], str | int | UUID]] | None:
-        session = Session(engine)
-        user = get_current_user(token, session)
+    async def get_all_mentee_info(cls, identidade : Identidade, session : AsyncSession) -> list[dict[Literal["name", "course", "status", "period", "meetings", "id"], str | int | UUID]] | None:
         try:
-            if user is None:
-                return None
-            statement = select(Mentora).where(Mentora.id_usuario == user.id_usuario)
-            mentor = session.exec(statement).one_or_none()
-            if mentor is None:
+            if identidade.tipo != TipoUsuario.MENTORA:
                 return None
 
-            statement = select(Mentoria)\
-                .where(Mentoria.mentora == mentor)\
-                .order_by(desc(Mentoria.ano_mentoria))\
+            # Encontros contados no banco, em vez de carregar a lista de cada mentoria
+            encontros = select(Encontro.id_mentoria, func.count().label("total"))\
+                .group_by(Encontro.id_mentoria)\
+                .subquery()
+            statement = select(
+                    Mentorada.id_mentorada,
+                    Usuario.nome_completo,
+                    Mentorada.curso,
+                    Mentoria.estado_mentoria,
+                    Mentoria.comeco_mentoria,
+                    Mentoria.fim_mentoria,
+                    func.coalesce(encontros.c.total, 0).label("meetings"),
+                )\
+                .join(Mentorada, col(Mentorada.id_mentorada) == Mentoria.id_mentorada)\
+                .join(Usuario, col(Usuario.id_usuario) == Mentorada.id_usuario)\
+                .outerjoin(encontros, encontros.c.id_mentoria == Mentoria.id_mentoria)\
+                .where(Mentoria.id_mentora == identidade.id_perfil)\
+                .order_by(desc(Mentoria.ano_mentoria))
+
+            mentorings = (await session.exec(statement)).all()
 
-            mentorings = session.exec(statement).all()
-            if mentorings is None:
-                return None
-            
             mentees : list[dict[Literal["name", "course", "status", "period", "meetings","id"], str | int | UUID]] = []
             for mentoring in mentorings:
-                mentee = mentoring.mentorada
-                id_mentee = mentee.id_mentorada
-                name = mentee.usuario.nome_completo
-                course = mentee.curso
-                status = mentoring.estado_mentoria
-                count_meetings = len(mentoring.encontros)
-                
                 start = mentoring.comeco_mentoria
                 end = mentoring.fim_mentoria
-                
+
                 if end is None:
                     end = "Presente"
                 else:
                     end = end.strftime("%b %Y")
                 mentees.append({
-                    "id" : id_mentee,
-                    "name" : name,
-                    "course" : course,
-                    "status" : status,
+                    "id" : mentoring.id_mentorada,
+                    "name" : mentoring.nome_completo,
+                    "course" : mentoring.curso,
+                    "status" : mentoring.estado_mentoria,
                     "period" : f'{start.strftime("%b %Y")} - {end}',
-                    "meetings" : count_meetings
+                    "meetings" : mentoring.meetings
                 })
-            session.close()
             return mentees
         except Exception as e:
             print(e)
-            session.close()
             return None
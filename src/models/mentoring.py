@@ -1,11 +1,11 @@
 import enum
 from typing import Sequence
 
-from sqlmodel import select, Session, func
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.models.login import TipoUsuario, get_current_user, get_tipo_usuario
+from src.models.login import Identidade, TipoUsuario
 from src.schemas.tables import MaterialMentoria, MensagemMentoria, Mentora, Mentorada, Mentoria
-from src.database import engine
 import base64
 
 class MentoringStatus(enum.StrEnum):
@@ -14,57 +14,51 @@ class MentoringStatus(enum.StrEnum):
     CANCELADA = enum.auto()
 
 class MentoringModel:
+    """
+    Mensagens e arquivos da mentoria. As rotas são `async def`, então tudo
+    aqui usa o AsyncSession: uma consulta esperando o banco não trava o
+    event loop.
+    """
+
     @classmethod
-    def get_messages(cls, token : str, otherId : str) -> Sequence[any] | None:
+    async def get_messages(cls, identidade : Identidade, otherId : str, session : AsyncSession) -> Sequence[any] | None:
         messages = None
-        session = Session(engine)
         try:
-            user = get_current_user(token, session)
-            if user is None:
-                return None
-            user_type = get_tipo_usuario(user)
-
-            if(user_type == TipoUsuario.MENTORA):
-                mentor = user.mentoras[0]
-                mentor_id = mentor.id_mentora
+            if(identidade.tipo == TipoUsuario.MENTORA):
+                mentor_id = identidade.id_perfil
                 mentee_id = otherId
-                
-            elif user_type == TipoUsuario.MENTORADA:
-                mentee = user.mentoradas[0]
+
+            elif identidade.tipo == TipoUsuario.MENTORADA:
                 mentor_id = otherId
-                mentee_id = mentee.id_mentorada
+                mentee_id = identidade.id_perfil
             else:
                 return None
             statement = select(Mentoria)\
                 .where(Mentoria.id_mentora == mentor_id) \
                 .where(Mentoria.id_mentorada == mentee_id)
-            mentoring = session.exec(statement).one_or_none()
+            mentoring = (await session.exec(statement)).one_or_none()
             if mentoring is None:
                 return None
             statement = select(MensagemMentoria.mensagens)\
                 .where(MensagemMentoria.id_mentoria == mentoring.id_mentoria)
-            messages = session.exec(statement).all()
+            messages = (await session.exec(statement)).all()
             if messages is None:
                 return None
-            session.close()
             return messages[0]
         except Exception as e:
             print(e)
             return None
 
     @classmethod
-    def send_file(cls, file : bytes, title: str, file_type : str, token: str, mentee_id: str):
-        session = Session(engine)
+    async def send_file(cls, file : bytes, title: str, file_type : str, identidade: Identidade, mentee_id: str, session : AsyncSession):
         try:
-            user = get_current_user(token, session)
-            if user is None:
+            if identidade.tipo != TipoUsuario.MENTORA:
                 return None
-            mentor = user.mentoras[0]
-            mentoring_id = session.exec(
+            mentoring_id = (await session.exec(
                 select(Mentoria.id_mentoria)\
-                .where(Mentoria.id_mentora==mentor.id_mentora)\
+                .where(Mentoria.id_mentora==identidade.id_perfil)\
                 .where(Mentoria.id_mentorada==mentee_id)
-            ).one()
+            )).one()
             material = MaterialMentoria(
                 id_mentoria= mentoring_id,
                 tipo_material= file_type,
@@ -72,28 +66,23 @@ class MentoringModel:
                 arquivo=file
             )
             session.add(material)
-            session.commit()
+            await session.commit()
         except Exception as e:
             print(e)
-        finally:
-            session.close()
 
     @classmethod
-    def get_files(cls, token: str, mentee_id: str):
-        session = Session(engine)
+    async def get_files(cls, identidade: Identidade, mentee_id: str, session : AsyncSession):
         try:
-            user = get_current_user(token, session)
-            if user is None:
+            if identidade.tipo != TipoUsuario.MENTORA:
                 return None
-            mentor = user.mentoras[0]
-            mentoring_id = session.exec(
+            mentoring_id = (await session.exec(
                 select(Mentoria.id_mentoria)\
-                .where(Mentoria.id_mentora==mentor.id_mentora)\
+                .where(Mentoria.id_mentora==identidade.id_perfil)\
                 .where(Mentoria.id_mentorada==mentee_id)
-            ).one_or_none()
+            )).one_or_none()
             if mentoring_id is None:
                 return None
-            files = session.exec(
+            files = (await session.exec(
                 select(
                        MaterialMentoria.id_arquivo_mentoria,
                        MaterialMentoria.titulo_material,
@@ -101,25 +90,17 @@ class MentoringModel:
                        func.length(MaterialMentoria.arquivo),
                        )\
                 .where(MaterialMentoria.id_mentoria == mentoring_id)
-            ).all()
+            )).all()
             return files
         except Exception as e:
             print(e)
-        finally:
-            session.close()
 
     @classmethod
-    def download_file(cls, token: str, file_id: str) -> tuple[bytes | None, str | None]:
-        session = Session(engine)
+    async def download_file(cls, identidade: Identidade, file_id: str, session : AsyncSession) -> tuple[bytes | None, str | None]:
         try:
-            user = get_current_user(token, session)
-            if user is None:
-                return None, None
-            user_type = get_tipo_usuario(user)
             result = ""
-            if user_type == TipoUsuario.MENTORA:
-                mentor = user.mentoras[0]
-                result = session.exec(
+            if identidade.tipo == TipoUsuario.MENTORA:
+                result = (await session.exec(
                     select(
                         MaterialMentoria.arquivo,
                         MaterialMentoria.tipo_material
@@ -130,12 +111,11 @@ class MentoringModel:
                     .join(Mentoria)\
                     .join(Mentora)\
                     .where(
-                        Mentora.id_mentora == mentor.id_mentora
+                        Mentora.id_mentora == identidade.id_perfil
                     )
-                ).one_or_none()
-            elif user_type == TipoUsuario.MENTORADA:
-                mentee = user.mentoradas[0]
-                result = session.exec(
+                )).one_or_none()
+            elif identidade.tipo == TipoUsuario.MENTORADA:
+                result = (await session.exec(
                     select(
                         MaterialMentoria.arquivo,
                         MaterialMentoria.tipo_material
@@ -146,30 +126,22 @@ class MentoringModel:
                     .join(Mentoria)\
                     .join(Mentorada)\
                     .where(
-                        Mentorada.id_mentorada == mentee.id_mentorada
+                        Mentorada.id_mentorada == identidade.id_perfil
                     )
-                ).one_or_none()
+                )).one_or_none()
             if result is None or result == '':
                 return (None, None)
             return result
         except Exception as e:
             print(e)
-        finally:
-            session.close()
         return None, None
 
     @classmethod
-    def delete_file(cls,token: str, file_id: str):
-        session = Session(engine)
+    async def delete_file(cls, identidade: Identidade, file_id: str, session : AsyncSession):
         try:
-            user = get_current_user(token, session)
-            if user is None:
-                return None
-            user_type = get_tipo_usuario(user)
             result = ""
-            if user_type == TipoUsuario.MENTORA:
-                mentor = user.mentoras[0]
-                result = session.exec(
+            if identidade.tipo == TipoUsuario.MENTORA:
+                result = (await session.exec(
                     select(
                         MaterialMentoria
                     )\
@@ -179,16 +151,13 @@ class MentoringModel:
                     .join(Mentoria)\
                     .join(Mentora)\
                     .where(
-                        Mentora.id_mentora == mentor.id_mentora
+                        Mentora.id_mentora == identidade.id_perfil
                     )
-                ).one_or_none()
+                )).one_or_none()
                 if result is None:
                     return None
-                session.delete(result)
-                session.commit()
-            session.close()
+                await session.delete(result)
+                await session.commit()
             return None
         except Exception as e:
             print(e)
-        finally:
-            session.close()
@@ -1,52 +1,46 @@
-from uuid import UUID
-from fastapi import APIRouter, HTTPException, Request, Response
-from starlette.status import HTTP_401_UNAUTHORIZED
+from fastapi import APIRouter
 from src.controllers.admin_controller import AdminController, UpdateApproval, UpdateApprovalMentee
-from src.database import SessionDep
+from src.database import AsyncSessionDep, SessionDep, async_engine, async_replica_engines, engine, replica_engines
+from src.models.login import AdminUser
+from src.services.metricas_pool import MetricasPool
+from src.services.monitor_sql import MonitorSql
+from src.services.senha_service import SenhaService
 
 
 router = APIRouter()
 
 @router.get("/get-approvals")
-def get_approvals(request : Request, response : Response, session: SessionDep):
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        mentors = AdminController.get_approvals(token, session)
-        return mentors
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+async def get_approvals(admin : AdminUser, session: AsyncSessionDep):
+    mentors = await AdminController.get_approvals(session)
+    return mentors
 
 @router.post("/update-approval")
-def update_approval(data : UpdateApproval, request : Request, response : Response, session: SessionDep):
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        AdminController.update_approval(data,token, session)
-        return []
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+def update_approval(data : UpdateApproval, admin : AdminUser, session: SessionDep):
+    AdminController.update_approval(data, session)
+    return []
 
 @router.get("/get-approvals-mentee")
-def get_approvals_mentee(request : Request, response : Response, session: SessionDep):
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        mentees = AdminController.get_approvals_mentee(token, session)
-        return mentees
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+async def get_approvals_mentee(admin : AdminUser, session: AsyncSessionDep):
+    mentees = await AdminController.get_approvals_mentee(session)
+    return mentees
 
 @router.post("/update-approval-mentee")
-def update_approval_mentee(data : UpdateApprovalMentee, request : Request, response : Response, session: SessionDep):
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        AdminController.update_approval_mentee(data,token, session)
-        return []
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+def update_approval_mentee(data : UpdateApprovalMentee, admin : AdminUser, session: SessionDep):
+    AdminController.update_approval_mentee(data, session)
+    return []
+
+@router.get("/metrics/senhas")
+def get_password_metrics(admin : AdminUser):
+    return SenhaService.metricas()
+
+@router.get("/metrics/pool")
+def get_pool_metrics(admin : AdminUser):
+    engines = {"sync": engine, "async": async_engine.sync_engine}
+    for i, (replica, replica_async) in enumerate(zip(replica_engines, async_replica_engines)):
+        engines[f"replica{i}_sync"] = replica
+        engines[f"replica{i}_async"] = replica_async.sync_engine
+    return MetricasPool.resumo(engines)
+
+@router.get("/metrics/sql")
+def get_sql_metrics(admin : AdminUser):
+    return MonitorSql.resumo()
@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, UploadFile
 from src.controllers.auth_controller import AuthController
-from src.models.login import CadastroCoordenador, LoginModel, CadastroMentora, CadastroMentorada
+from src.controllers.import_controller import ImportController, ResultadoImportacao
+from src.database import SessionDep
+from src.models.login import CadastroCoordenador, CurrentUser, GestorUser, Identidade, LoginModel, CadastroMentora, CadastroMentorada, TipoUsuario, revogar_token, token_requisicao
 
 router = APIRouter()
 
@@ -11,14 +13,34 @@ def login(credentials: LoginModel):
 
 
 @router.post("/signup-mentor")
-def signup_mentora(credentials: CadastroMentora):
-    return AuthController.signup_mentor(credentials)
+def signup_mentora(credentials: CadastroMentora, session: SessionDep):
+    return AuthController.signup_mentor(credentials, session)
 
 
 @router.post("/signup-mentee")
-def signup_mentorada(credentials: CadastroMentorada):
-    return AuthController.signup_mentee(credentials)
+def signup_mentorada(credentials: CadastroMentorada, session: SessionDep):
+    return AuthController.signup_mentee(credentials, session)
+
+@router.post("/import-mentees", response_model=ResultadoImportacao)
+def import_mentees(file: UploadFile, identidade: GestorUser, session: SessionDep):
+    return ImportController.import_csv(TipoUsuario.MENTORADA, file.file, identidade, session)
+
+
+@router.post("/import-mentors", response_model=ResultadoImportacao)
+def import_mentors(file: UploadFile, identidade: GestorUser, session: SessionDep):
+    return ImportController.import_csv(TipoUsuario.MENTORA, file.file, identidade, session)
 
 @router.post("/signup-coordinator")
 def signup_coordinator(credentials: CadastroCoordenador):
     return AuthController.signup_coordinator(credentials)
+
+
+@router.post("/logout")
+def logout(request: Request, session: SessionDep):
+    revogar_token(token_requisicao(request), session)
+    return {"message": "Sessão encerrada"}
+
+
+@router.get("/me", response_model=Identidade)
+def me(identidade: CurrentUser):
+    return identidade
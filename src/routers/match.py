@@ -1,28 +1,43 @@
-from fastapi import APIRouter, HTTPException, Request, Response
-from starlette.status import HTTP_401_UNAUTHORIZED
+from typing import Annotated
+from uuid import UUID
+from fastapi import APIRouter, Query, Response
+from fastapi.responses import StreamingResponse
+from starlette.status import HTTP_202_ACCEPTED
 from src.controllers.match_controller import (
     MatchController,
     MatchSugerido,
     PedidoMentoriaResponse,
     PedidoMentoriaCreate,
     MatchRequest,
+    MatchJobResponse,
     MatchResponse,
     MentorSuggestion,
+    DecisoesPedidos,
+    ResultadoDecisao,
 )
-from src.database import SessionDep
+from src.database import AsyncSessionDep, SessionDep
+from src.models.login import AdminUser
 
 router = APIRouter()
 
 
-@router.post("/")
-def create_match(matchRequest: MatchRequest, request: Request ,response: Response, session: SessionDep):
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        return MatchController.create_match(token, matchRequest, session)
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+@router.post("/", response_model=MatchJobResponse, status_code=HTTP_202_ACCEPTED)
+def create_match(matchRequest: MatchRequest, admin: AdminUser, session: SessionDep):
+    return MatchController.create_match(admin, matchRequest, session)
+
+
+@router.post("/stream")
+def stream_match(matchRequest: MatchRequest, admin: AdminUser, session: SessionDep):
+    return StreamingResponse(
+        MatchController.stream_match(admin, matchRequest, session),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/jobs/{id_execucao}", response_model=MatchJobResponse)
+def get_match_job(id_execucao: UUID, admin: AdminUser, session: SessionDep):
+    return MatchController.get_match_job(id_execucao, session)
 
 
 # @router.post("/pedidos", response_model=PedidoMentoriaResponse)
@@ -36,36 +51,35 @@ def get_mentorship_request(id_pedidos_mentoria: int, session: SessionDep):
 
 
 @router.get("/pedidos/", response_model=list[MatchSugerido])
-def list_mentorship_requests(request : Request, response: Response, session: SessionDep):
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        return MatchController.list_mentorship_requests(token, session)
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+async def list_mentorship_requests(
+    admin: AdminUser,
+    response: Response,
+    session: AsyncSessionDep,
+    limit: Annotated[int, Query(ge=1, le=500)] = 50,
+    cursor: str | None = None,
+    id_universidade: UUID | None = None,
+    min_score: int | None = None,
+):
+    results, proximo = await MatchController.list_mentorship_requests(
+        session, limit=limit, cursor=cursor, id_universidade=id_universidade, min_score=min_score
+    )
+    if proximo is not None:
+        response.headers["X-Next-Cursor"] = proximo
+    return results
+
+
+@router.post("/pedidos/decisoes", response_model=list[ResultadoDecisao])
+def update_mentorship_requests(data: DecisoesPedidos, admin: AdminUser, session: SessionDep):
+    return MatchController.update_mentorship_requests(data.decisoes, session)
 
 
 @router.put("/pedidos/{id_pedidos_mentoria}")
-def update_mentorship_request(id_pedidos_mentoria: str, estado_match: str, request : Request, response: Response ,session: SessionDep):
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        return MatchController.update_mentorship_request(token, id_pedidos_mentoria, estado_match, session)
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+def update_mentorship_request(id_pedidos_mentoria: str, estado_match: str, admin: AdminUser, session: SessionDep):
+    return MatchController.update_mentorship_request(id_pedidos_mentoria, estado_match, session)
 
 @router.delete("/pedidos/{id_pedidos_mentoria}")
-def delete_mentorship_request(id_pedidos_mentoria: int, request : Request, response: Response ,session: SessionDep):
-    authorization = request.headers.get("authorization")
-    print("teste")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        return MatchController.delete_mentorship_request(token, id_pedidos_mentoria, session)
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+def delete_mentorship_request(id_pedidos_mentoria: int, admin: AdminUser, session: SessionDep):
+    return MatchController.delete_mentorship_request(id_pedidos_mentoria, session)
 
 
 # @router.get("/suggestions/mentor/{id_mentora}", response_model=list[MentorSuggestion])
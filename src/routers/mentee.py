@@ -1,23 +1,21 @@
-from fastapi import APIRouter, Request, Response
+from fastapi import APIRouter
 from src.controllers.mentee_controller import (
     MenteeController,
     MenteeResponse,
     MenteeCreate,
     MenteeUpdate,
 )
-from src.database import SessionDep
+from src.database import AsyncSessionDep, SessionDep
+from src.models.login import CurrentUser
 
 router = APIRouter()
 
 @router.get("/get-card-info")
-def get_card_info(request : Request, response : Response, session : SessionDep):
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        mentee = MenteeController.get_card_info(
-            token, session
-        )
-        return mentee
+async def get_card_info(identidade : CurrentUser, session : AsyncSessionDep):
+    mentee = await MenteeController.get_card_info(
+        identidade, session
+    )
+    return mentee
 
 @router.get("/", response_model=list[MenteeResponse])
 def list_mentees(session: SessionDep):
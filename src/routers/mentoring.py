@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Form, HTTPException, Header, Request, Response, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Form, HTTPException
 from pydantic import BaseModel
-from starlette.status import HTTP_401_UNAUTHORIZED, HTTP_404_NOT_FOUND
+from starlette.status import HTTP_404_NOT_FOUND
 
+from src.database import AsyncSessionDep
+from src.models.login import CurrentUser
 from src.models.mentoring import MentoringModel
 import base64
 
@@ -12,81 +13,53 @@ class OtherId(BaseModel):
     other_id : str
 
 @router.post("/get-messages")
-def get_messages(data : OtherId, request: Request, response: Response):
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        messages = MentoringModel.get_messages(token, data.other_id)
-        if messages is None:
-            response.status_code = HTTP_401_UNAUTHORIZED
-            raise HTTPException(status_code=HTTP_404_NOT_FOUND)
-        return messages
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+async def get_messages(data : OtherId, identidade: CurrentUser, session: AsyncSessionDep):
+    messages = await MentoringModel.get_messages(identidade, data.other_id, session)
+    if messages is None:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND)
+    return messages
 
 @router.post("/send-file")
-async def send_file(file: str = Form(),title:str=Form(),file_type:str=Form(), mentee_id: str = Form(), authorization : str = Header()):
-    token = authorization.split(" ")[1]
-    MentoringModel.send_file(base64.b64decode(file), title, file_type, token, mentee_id)
+async def send_file(identidade: CurrentUser, session: AsyncSessionDep, file: str = Form(),title:str=Form(),file_type:str=Form(), mentee_id: str = Form()):
+    await MentoringModel.send_file(base64.b64decode(file), title, file_type, identidade, mentee_id, session)
     return {}
 
 @router.get("/get-files/")
-async def get_file(mentee_id: str,request : Request, response : Response):
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        files = MentoringModel.get_files(token, mentee_id)
-        if files is None:
-            response.status_code = HTTP_401_UNAUTHORIZED
-            raise HTTPException(status_code=HTTP_404_NOT_FOUND)
-        result = []
-        for file in files:
-            if file[2] == "video":
-                print(file[1])
-                result.append({
-                    "id" : file[0],
-                    "title" : file[1],
-                    "type" : file[2],
-                    "size" : file[3],
-                    "url" : MentoringModel.download_file(token,str(file[0]))[0]
-                })
-            else:
-                result.append({
-                    "id" : file[0],
-                    "title" : file[1],
-                    "type" : file[2],
-                    "size" : file[3]
-                })
-        return result
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+async def get_file(mentee_id: str, identidade: CurrentUser, session: AsyncSessionDep):
+    files = await MentoringModel.get_files(identidade, mentee_id, session)
+    if files is None:
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND)
+    result = []
+    for file in files:
+        if file[2] == "video":
+            print(file[1])
+            result.append({
+                "id" : file[0],
+                "title" : file[1],
+                "type" : file[2],
+                "size" : file[3],
+                "url" : (await MentoringModel.download_file(identidade,str(file[0]), session))[0]
+            })
+        else:
+            result.append({
+                "id" : file[0],
+                "title" : file[1],
+                "type" : file[2],
+                "size" : file[3]
+            })
+    return result
 
 @router.get("/download-file")
-async def download_file(file_id: str ,request: Request, response : Response):
-     authorization = request.headers.get("authorization")
-     if authorization is not None:
-         token = authorization.split(" ")[1]
-         file, file_type = MentoringModel.download_file(token, file_id)
-         if file is None:
-             response.status_code = HTTP_401_UNAUTHORIZED
-             raise HTTPException(status_code=HTTP_404_NOT_FOUND)
-         return {
-             "file" : base64.b64encode(file),
-             "type" : file_type
-         }
-     else:
-         response.status_code = HTTP_401_UNAUTHORIZED
-         raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+async def download_file(file_id: str, identidade: CurrentUser, session: AsyncSessionDep):
+     file, file_type = await MentoringModel.download_file(identidade, file_id, session)
+     if file is None:
+         raise HTTPException(status_code=HTTP_404_NOT_FOUND)
+     return {
+         "file" : base64.b64encode(file),
+         "type" : file_type
+     }
 
 @router.delete("/delete-file/{file_id}")
-async def delete_file(request: Request, response: Response, file_id: str):
-    authorization = request.headers.get("authorization")
-    if authorization is not None and file_id is not None and file_id != "":
-        token = authorization.split(" ")[1]
-        MentoringModel.delete_file(token, file_id)
-        return {}
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+async def delete_file(file_id: str, identidade: CurrentUser, session: AsyncSessionDep):
+    await MentoringModel.delete_file(identidade, file_id, session)
+    return {}
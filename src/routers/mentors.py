@@ -1,8 +1,9 @@
 from typing import List
-from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi import APIRouter, HTTPException, Response
 from starlette.status import HTTP_200_OK, HTTP_401_UNAUTHORIZED, HTTP_404_NOT_FOUND
 from src.models.mentor import MentorModel
-from src.database import SessionDep
+from src.database import AsyncSessionDep, SessionDep
+from src.models.login import CurrentUser
 from pydantic import create_model
 from src.controllers.mentor_controller import (
     MentorController,
@@ -30,21 +31,15 @@ def list_mentors(session: SessionDep):
     })},
     HTTP_401_UNAUTHORIZED : {"model" : None}
 })
-def get_mentee(request : Request, response : Response):
+async def get_mentee(identidade : CurrentUser, response : Response, session : AsyncSessionDep):
     """Get current mentee by mentor token"""
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        mentee = MentorModel.get_current_mentee_info(
-            token
-        )
-        if mentee is None:
-            response.status_code = HTTP_404_NOT_FOUND
-            raise HTTPException(status_code=HTTP_404_NOT_FOUND)
-        return mentee
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+    mentee = await MentorModel.get_current_mentee_info(
+        identidade, session
+    )
+    if mentee is None:
+        response.status_code = HTTP_404_NOT_FOUND
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND)
+    return mentee
 
 @router.get("/get-all-mentee", responses={
     HTTP_200_OK : {
@@ -62,22 +57,15 @@ def get_mentee(request : Request, response : Response):
     }
     
 })
-def get_all_mentee(request: Request, response: Response):
+async def get_all_mentee(identidade : CurrentUser, response: Response, session : AsyncSessionDep):
     """Get all mentee by mentor token"""
-    print(request)
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        mentees = MentorModel.get_all_mentee_info(
-            token
-        )
-        if mentees is None:
-            response.status_code = HTTP_401_UNAUTHORIZED
-            raise HTTPException(status_code=HTTP_404_NOT_FOUND)
-        return mentees
-    else:
+    mentees = await MentorModel.get_all_mentee_info(
+        identidade, session
+    )
+    if mentees is None:
         response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+        raise HTTPException(status_code=HTTP_404_NOT_FOUND)
+    return mentees
 
 
 @router.get("/{id_mentora}", response_model=MentorResponse)
@@ -1,40 +1,28 @@
 from typing import Literal
 from uuid import UUID
-from fastapi import APIRouter, HTTPException, Request, Response
-from starlette.status import HTTP_401_UNAUTHORIZED
+from fastapi import APIRouter
 from src.controllers.university_controller import (
     UniversityController,
     UniversityCreate,
     UniversityUpdate,
 )
 from src.schemas.tables import UniversidadeInstituicao
-from src.database import SessionDep
+from src.database import AsyncSessionDep, SessionDep
+from src.models.login import AdminUser
 
 router = APIRouter()
 
 
 @router.get("/", response_model=list[dict[Literal['id','name','coord','matches'],str|UUID|int]])
-def list_universities(request : Request,response : Response,session: SessionDep):
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        universities = UniversityController.list_universities(token, session)
-        return universities
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+async def list_universities(admin : AdminUser, session: AsyncSessionDep):
+    universities = await UniversityController.list_universities(session)
+    return universities
 
 
 @router.get("/count")
-def get_count(request: Request, response : Response, session : SessionDep):
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        count = UniversityController.get_count(token, session)
-        return count
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+async def get_count(admin : AdminUser, session : AsyncSessionDep):
+    count = await UniversityController.get_count(session)
+    return count
 
 @router.get("/names")
 def get_universities_names(session : SessionDep):
@@ -54,14 +42,8 @@ def get_university(id_universidade_instituicao: UUID, session: SessionDep):
 
 
 @router.post("/", response_model=UniversidadeInstituicao)
-def create_university(data: UniversityCreate, request: Request, response: Response, session: SessionDep):
-    authorization = request.headers.get("authorization")
-    if authorization is not None:
-        token = authorization.split(" ")[1]
-        return UniversityController.create_university(token, data, session)
-    else:
-        response.status_code = HTTP_401_UNAUTHORIZED
-        raise HTTPException(status_code=HTTP_401_UNAUTHORIZED)
+def create_university(data: UniversityCreate, admin: AdminUser, session: SessionDep):
+    return UniversityController.create_university(data, session)
 
 
 @router.put("/{id_universidade_instituicao}", response_model=UniversidadeInstituicao)
@@ -1,4 +1,6 @@
-from fastapi import APIRouter
+from uuid import UUID
+from fastapi import APIRouter, BackgroundTasks, Request, Response, UploadFile
+from starlette.status import HTTP_202_ACCEPTED, HTTP_304_NOT_MODIFIED
 from src.controllers.user_controller import (
     UserController,
     UsuarioResponse,
@@ -6,6 +8,8 @@ from src.controllers.user_controller import (
     UsuarioUpdate,
 )
 from src.database import SessionDep
+from src.models.login import CurrentUser
+from src.services.foto_service import TAMANHO_MAXIMO_FOTO
 
 router = APIRouter()
 
@@ -38,3 +42,28 @@ def update_user(id_usuario: int, data: UsuarioUpdate, session: SessionDep):
 def delete_user(id_usuario: int, session: SessionDep):
     """Deletar um usuário"""
     return UserController.delete_user(id_usuario, session)
+
+
+@router.put("/me/foto", status_code=HTTP_202_ACCEPTED)
+def upload_foto(file: UploadFile, background_tasks: BackgroundTasks, identidade: CurrentUser, session: SessionDep):
+    """Enviar a foto de perfil; a miniatura é gerada em segundo plano"""
+    # Um byte a mais que o limite basta para recusar fotos grandes
+    dados = file.file.read(TAMANHO_MAXIMO_FOTO + 1)
+    return UserController.upload_foto(identidade, dados, background_tasks, session)
+
+
+@router.get("/{id_usuario}/foto")
+def get_foto(id_usuario: UUID, request: Request, session: SessionDep, v: str | None = None):
+    """Miniatura da foto de perfil, com ETag; na URL versionada (`v` = hash) fica em cache para sempre"""
+    foto = UserController.get_foto(id_usuario, session)
+    etag = f'"{foto.hash}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable" if v == foto.hash else "no-cache",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if etag in etags or "*" in etags:
+            return Response(status_code=HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=foto.miniatura, media_type=foto.tipo_conteudo, headers=headers)
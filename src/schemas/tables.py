@@ -1,6 +1,7 @@
 from datetime import date, datetime
 from typing import Literal
 from pydantic import EmailStr
+from sqlalchemy import Index, text
 from sqlmodel import ARRAY, Column, Field, Relationship, SQLModel, String, JSON
 import uuid
 
@@ -31,7 +32,7 @@ class UniversidadeInstituicao(SQLModel, table=True):
 class Administrador(SQLModel, table=True):
     id_administrador : uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     
-    id_usuario : uuid.UUID = Field(foreign_key="usuario.id_usuario")
+    id_usuario : uuid.UUID = Field(foreign_key="usuario.id_usuario", index=True)
     
     usuario : Usuario = Relationship(back_populates="administradores")
     
@@ -39,14 +40,22 @@ class Administrador(SQLModel, table=True):
 class Coordenador(SQLModel, table=True):
     id_coordenador : uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
 
-    id_usuario : uuid.UUID = Field(foreign_key="usuario.id_usuario")
-    id_universidade_instituicao : uuid.UUID = Field(foreign_key="universidade_instituicao.id_universidade_instituicao")
+    id_usuario : uuid.UUID = Field(foreign_key="usuario.id_usuario", index=True)
+    id_universidade_instituicao : uuid.UUID = Field(foreign_key="universidade_instituicao.id_universidade_instituicao", index=True)
     
     usuario : Usuario = Relationship(back_populates="coordenadores")
     universidade_instituicao : UniversidadeInstituicao = Relationship(back_populates="coordenadores")
 
     
 class Mentorada(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_mentorada_universidade", "id_universidade_instituicao", "conta_ativa"),
+        # Fila de aprovação do admin
+        Index("ix_mentorada_aguardando_aprovacao", "id_usuario", postgresql_where=text("NOT conta_ativa")),
+        # Sobreposição e contenção (&&, @>) nas listas de competências e hobbies
+        Index("ix_mentorada_competencias_interesse", "competencias_interesse", postgresql_using="gin"),
+        Index("ix_mentorada_hobbies", "hobbies", postgresql_using="gin"),
+    )
     id_mentorada : uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     foto_perfil : bytes | None = Field()
     linkedin : str | None = Field(max_length=100)
@@ -67,7 +76,11 @@ class Mentorada(SQLModel, table=True):
     hobbies : list[str] = Field(sa_column=Column(ARRAY(String)))
     competencias_interesse : list[str]  = Field(sa_column=Column(ARRAY(String)))
 
-    id_usuario : uuid.UUID = Field(foreign_key="usuario.id_usuario")
+    # Incrementada quando muda algo que afeta a pontuação do match, para
+    # invalidar o cache de pontuações (ver `MatchScoreCache`)
+    versao_perfil : int = Field(default=1)
+
+    id_usuario : uuid.UUID = Field(foreign_key="usuario.id_usuario", index=True)
     id_universidade_instituicao : uuid.UUID | None = Field(foreign_key="universidade_instituicao.id_universidade_instituicao")
     
     usuario : Usuario = Relationship(back_populates="mentoradas")
@@ -79,6 +92,14 @@ class Mentorada(SQLModel, table=True):
     
 
 class Mentora(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_mentora_universidade", "id_universidade_instituicao", "conta_ativa"),
+        # Fila de aprovação do admin
+        Index("ix_mentora_aguardando_aprovacao", "id_usuario", postgresql_where=text("NOT conta_ativa")),
+        # Sobreposição e contenção (&&, @>) nas listas de competências e hobbies
+        Index("ix_mentora_competencias", "competencias", postgresql_using="gin"),
+        Index("ix_mentora_hobbies", "hobbies", postgresql_using="gin"),
+    )
     id_mentora : uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     foto_perfil : bytes | None = Field()
     linkedin : str | None = Field(max_length=100)
@@ -103,8 +124,12 @@ class Mentora(SQLModel, table=True):
 
     # New hobby field to match with mentees
     hobbies : list[str] = Field(sa_column=Column(ARRAY(String)))
+
+    # Incrementada quando muda algo que afeta a pontuação do match, para
+    # invalidar o cache de pontuações (ver `MatchScoreCache`)
+    versao_perfil : int = Field(default=1)
     
-    id_usuario : uuid.UUID = Field(foreign_key="usuario.id_usuario")
+    id_usuario : uuid.UUID = Field(foreign_key="usuario.id_usuario", index=True)
     id_universidade_instituicao : uuid.UUID | None = Field(foreign_key="universidade_instituicao.id_universidade_instituicao")
     usuario : Usuario = Relationship(back_populates="mentoras")
     universidade_instituicao : UniversidadeInstituicao = Relationship(back_populates="mentoras")
@@ -114,6 +139,31 @@ class Mentora(SQLModel, table=True):
 
 class PedidosMentoria(SQLModel, table=True):
     __tablename__ : str = "pedidos_mentoria"
+    # Listagem de pendentes por (pontuacao, id) decrescente: paginação por chave
+    __table_args__ = (
+        Index(
+            "ix_pedidos_mentoria_pendentes",
+            "pontuacao",
+            "id_pedidos_mentoria",
+            postgresql_where=text("estado_pedido = 'pendente'"),
+        ),
+        # No máximo um pedido pendente por mentora e por mentorada
+        Index(
+            "ux_pedidos_mentoria_mentora_pendente",
+            "id_mentora",
+            unique=True,
+            postgresql_where=text("estado_pedido = 'pendente'"),
+        ),
+        Index(
+            "ux_pedidos_mentoria_mentorada_pendente",
+            "id_mentorada",
+            unique=True,
+            postgresql_where=text("estado_pedido = 'pendente'"),
+        ),
+        # Pedidos de uma mentora ou mentorada, por estado
+        Index("ix_pedidos_mentoria_mentora", "id_mentora", "estado_pedido"),
+        Index("ix_pedidos_mentoria_mentorada", "id_mentorada", "estado_pedido"),
+    )
     id_pedidos_mentoria : uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     estado_pedido : str = Field(max_length=10)
     data_pedido : datetime = Field(default_factory=datetime.now)
@@ -126,6 +176,25 @@ class PedidosMentoria(SQLModel, table=True):
 
     
 class Mentoria(SQLModel, table=True):
+    # No máximo uma mentoria ativa por mentora e por mentorada
+    __table_args__ = (
+        Index(
+            "ux_mentoria_mentora_ativa",
+            "id_mentora",
+            unique=True,
+            postgresql_where=text("estado_mentoria = 'ativa'"),
+        ),
+        Index(
+            "ux_mentoria_mentorada_ativa",
+            "id_mentorada",
+            unique=True,
+            postgresql_where=text("estado_mentoria = 'ativa'"),
+        ),
+        # Mentorias da mentora (e o par mentora/mentorada das mensagens e
+        # arquivos); as da mentorada, pelo ano e pelo começo mais recente
+        Index("ix_mentoria_mentora", "id_mentora", "id_mentorada"),
+        Index("ix_mentoria_mentorada", "id_mentorada", "ano_mentoria", "comeco_mentoria"),
+    )
     id_mentoria : uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     estado_mentoria : str = Field(max_length=20)
     avaliacao_mentora : str | None = Field(max_length=500)
@@ -165,7 +234,7 @@ class Encontro(SQLModel, table=True):
     progresso_mentorada : int = Field(gt=1, le=5)
     observacoes : str = Field(max_length=200)
     
-    id_mentoria : uuid.UUID = Field(foreign_key="mentoria.id_mentoria")
+    id_mentoria : uuid.UUID = Field(foreign_key="mentoria.id_mentoria", index=True)
     mentoria : Mentoria = Relationship(back_populates="encontros")
 
     
@@ -183,7 +252,7 @@ class MaterialMentoria(SQLModel, table=True):
     tipo_material : str = Field()
     titulo_material : str = Field()
     arquivo : bytes = Field()
-    id_mentoria : uuid.UUID = Field(foreign_key="mentoria.id_mentoria")
+    id_mentoria : uuid.UUID = Field(foreign_key="mentoria.id_mentoria", index=True)
     mentoria : Mentoria = Relationship(back_populates="materiais")
 
 class ArquivoTreinamento(SQLModel, table=True):
@@ -197,7 +266,7 @@ class MensagemMentoria(SQLModel, table=True):
     __tablename__ : str = "mensagem_mentoria" 
     id_mensagem : uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     mensagens : list[dict[Literal["actor","datetime","message"],str]] = Field(sa_column=Column(ARRAY(JSON)))
-    id_mentoria : uuid.UUID = Field(foreign_key="mentoria.id_mentoria")
+    id_mentoria : uuid.UUID = Field(foreign_key="mentoria.id_mentoria", index=True)
     mentoria : Mentoria = Relationship(back_populates="mensagens")    
 
 class ConviteCoordenador(SQLModel, table=True):
@@ -206,3 +275,60 @@ class ConviteCoordenador(SQLModel, table=True):
     email : EmailStr = Field(unique=True)
     senha_temporaria : str = Field(min_length=60, max_length=60)
     nome_instituicao : str = Field(max_length=100)
+
+class ExecucaoMatch(SQLModel, table=True):
+    __tablename__ : str = "execucao_match"
+    id_execucao_match : uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    estado : str = Field(max_length=20, default="pendente")
+    parametros : dict = Field(sa_column=Column(JSON))
+    criado_em : datetime = Field(default_factory=datetime.now)
+    iniciado_em : datetime | None = Field(default=None)
+    finalizado_em : datetime | None = Field(default=None)
+    # Atualizado a cada MATCH_HEARTBEAT_S enquanto a rodada roda; parado há
+    # mais de MATCH_JOB_TIMEOUT_S, a execução é considerada abandonada
+    heartbeat_em : datetime | None = Field(default=None)
+    total_mentoradas : int = Field(default=0)
+    mentoradas_processadas : int = Field(default=0)
+    pedidos_criados : int = Field(default=0)
+    resultado : dict | None = Field(default=None, sa_column=Column(JSON))
+    erro : str | None = Field(default=None)
+    # True enquanto a execução está pendente/executando e NULL depois: o unique
+    # garante no banco uma única rodada de match em andamento por vez
+    em_andamento : bool | None = Field(default=True, unique=True)
+
+    id_usuario : uuid.UUID = Field(foreign_key="usuario.id_usuario")
+
+class FotoPerfil(SQLModel, table=True):
+    # Miniatura da foto de perfil, gerada em segundo plano a partir de
+    # Mentora/Mentorada.foto_perfil. As listagens levam só a URL e o hash
+    __tablename__ : str = "foto_perfil"
+    id_usuario : uuid.UUID = Field(foreign_key="usuario.id_usuario", primary_key=True)
+    miniatura : bytes = Field()
+    hash : str = Field(max_length=64)
+    tipo_conteudo : str = Field(max_length=30)
+    atualizado_em : datetime = Field(default_factory=datetime.now)
+
+class TokenRevogado(SQLModel, table=True):
+    # Tokens encerrados (logout) antes do exp, pelo claim jti. Depois de
+    # `expira_em` o próprio token já não vale e a linha pode ser apagada
+    __tablename__ : str = "token_revogado"
+    jti : uuid.UUID = Field(primary_key=True)
+    id_usuario : uuid.UUID = Field(foreign_key="usuario.id_usuario", index=True)
+    expira_em : datetime = Field(index=True)
+    revogado_em : datetime = Field(default_factory=datetime.now, index=True)
+
+class UsuarioRevogado(SQLModel, table=True):
+    # Usuários removidos ou que perderam o perfil: todo token deles emitido
+    # (iat) antes de `revogado_em` deixa de valer. Sem FK: o usuário pode já
+    # ter sido apagado. Depois de `expira_em` esses tokens já expiraram
+    __tablename__ : str = "usuario_revogado"
+    id_usuario : uuid.UUID = Field(primary_key=True)
+    revogado_em : datetime = Field(default_factory=datetime.now, index=True)
+    expira_em : datetime = Field(index=True)
+
+class VersaoSchema(SQLModel, table=True):
+    # Migrações de `src/migrations` já aplicadas neste banco
+    __tablename__ : str = "versao_schema"
+    versao : int = Field(primary_key=True)
+    descricao : str = Field(max_length=200)
+    aplicada_em : datetime = Field(default_factory=datetime.now)
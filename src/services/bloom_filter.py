@@ -0,0 +1,37 @@
+import hashlib
+import math
+import threading
+
+
+class BloomFilter:
+    """
+    Conjunto probabilístico: `in` nunca dá falso negativo e dá falso
+    positivo com chance perto de `taxa_falsos_positivos` enquanto tiver
+    até `capacidade` itens. Seguro entre threads.
+    """
+
+    def __init__(self, capacidade: int, taxa_falsos_positivos: float = 0.01):
+        capacidade = max(capacidade, 1)
+        self.tamanho_bits = max(8, math.ceil(-capacidade * math.log(taxa_falsos_positivos) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.tamanho_bits / capacidade * math.log(2)))
+        self._bits = bytearray((self.tamanho_bits + 7) // 8)
+        self._lock = threading.Lock()
+        self.itens = 0
+
+    def _posicoes(self, item: str):
+        # Double hashing: k posições a partir de dois hashes de 64 bits
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.tamanho_bits
+
+    def add(self, item: str):
+        posicoes = list(self._posicoes(item))
+        with self._lock:
+            for posicao in posicoes:
+                self._bits[posicao >> 3] |= 1 << (posicao & 7)
+            self.itens += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[posicao >> 3] & (1 << (posicao & 7)) for posicao in self._posicoes(item))
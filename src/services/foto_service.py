@@ -0,0 +1,112 @@
+import hashlib
+from datetime import datetime
+from io import BytesIO
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlmodel import Session, select
+
+from src.database import engine
+from src.schemas.tables import FotoPerfil, Mentora, Mentorada
+
+# Lado da miniatura quadrada, em pixels
+TAMANHO_MINIATURA = 256
+TIPO_MINIATURA = "image/webp"
+# Maior foto aceita no upload
+TAMANHO_MAXIMO_FOTO = 5 * 1024 * 1024
+
+
+def url_foto(id_usuario: UUID, hash: str | None) -> str | None:
+    """URL da miniatura; muda junto com o hash, então pode ficar em cache para sempre."""
+    if hash is None:
+        return None
+    return f"/users/{id_usuario}/foto?v={hash}"
+
+
+class FotoService:
+    """
+    Fotos de perfil: o original fica no perfil (`foto_perfil`) e a miniatura
+    quadrada em `FotoPerfil`, gerada fora da requisição do upload. O hash da
+    miniatura é o ETag e a versão da URL.
+    """
+
+    @staticmethod
+    def validar(dados: bytes):
+        if len(dados) > TAMANHO_MAXIMO_FOTO:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Foto maior que 5 MB",
+            )
+        # verify() lê só o cabeçalho: a decodificação fica para o segundo plano
+        try:
+            with Image.open(BytesIO(dados)) as imagem:
+                imagem.verify()
+        except (UnidentifiedImageError, OSError, SyntaxError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Arquivo não é uma imagem"
+            )
+
+    @staticmethod
+    def gerar_miniatura(dados: bytes) -> bytes:
+        with Image.open(BytesIO(dados)) as imagem:
+            imagem.draft("RGB", (TAMANHO_MINIATURA, TAMANHO_MINIATURA))
+            imagem = ImageOps.exif_transpose(imagem).convert("RGB")
+            miniatura = ImageOps.fit(imagem, (TAMANHO_MINIATURA, TAMANHO_MINIATURA), Image.Resampling.LANCZOS)
+        saida = BytesIO()
+        miniatura.save(saida, format="WEBP", quality=80, method=4)
+        return saida.getvalue()
+
+    @staticmethod
+    def processar(id_usuario: UUID):
+        """
+        Gera a miniatura da foto atual do perfil do usuário. Roda como
+        BackgroundTask, com sessão própria. Lê a foto do banco em vez de
+        recebê-la, para que uploads seguidos terminem sempre na última.
+        """
+        with Session(engine) as session:
+            perfil = session.exec(select(Mentora).where(Mentora.id_usuario == id_usuario)).first() \
+                or session.exec(select(Mentorada).where(Mentorada.id_usuario == id_usuario)).first()
+            foto = session.get(FotoPerfil, id_usuario)
+            if perfil is None or perfil.foto_perfil is None:
+                if foto is not None:
+                    session.delete(foto)
+                    session.commit()
+                return
+            try:
+                miniatura = FotoService.gerar_miniatura(perfil.foto_perfil)
+            except (UnidentifiedImageError, OSError, ValueError) as e:
+                print(e)
+                return
+            if foto is None:
+                foto = FotoPerfil(id_usuario=id_usuario, miniatura=b"", hash="", tipo_conteudo=TIPO_MINIATURA)
+            foto.miniatura = miniatura
+            foto.hash = hashlib.sha256(miniatura).hexdigest()
+            foto.tipo_conteudo = TIPO_MINIATURA
+            foto.atualizado_em = datetime.now()
+            session.add(foto)
+            session.commit()
+
+    @staticmethod
+    def processar_pendentes() -> int:
+        """Gera as miniaturas que faltam (fotos enviadas antes da miniatura existir)."""
+        with Session(engine) as session:
+            ids = [
+                *session.exec(
+                    select(Mentora.id_usuario)
+                    .outerjoin(FotoPerfil, FotoPerfil.id_usuario == Mentora.id_usuario)
+                    .where(Mentora.foto_perfil != None, FotoPerfil.id_usuario == None)
+                ).all(),
+                *session.exec(
+                    select(Mentorada.id_usuario)
+                    .outerjoin(FotoPerfil, FotoPerfil.id_usuario == Mentorada.id_usuario)
+                    .where(Mentorada.foto_perfil != None, FotoPerfil.id_usuario == None)
+                ).all(),
+            ]
+        for id_usuario in ids:
+            FotoService.processar(id_usuario)
+        return len(ids)
+
+
+if __name__ == "__main__":
+    print(f"{FotoService.processar_pendentes()} miniaturas geradas")
@@ -0,0 +1,83 @@
+import os
+import dotenv
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+dotenv.load_dotenv()
+
+# Arestas (melhores mentoras) guardadas por mentorada no modo optimal; 0, o
+# padrão, é sem limite e dá o ótimo exato. Um limite reduz a memória e o
+# tempo do emparelhamento a ~mentoradas x este valor, mas o resultado deixa
+# de ser exato quando todas as melhores mentoras de uma mentorada ficam com
+# outras
+MATCH_OPTIMAL_ARESTAS = int(os.getenv("MATCH_OPTIMAL_ARESTAS", 0)) or None
+
+
+def _poda_por_mentora(
+    mentoradas: np.ndarray,
+    mentoras: np.ndarray,
+    pesos: np.ndarray,
+    limite: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Mantém só as `limite` melhores arestas de cada mentora.
+
+    Com `limite` igual ao total de mentoras a poda não muda o ótimo: se uma
+    mentora ficasse com alguém fora das suas `limite` melhores, pelo menos
+    uma delas estaria livre (só existem `limite - 1` outras mentoras) e a
+    troca não diminuiria o peso total.
+    """
+    ordem = np.lexsort((-pesos, mentoras))
+    mentoradas, mentoras, pesos = mentoradas[ordem], mentoras[ordem], pesos[ordem]
+    inicio_grupo = np.r_[0, np.flatnonzero(np.diff(mentoras)) + 1]
+    tamanho_grupo = np.diff(np.r_[inicio_grupo, len(mentoras)])
+    posicao_no_grupo = np.arange(len(mentoras)) - np.repeat(inicio_grupo, tamanho_grupo)
+    manter = posicao_no_grupo < limite
+    return mentoradas[manter], mentoras[manter], pesos[manter]
+
+
+def optimal_assignment(
+    total_mentoradas: int,
+    total_mentoras: int,
+    mentoradas: np.ndarray,
+    mentoras: np.ndarray,
+    pesos: np.ndarray,
+) -> list[tuple[int, int]]:
+    """
+    Emparelhamento bipartido de peso máximo sobre as arestas informadas
+    (mentorada, mentora, peso > 0), sem exigir que todo mundo seja emparelhado.
+
+    Vira um emparelhamento completo de custo mínimo do lado das mentoras:
+    cada mentora ganha uma mentorada fictícia exclusiva com custo `C` e as
+    arestas reais custam `C - peso`, então ficar sem par nunca é melhor do
+    que uma aresta real e o custo mínimo corresponde ao peso máximo.
+    Devolve pares (mentorada, mentora) ordenados pela mentorada.
+    """
+    if len(pesos) == 0:
+        return []
+    mentoradas, mentoras, pesos = _poda_por_mentora(
+        np.asarray(mentoradas, dtype=np.int64),
+        np.asarray(mentoras, dtype=np.int64),
+        np.asarray(pesos, dtype=np.int64),
+        total_mentoras,
+    )
+    custo_sem_par = int(pesos.max()) + 1
+    linhas = np.concatenate([mentoras, np.arange(total_mentoras)])
+    colunas = np.concatenate([mentoradas, total_mentoradas + np.arange(total_mentoras)])
+    custos = np.concatenate([
+        custo_sem_par - pesos,
+        np.full(total_mentoras, custo_sem_par, dtype=np.int64),
+    ]).astype(np.float64)
+    grafo = csr_matrix(
+        (custos, (linhas, colunas)),
+        shape=(total_mentoras, total_mentoradas + total_mentoras),
+    )
+    _, coluna_da_mentora = min_weight_full_bipartite_matching(grafo)
+    pares = [
+        (int(coluna), mentora)
+        for mentora, coluna in enumerate(coluna_da_mentora)
+        if coluna < total_mentoradas
+    ]
+    pares.sort()
+    return pares
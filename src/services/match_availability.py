@@ -0,0 +1,43 @@
+from uuid import UUID
+from sqlalchemy import union_all
+from sqlmodel import Session, select
+from src.schemas.tables import Mentoria, PedidosMentoria
+
+
+class MatchAvailability:
+    """
+    Índice em memória de quem já está ocupada numa rodada de match.
+
+    Uma mentora/mentorada está ocupada quando tem uma mentoria ativa ou um
+    pedido pendente. O índice é carregado com uma única consulta no começo
+    da rodada e atualizado com `reservar` a cada pedido criado.
+    """
+
+    def __init__(self, mentoras_ocupadas: set[UUID], mentoradas_ocupadas: set[UUID]):
+        self.mentoras_ocupadas = mentoras_ocupadas
+        self.mentoradas_ocupadas = mentoradas_ocupadas
+
+    @classmethod
+    def load(cls, session: Session) -> "MatchAvailability":
+        statement = union_all(
+            select(Mentoria.id_mentora, Mentoria.id_mentorada)
+            .where(Mentoria.estado_mentoria == "ativa"),
+            select(PedidosMentoria.id_mentora, PedidosMentoria.id_mentorada)
+            .where(PedidosMentoria.estado_pedido == "pendente"),
+        )
+        mentoras: set[UUID] = set()
+        mentoradas: set[UUID] = set()
+        for id_mentora, id_mentorada in session.execute(statement):
+            mentoras.add(id_mentora)
+            mentoradas.add(id_mentorada)
+        return cls(mentoras, mentoradas)
+
+    def mentora_livre(self, id_mentora: UUID) -> bool:
+        return id_mentora not in self.mentoras_ocupadas
+
+    def mentorada_livre(self, id_mentorada: UUID) -> bool:
+        return id_mentorada not in self.mentoradas_ocupadas
+
+    def reservar(self, id_mentora: UUID, id_mentorada: UUID):
+        self.mentoras_ocupadas.add(id_mentora)
+        self.mentoradas_ocupadas.add(id_mentorada)
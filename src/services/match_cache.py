@@ -0,0 +1,195 @@
+import threading
+from typing import Iterable, Sequence
+from uuid import UUID
+import numpy as np
+from src.schemas.tables import Mentora, Mentorada
+from src.services.match_index import MentorTermIndex, mentor_index
+from src.services.match_scoring import MatchScoringEngine, RankingContext, rank_mentoradas
+
+# Campos que mudam a pontuação de um par: alterar algum deles invalida o perfil
+CAMPOS_MATCH_MENTORA = {"competencias", "hobbies"}
+CAMPOS_MATCH_MENTORADA = {"competencias_interesse", "hobbies", "curso"}
+
+
+def invalidar_perfil(perfil: Mentora | Mentorada):
+    """Marca o perfil para ser repontuado na próxima rodada de match."""
+    perfil.versao_perfil = type(perfil).versao_perfil + 1
+
+
+def invalidar_se_alterou(perfil: Mentora | Mentorada, campos: Iterable[str]):
+    relevantes = CAMPOS_MATCH_MENTORA if isinstance(perfil, Mentora) else CAMPOS_MATCH_MENTORADA
+    if relevantes.intersection(campos):
+        invalidar_perfil(perfil)
+
+
+def _contexto_completo(mentoras: Sequence, indice: MentorTermIndex) -> RankingContext:
+    """Contexto que pontua contra todas as mentoras, livres ou não."""
+    return RankingContext(
+        MatchScoringEngine(
+            [mentora.competencias for mentora in mentoras],
+            [mentora.hobbies for mentora in mentoras],
+        ),
+        *indice.postings({mentora.id_mentora: j for j, mentora in enumerate(mentoras)}),
+        np.ones(len(mentoras), dtype=bool),
+        np.zeros(len(mentoras), dtype=np.int64),
+        False,
+    )
+
+
+def _perfis(mentoradas: Sequence) -> list:
+    return [(m.competencias_interesse, m.hobbies, m.curso, 0) for m in mentoradas]
+
+
+class MatchScoreCache:
+    """
+    Pontuações mentorada x mentora da última rodada, por versão de perfil.
+
+    Cada perfil tem `versao_perfil` no banco, incrementada por qualquer
+    alteração que mude a pontuação. O cache guarda, por mentorada, os pares
+    com pontuação > 0 (coluna da mentora, pontuação) e a versão com que cada
+    mentorada e cada mentora foram pontuadas. Numa nova rodada só são
+    repontuadas as linhas das mentoradas alteradas contra todas as mentoras e
+    as colunas das mentoras alteradas contra as demais mentoradas:
+    O(alterações x outro lado) em vez de O(N x M).
+
+    As pontuações ficam em memória, como o `mentor_index`: ler milhões de
+    pares do banco custa mais do que recalculá-los com o NumPy. Só as versões
+    são persistidas, para que a invalidação feita por qualquer worker chegue
+    ao worker que roda o match. Um worker novo começa com o cache vazio.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._colunas: dict[UUID, int] = {}
+        self._versoes_mentoras: dict[UUID, int] = {}
+        self._total_colunas = 0
+        self._linhas: dict[UUID, tuple[int, np.ndarray, np.ndarray]] = {}
+
+    def _limpar(self):
+        self._colunas.clear()
+        self._versoes_mentoras.clear()
+        self._total_colunas = 0
+        self._linhas.clear()
+
+    def clear(self):
+        with self._lock:
+            self._limpar()
+
+    def _coluna(self, id_mentora: UUID) -> int:
+        coluna = self._colunas.get(id_mentora)
+        if coluna is None:
+            coluna = self._total_colunas
+            self._colunas[id_mentora] = coluna
+            self._total_colunas += 1
+        return coluna
+
+    def atualizar(self, mentoradas: Sequence, mentoras: Sequence) -> dict[str, int]:
+        """
+        Sincroniza o cache com as mentoradas e mentoras da rodada (linhas
+        com ids, termos e `versao_perfil`). Quem não está na rodada sai do
+        cache. Devolve quantas mentoradas e mentoras foram repontuadas.
+        """
+        with self._lock:
+            # Colunas de mentoras que saíram não são reaproveitadas: se
+            # sobrarem muitas, recomeça do zero
+            if self._total_colunas > 2 * len(mentoras) + 1024:
+                self._limpar()
+
+            ids_mentoras = {mentora.id_mentora for mentora in mentoras}
+            removidas = [m for m in self._versoes_mentoras if m not in ids_mentoras]
+            mentoras_sujas = [
+                mentora for mentora in mentoras
+                if self._versoes_mentoras.get(mentora.id_mentora) != mentora.versao_perfil
+            ]
+            invalidas = [
+                self._colunas[id_mentora]
+                for id_mentora in removidas + [mentora.id_mentora for mentora in mentoras_sujas]
+                if id_mentora in self._colunas
+            ]
+            for id_mentora in removidas:
+                del self._colunas[id_mentora]
+                del self._versoes_mentoras[id_mentora]
+            colunas = np.array([self._coluna(mentora.id_mentora) for mentora in mentoras], dtype=np.int64)
+
+            ids_mentoradas = {mentorada.id_mentorada for mentorada in mentoradas}
+            for id_mentorada in self._linhas.keys() - ids_mentoradas:
+                del self._linhas[id_mentorada]
+            mentoradas_sujas: list = []
+            mentoradas_limpas: list = []
+            for mentorada in mentoradas:
+                linha = self._linhas.get(mentorada.id_mentorada)
+                if linha is None or linha[0] != mentorada.versao_perfil:
+                    mentoradas_sujas.append(mentorada)
+                else:
+                    mentoradas_limpas.append(mentorada)
+
+            # Colunas: mentoradas sem alteração x mentoras alteradas
+            if mentoradas_limpas and (invalidas or mentoras_sujas):
+                coluna_invalida = np.zeros(self._total_colunas, dtype=bool)
+                coluna_invalida[invalidas] = True
+                vazio = np.empty(0, dtype=np.int64)
+                novas = [(vazio, vazio)] * len(mentoradas_limpas)
+                if mentoras_sujas:
+                    indice = MentorTermIndex()
+                    indice.sync(mentoras_sujas)
+                    colunas_sujas = np.array(
+                        [self._colunas[mentora.id_mentora] for mentora in mentoras_sujas], dtype=np.int64
+                    )
+                    novas = [
+                        (colunas_sujas[candidatas], scores)
+                        for candidatas, scores in rank_mentoradas(
+                            _contexto_completo(mentoras_sujas, indice), _perfis(mentoradas_limpas)
+                        )
+                    ]
+                for mentorada, (novas_colunas, novos_scores) in zip(mentoradas_limpas, novas):
+                    versao, colunas_linha, scores_linha = self._linhas[mentorada.id_mentorada]
+                    manter = ~coluna_invalida[colunas_linha]
+                    self._linhas[mentorada.id_mentorada] = (
+                        versao,
+                        np.concatenate([colunas_linha[manter], novas_colunas]),
+                        np.concatenate([scores_linha[manter], novos_scores]),
+                    )
+
+            # Linhas: mentoradas alteradas x todas as mentoras
+            if mentoradas_sujas:
+                mentor_index.sync(mentoras)
+                ranking = rank_mentoradas(_contexto_completo(mentoras, mentor_index), _perfis(mentoradas_sujas))
+                for mentorada, (candidatas, scores) in zip(mentoradas_sujas, ranking):
+                    self._linhas[mentorada.id_mentorada] = (mentorada.versao_perfil, colunas[candidatas], scores)
+
+            for mentora in mentoras_sujas:
+                self._versoes_mentoras[mentora.id_mentora] = mentora.versao_perfil
+            return {"mentoradas": len(mentoradas_sujas), "mentoras": len(mentoras_sujas)}
+
+    def ranking(
+        self,
+        mentoradas: Sequence,
+        mentoras: Sequence,
+        permitidas: np.ndarray,
+        universidades_mentoras: np.ndarray,
+        universidades_mentoradas: np.ndarray,
+        same_university: bool,
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        No formato de `rank_perfis`: para cada mentorada, as mentoras
+        `permitidas` com pontuação > 0 (posições em `mentoras`), por pontuação
+        decrescente e, no empate, pela posição. Chamar depois de `atualizar`
+        com as mesmas mentoradas e mentoras.
+        """
+        with self._lock:
+            posicao = np.full(self._total_colunas, -1, dtype=np.int64)
+            posicao[[self._colunas[mentora.id_mentora] for mentora in mentoras]] = np.arange(len(mentoras))
+            resultado: list[tuple[np.ndarray, np.ndarray]] = []
+            for i, mentorada in enumerate(mentoradas):
+                _, colunas, scores = self._linhas[mentorada.id_mentorada]
+                candidatas = posicao[colunas]
+                manter = permitidas[candidatas]
+                if same_university:
+                    manter &= universidades_mentoras[candidatas] == universidades_mentoradas[i]
+                candidatas, scores = candidatas[manter], scores[manter]
+                ordem = np.lexsort((candidatas, -scores))
+                resultado.append((candidatas[ordem], scores[ordem]))
+            return resultado
+
+
+match_score_cache = MatchScoreCache()
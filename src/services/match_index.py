@@ -0,0 +1,109 @@
+import threading
+from typing import Iterable
+from uuid import UUID
+import numpy as np
+
+
+class MentorTermIndex:
+    """
+    Índice invertido em memória de termo -> mentoras ativas.
+
+    Competências e hobbies ficam em índices separados porque pontuam de
+    forma diferente; o curso da mentorada é procurado nas competências, como
+    em `MatchController._score_match`. Uma mentora fora de `candidatas` não
+    compartilha nenhum termo com a mentorada e portanto tem pontuação 0.
+
+    O índice é atualizado incrementalmente na aprovação de mentoras e
+    reconciliado com `sync` no começo de cada rodada de match, já que cada
+    worker tem a sua cópia.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._competencias: dict[str, set[UUID]] = {}
+        self._hobbies: dict[str, set[UUID]] = {}
+        self._termos: dict[UUID, tuple[tuple[str, ...], tuple[str, ...]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._termos)
+
+    def _remove(self, id_mentora: UUID):
+        termos = self._termos.pop(id_mentora, None)
+        if termos is None:
+            return
+        for indice, lista in ((self._competencias, termos[0]), (self._hobbies, termos[1])):
+            for termo in lista:
+                mentoras = indice.get(termo)
+                if mentoras is None:
+                    continue
+                mentoras.discard(id_mentora)
+                if not mentoras:
+                    del indice[termo]
+
+    def _add(self, id_mentora: UUID, termos: tuple[tuple[str, ...], tuple[str, ...]]):
+        self._remove(id_mentora)
+        self._termos[id_mentora] = termos
+        for termo in termos[0]:
+            self._competencias.setdefault(termo, set()).add(id_mentora)
+        for termo in termos[1]:
+            self._hobbies.setdefault(termo, set()).add(id_mentora)
+
+    def add(self, id_mentora: UUID, competencias: list[str] | None, hobbies: list[str] | None):
+        with self._lock:
+            self._add(id_mentora, (tuple(competencias or ()), tuple(hobbies or ())))
+
+    def discard(self, id_mentora: UUID):
+        with self._lock:
+            self._remove(id_mentora)
+
+    def sync(self, mentoras: Iterable):
+        """
+        Reconcilia o índice com as mentoras ativas carregadas na rodada
+        (linhas com `id_mentora`, `competencias` e `hobbies`). Só as mentoras
+        novas, removidas ou com termos alterados são reindexadas.
+        """
+        with self._lock:
+            vistas: set[UUID] = set()
+            for mentora in mentoras:
+                vistas.add(mentora.id_mentora)
+                termos = (tuple(mentora.competencias or ()), tuple(mentora.hobbies or ()))
+                if self._termos.get(mentora.id_mentora) != termos:
+                    self._add(mentora.id_mentora, termos)
+            for id_mentora in self._termos.keys() - vistas:
+                self._remove(id_mentora)
+
+    def candidatas(
+        self,
+        competencias: list[str] | None,
+        hobbies: list[str] | None,
+        curso: str | None,
+    ) -> set[UUID]:
+        """Mentoras que compartilham pelo menos um termo com a mentorada."""
+        resultado: set[UUID] = set()
+        with self._lock:
+            for termo in competencias or ():
+                resultado.update(self._competencias.get(termo, ()))
+            for termo in hobbies or ():
+                resultado.update(self._hobbies.get(termo, ()))
+            if curso is not None:
+                resultado.update(self._competencias.get(curso, ()))
+        return resultado
+
+    def postings(self, posicoes: dict[UUID, int]) -> tuple[dict[str, np.ndarray], dict[str, np.ndarray]]:
+        """
+        Cópia compacta do índice (termo -> posições ordenadas das mentoras em
+        `posicoes`), para ser enviada aos processos que pontuam as mentoradas.
+        """
+        def converter(indice: dict[str, set[UUID]]) -> dict[str, np.ndarray]:
+            resultado: dict[str, np.ndarray] = {}
+            for termo, mentoras in indice.items():
+                lista = sorted(posicoes[m] for m in mentoras if m in posicoes)
+                if lista:
+                    resultado[termo] = np.array(lista, dtype=np.int64)
+            return resultado
+
+        with self._lock:
+            return converter(self._competencias), converter(self._hobbies)
+
+
+mentor_index = MentorTermIndex()
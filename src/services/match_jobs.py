@@ -0,0 +1,251 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from time import monotonic
+from typing import Any, Callable, Generator, TypeVar
+from uuid import UUID
+
+import dotenv
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from src.database import engine
+from src.schemas.tables import ExecucaoMatch
+
+dotenv.load_dotenv()
+
+logger = logging.getLogger("src.match")
+
+# Intervalo (s) entre os batimentos que a execução em andamento grava no banco
+MATCH_HEARTBEAT_S = float(os.getenv("MATCH_HEARTBEAT_S", 15))
+# Execução em andamento sem batimento há mais tempo do que isso é considerada
+# abandonada (por exemplo, o worker que a executava foi reiniciado) e libera
+# a vez. Precisa ser bem maior que MATCH_HEARTBEAT_S
+MATCH_JOB_TIMEOUT = timedelta(seconds=float(os.getenv("MATCH_JOB_TIMEOUT_S", 120)))
+# Intervalo mínimo entre gravações de progresso no banco
+PROGRESS_INTERVAL_S = 0.5
+
+Progresso = Callable[[int, int, int], None]
+T = TypeVar("T")
+
+
+class MatchJobService:
+    """
+    Executa rodadas de match em segundo plano, uma por vez.
+
+    O executor tem um único worker e a coluna única `em_andamento` de
+    `ExecucaoMatch` impede que outro worker do uvicorn comece uma segunda
+    rodada: quem chega enquanto uma execução está em andamento recebe essa
+    mesma execução em vez de uma nova. Rodadas em streaming (`iniciar` +
+    `executar`) passam pela mesma trava.
+    """
+
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="match-job")
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _em_andamento(session: Session) -> ExecucaoMatch | None:
+        return session.exec(
+            select(ExecucaoMatch).where(ExecucaoMatch.em_andamento == True)
+        ).one_or_none()
+
+    @staticmethod
+    def _abandonada(execucao: ExecucaoMatch) -> bool:
+        ultimo_sinal = execucao.heartbeat_em or execucao.iniciado_em or execucao.criado_em
+        return datetime.now() - ultimo_sinal >= MATCH_JOB_TIMEOUT
+
+    @staticmethod
+    @contextmanager
+    def _pulsar(id_execucao: UUID):
+        """
+        Grava `heartbeat_em` a cada MATCH_HEARTBEAT_S numa thread própria,
+        enquanto o bloco roda: fases longas sem progresso (cache, commit) ou
+        um cliente de stream lento não fazem a execução parecer abandonada.
+        """
+        parar = threading.Event()
+
+        def pulsar():
+            while not parar.wait(MATCH_HEARTBEAT_S):
+                try:
+                    with Session(engine) as session:
+                        session.exec(
+                            update(ExecucaoMatch)
+                            .where(ExecucaoMatch.id_execucao_match == id_execucao)
+                            .values(heartbeat_em=datetime.now())
+                        )
+                        session.commit()
+                except Exception as e:
+                    # Um batimento perdido não derruba a rodada; o próximo tenta de novo
+                    logger.warning("Heartbeat da execução %s falhou: %s", id_execucao, e)
+
+        thread = threading.Thread(target=pulsar, name="match-heartbeat", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            parar.set()
+            thread.join()
+
+    @staticmethod
+    def _finalizar(execucao: ExecucaoMatch, estado: str):
+        execucao.estado = estado
+        execucao.finalizado_em = datetime.now()
+        execucao.em_andamento = None
+
+    @staticmethod
+    def _criar(
+        id_usuario: UUID,
+        parametros: dict[str, Any],
+        session: Session,
+    ) -> tuple[ExecucaoMatch, bool]:
+        """Cria uma execução, ou devolve a que está em andamento (e False)."""
+        atual = MatchJobService._em_andamento(session)
+        if atual is not None:
+            if not MatchJobService._abandonada(atual):
+                return atual, False
+            atual.erro = "Execução abandonada"
+            MatchJobService._finalizar(atual, "erro")
+            session.add(atual)
+            session.commit()
+
+        execucao = ExecucaoMatch(parametros=parametros, id_usuario=id_usuario)
+        session.add(execucao)
+        try:
+            session.commit()
+        except IntegrityError:
+            # Outro worker criou uma execução entre a consulta e o insert
+            session.rollback()
+            atual = MatchJobService._em_andamento(session)
+            if atual is None:
+                raise
+            return atual, False
+        session.refresh(execucao)
+        return execucao, True
+
+    @staticmethod
+    def submit(
+        id_usuario: UUID,
+        parametros: dict[str, Any],
+        executar: Callable[[Session, Progresso], Generator[Any, None, Any]],
+        session: Session,
+    ) -> ExecucaoMatch:
+        with MatchJobService._lock:
+            execucao, nova = MatchJobService._criar(id_usuario, parametros, session)
+            if nova:
+                MatchJobService._executor.submit(
+                    MatchJobService._run, execucao.id_execucao_match, executar
+                )
+            return execucao
+
+    @staticmethod
+    def _conflito() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Já existe uma rodada de match em andamento",
+        )
+
+    @staticmethod
+    def verificar_livre(session: Session):
+        """
+        Falha com 409 se já houver uma rodada em andamento. Só adianta o
+        erro para a resposta HTTP: quem garante a vez é `iniciar`.
+        """
+        atual = MatchJobService._em_andamento(session)
+        if atual is not None and not MatchJobService._abandonada(atual):
+            raise MatchJobService._conflito()
+
+    @staticmethod
+    def iniciar(id_usuario: UUID, parametros: dict[str, Any]) -> ExecucaoMatch:
+        """
+        Cria uma execução para rodar na própria requisição (com `executar`).
+        Falha com 409 se já houver uma rodada em andamento. Quem chama
+        precisa garantir `abandonar` se `executar` não chegar a rodar.
+        """
+        with MatchJobService._lock, Session(engine) as session:
+            execucao, nova = MatchJobService._criar(id_usuario, parametros, session)
+        if not nova:
+            raise MatchJobService._conflito()
+        return execucao
+
+    @staticmethod
+    def abandonar(id_execucao: UUID):
+        """Finaliza com erro a execução que ainda estiver em andamento."""
+        with Session(engine) as session:
+            execucao = session.get(ExecucaoMatch, id_execucao)
+            if execucao is None or not execucao.em_andamento:
+                return
+            execucao.erro = "Execução interrompida"
+            MatchJobService._finalizar(execucao, "erro")
+            session.commit()
+
+    @staticmethod
+    def executar(
+        id_execucao: UUID,
+        executar: Callable[[Session, Progresso], Generator[T, None, Any]],
+    ) -> Generator[T, None, Any]:
+        """
+        Roda `executar` registrando estado e progresso na execução. Repassa
+        os itens gerados e devolve o resultado final; erros são registrados
+        e propagados.
+        """
+        with Session(engine) as controle:
+            execucao = controle.get(ExecucaoMatch, id_execucao)
+            if execucao is None:
+                return None
+            execucao.estado = "executando"
+            execucao.iniciado_em = execucao.heartbeat_em = datetime.now()
+            controle.commit()
+
+            ultima_gravacao = 0.0
+
+            def progresso(processadas: int, total: int, pedidos: int):
+                nonlocal ultima_gravacao
+                execucao.mentoradas_processadas = processadas
+                execucao.total_mentoradas = total
+                execucao.pedidos_criados = pedidos
+                if monotonic() - ultima_gravacao >= PROGRESS_INTERVAL_S or processadas == total:
+                    controle.commit()
+                    ultima_gravacao = monotonic()
+
+            try:
+                with MatchJobService._pulsar(id_execucao), Session(engine) as session:
+                    resultado = yield from executar(session, progresso)
+                execucao.resultado = resultado.model_dump()
+                execucao.pedidos_criados = resultado.pedidos_criados
+                MatchJobService._finalizar(execucao, "concluida")
+                return resultado
+            except HTTPException as e:
+                execucao.erro = str(e.detail)
+                MatchJobService._finalizar(execucao, "erro")
+                raise
+            except GeneratorExit:
+                # Quem consumia a rodada desistiu (ex.: o cliente do stream
+                # desconectou); a transação dos pedidos já foi desfeita
+                execucao.erro = "Execução interrompida"
+                MatchJobService._finalizar(execucao, "erro")
+                raise
+            except Exception:
+                logger.exception("Rodada de match %s falhou", id_execucao)
+                execucao.erro = "Erro inesperado na rodada de match"
+                MatchJobService._finalizar(execucao, "erro")
+                raise
+            finally:
+                controle.commit()
+
+    @staticmethod
+    def _run(id_execucao: UUID, executar: Callable[[Session, Progresso], Generator[Any, None, Any]]):
+        try:
+            for _ in MatchJobService.executar(id_execucao, executar):
+                pass
+        except Exception:
+            # Já registrado na execução
+            pass
+
+    @staticmethod
+    def get(id_execucao: UUID, session: Session) -> ExecucaoMatch | None:
+        return session.get(ExecucaoMatch, id_execucao)
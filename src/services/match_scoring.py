@@ -0,0 +1,254 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+from typing import Iterator, Sequence
+import dotenv
+import numpy as np
+
+dotenv.load_dotenv()
+
+PESO_COMPETENCIA = 5
+PESO_HOBBY = 1
+PESO_CURSO = 3
+
+# Processos usados para pontuar as mentoradas numa rodada de match
+MATCH_WORKERS = int(os.getenv("MATCH_WORKERS", os.cpu_count() or 1))
+# Mentoradas por tarefa enviada a cada processo
+MATCH_CHUNK_SIZE = int(os.getenv("MATCH_CHUNK_SIZE", 512))
+
+# Perfil compacto de uma mentorada: (competencias, hobbies, curso, código da universidade)
+PerfilMentorada = tuple[list[str] | None, list[str] | None, str | None, int]
+
+
+def _vocabulario(listas: Sequence[list[str] | None]) -> dict[str, int]:
+    vocabulario: dict[str, int] = {}
+    for termos in listas:
+        for termo in termos or []:
+            vocabulario.setdefault(termo, len(vocabulario))
+    return vocabulario
+
+
+def _pertinencia(listas: Sequence[list[str] | None], vocabulario: dict[str, int]) -> np.ndarray:
+    matriz = np.zeros((len(listas), len(vocabulario)), dtype=np.int32)
+    for i, termos in enumerate(listas):
+        for termo in termos or []:
+            matriz[i, vocabulario[termo]] = 1
+    return matriz
+
+
+def _contagem(listas: Sequence[list[str] | None], vocabulario: dict[str, int]) -> np.ndarray:
+    matriz = np.zeros((len(listas), len(vocabulario)), dtype=np.int32)
+    for i, termos in enumerate(listas):
+        for termo in termos or []:
+            j = vocabulario.get(termo)
+            if j is not None:
+                matriz[i, j] += 1
+    return matriz
+
+
+class MatchScoringEngine:
+    """
+    Calcula a matriz mentorada x mentora com as mesmas regras de
+    `MatchController._score_match`, usando operações de matriz do NumPy.
+
+    As mentoras viram matrizes de pertinência (0/1) sobre o vocabulário de
+    competências e hobbies; as mentoradas viram vetores de contagem, para que
+    itens repetidos na lista da mentorada pontuem de novo, como no original.
+    Termos que nenhuma mentora tem não pontuam e ficam fora do vocabulário.
+    """
+
+    def __init__(
+        self,
+        mentoras_competencias: Sequence[list[str] | None],
+        mentoras_hobbies: Sequence[list[str] | None],
+    ):
+        self.vocabulario_competencias = _vocabulario(mentoras_competencias)
+        self.vocabulario_hobbies = _vocabulario(mentoras_hobbies)
+        self.competencias = _pertinencia(mentoras_competencias, self.vocabulario_competencias)
+        self.hobbies = _pertinencia(mentoras_hobbies, self.vocabulario_hobbies)
+        # Coluna extra de zeros para mentoradas cujo curso não é competência de nenhuma mentora
+        self._competencias_curso = np.hstack(
+            [self.competencias, np.zeros((len(mentoras_competencias), 1), dtype=np.int32)]
+        )
+
+    @property
+    def total_mentoras(self) -> int:
+        return self.competencias.shape[0]
+
+    def encode_mentoradas(
+        self,
+        competencias: Sequence[list[str] | None],
+        hobbies: Sequence[list[str] | None],
+        cursos: Sequence[str | None],
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        sem_curso = len(self.vocabulario_competencias)
+        return (
+            _contagem(competencias, self.vocabulario_competencias),
+            _contagem(hobbies, self.vocabulario_hobbies),
+            np.array(
+                [self.vocabulario_competencias.get(curso, sem_curso) for curso in cursos],
+                dtype=np.int64,
+            ),
+        )
+
+    def score_matrix(
+        self,
+        competencias: np.ndarray,
+        hobbies: np.ndarray,
+        cursos: np.ndarray,
+    ) -> np.ndarray:
+        """Pontuação (n mentoradas x m mentoras) das mentoradas já codificadas."""
+        scores = PESO_COMPETENCIA * (competencias @ self.competencias.T)
+        scores += PESO_HOBBY * (hobbies @ self.hobbies.T)
+        scores += PESO_CURSO * self._competencias_curso[:, cursos].T
+        return scores
+
+    def score_candidates(
+        self,
+        competencias: np.ndarray,
+        hobbies: np.ndarray,
+        curso: int,
+        posicoes: np.ndarray,
+    ) -> np.ndarray:
+        """Pontuação de uma mentorada codificada contra as mentoras em `posicoes`."""
+        scores = PESO_COMPETENCIA * (self.competencias[posicoes] @ competencias)
+        scores += PESO_HOBBY * (self.hobbies[posicoes] @ hobbies)
+        scores += PESO_CURSO * self._competencias_curso[posicoes, curso]
+        return scores
+
+    def iter_encoded_blocks(
+        self,
+        competencias: Sequence[list[str] | None],
+        hobbies: Sequence[list[str] | None],
+        cursos: Sequence[str | None],
+        block_size: int = 1024,
+    ) -> Iterator[tuple[int, tuple[np.ndarray, np.ndarray, np.ndarray]]]:
+        """Gera (início, mentoradas codificadas) em blocos de `block_size`."""
+        for inicio in range(0, len(cursos), block_size):
+            fim = inicio + block_size
+            yield inicio, self.encode_mentoradas(
+                competencias[inicio:fim], hobbies[inicio:fim], cursos[inicio:fim]
+            )
+
+    def iter_score_blocks(
+        self,
+        competencias: Sequence[list[str] | None],
+        hobbies: Sequence[list[str] | None],
+        cursos: Sequence[str | None],
+        block_size: int = 1024,
+    ) -> Iterator[tuple[int, np.ndarray]]:
+        """
+        Gera (início, bloco) com a matriz em blocos de `block_size` mentoradas,
+        para não materializar a matriz inteira em coortes grandes.
+        """
+        for inicio, codificadas in self.iter_encoded_blocks(competencias, hobbies, cursos, block_size):
+            yield inicio, self.score_matrix(*codificadas)
+
+
+class RankingContext:
+    """
+    O que um processo precisa para rankear mentoradas: o `MatchScoringEngine`
+    das mentoras, o índice invertido como arrays de posições e quais mentoras
+    estavam livres no começo da rodada. É enviado uma vez a cada processo.
+    """
+
+    def __init__(
+        self,
+        engine: MatchScoringEngine,
+        postings_competencias: dict[str, np.ndarray],
+        postings_hobbies: dict[str, np.ndarray],
+        livres: np.ndarray,
+        universidades: np.ndarray,
+        same_university: bool,
+    ):
+        self.engine = engine
+        self.postings_competencias = postings_competencias
+        self.postings_hobbies = postings_hobbies
+        self.livres = livres
+        self.universidades = universidades
+        self.same_university = same_university
+        self._livres_por_universidade: dict[int, np.ndarray] = {}
+
+    def permitidas(self, universidade: int) -> np.ndarray:
+        if not self.same_university:
+            return self.livres
+        mascara = self._livres_por_universidade.get(universidade)
+        if mascara is None:
+            mascara = self.livres & (self.universidades == universidade)
+            self._livres_por_universidade[universidade] = mascara
+        return mascara
+
+    def candidatas(self, competencias: list[str] | None, hobbies: list[str] | None, curso: str | None) -> np.ndarray:
+        listas = [self.postings_competencias[t] for t in competencias or () if t in self.postings_competencias]
+        listas += [self.postings_hobbies[t] for t in hobbies or () if t in self.postings_hobbies]
+        if curso in self.postings_competencias:
+            listas.append(self.postings_competencias[curso])
+        if not listas:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(listas))
+
+
+def rank_perfis(
+    contexto: RankingContext,
+    perfis: Sequence[PerfilMentorada],
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    Para cada mentorada, as mentoras permitidas que compartilham algum termo
+    com ela, ordenadas por score decrescente e, no empate, pela posição
+    (ordem do banco), junto com os scores. Mentoras fora da lista têm score 0.
+    """
+    competencias, hobbies, cursos = contexto.engine.encode_mentoradas(
+        [perfil[0] for perfil in perfis],
+        [perfil[1] for perfil in perfis],
+        [perfil[2] for perfil in perfis],
+    )
+    resultado: list[tuple[np.ndarray, np.ndarray]] = []
+    for i, (competencias_termos, hobbies_termos, curso, universidade) in enumerate(perfis):
+        candidatas = contexto.candidatas(competencias_termos, hobbies_termos, curso)
+        candidatas = candidatas[contexto.permitidas(universidade)[candidatas]]
+        scores = contexto.engine.score_candidates(competencias[i], hobbies[i], cursos[i], candidatas)
+        ordem = np.lexsort((candidatas, -scores))
+        resultado.append((candidatas[ordem], scores[ordem]))
+    return resultado
+
+
+_contexto_worker: RankingContext | None = None
+
+
+def _init_worker(contexto: RankingContext):
+    global _contexto_worker
+    _contexto_worker = contexto
+
+
+def _rank_chunk(perfis: Sequence[PerfilMentorada]) -> list[tuple[np.ndarray, np.ndarray]]:
+    assert _contexto_worker is not None
+    return rank_perfis(_contexto_worker, perfis)
+
+
+def rank_mentoradas(
+    contexto: RankingContext,
+    perfis: Sequence[PerfilMentorada],
+    workers: int = MATCH_WORKERS,
+    chunk_size: int = MATCH_CHUNK_SIZE,
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    `rank_perfis` dividido em blocos de `chunk_size` mentoradas entre
+    `workers` processos. Os blocos voltam na ordem em que foram enviados,
+    então o resultado é o mesmo da execução num processo só. Coortes
+    pequenas não compensam subir os processos e rodam aqui mesmo.
+    """
+    if workers <= 1 or len(perfis) <= chunk_size:
+        return rank_perfis(contexto, perfis)
+    blocos = [perfis[inicio:inicio + chunk_size] for inicio in range(0, len(perfis), chunk_size)]
+    # spawn em vez de fork: a rodada roda numa thread do servidor e fazer fork
+    # de um processo com várias threads pode herdar locks travados
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(blocos)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(contexto,),
+    ) as pool:
+        resultado: list[tuple[np.ndarray, np.ndarray]] = []
+        for parte in pool.map(_rank_chunk, blocos):
+            resultado.extend(parte)
+    return resultado
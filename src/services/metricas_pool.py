@@ -0,0 +1,134 @@
+import bisect
+import os
+import threading
+from time import perf_counter
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Limites (ms) das faixas dos histogramas; a última faixa é "acima de 5000"
+FAIXAS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class Histograma:
+    """Contagem por faixa de duração, com total, soma e máximo. Seguro entre threads."""
+
+    def __init__(self, faixas_ms: tuple[float, ...] = FAIXAS_MS):
+        self.faixas_ms = faixas_ms
+        self._lock = threading.Lock()
+        self._contagens = [0] * (len(faixas_ms) + 1)
+        self._total = 0
+        self._soma_ms = 0.0
+        self._max_ms = 0.0
+
+    def registrar(self, duracao_s: float):
+        duracao_ms = duracao_s * 1000
+        with self._lock:
+            self._contagens[bisect.bisect_left(self.faixas_ms, duracao_ms)] += 1
+            self._total += 1
+            self._soma_ms += duracao_ms
+            self._max_ms = max(self._max_ms, duracao_ms)
+
+    def resumo(self) -> dict:
+        with self._lock:
+            faixas = {f"<={limite}ms": contagem for limite, contagem in zip(self.faixas_ms, self._contagens)}
+            faixas[f">{self.faixas_ms[-1]}ms"] = self._contagens[-1]
+            return {
+                "total": self._total,
+                "media_ms": round(self._soma_ms / self._total, 2) if self._total else None,
+                "max_ms": round(self._max_ms, 2),
+                "faixas": faixas,
+            }
+
+
+class MetricasPool:
+    """
+    Números do pool de conexões deste processo: espera para conseguir uma
+    conexão (inclui abrir uma nova), tempo com a conexão emprestada,
+    conexões abertas, descartadas e esperas que estouraram o timeout.
+    """
+
+    espera = Histograma()
+    uso = Histograma()
+    _lock = threading.Lock()
+    conexoes_abertas = 0
+    invalidacoes = 0
+    timeouts = 0
+
+    @classmethod
+    def contar(cls, atributo: str):
+        with cls._lock:
+            setattr(cls, atributo, getattr(cls, atributo) + 1)
+
+    @staticmethod
+    def _estado(engine: Engine) -> dict:
+        pool = engine.pool
+        estado = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            estado |= {
+                "tamanho": pool.size(),
+                "emprestadas": pool.checkedout(),
+                "livres": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "max_overflow": pool._max_overflow,
+                "timeout_s": pool.timeout(),
+            }
+        return estado
+
+    @classmethod
+    def resumo(cls, engines: dict[str, Engine]) -> dict:
+        """Estado de cada pool em `engines` e os números somados de todos eles."""
+        return {
+            "pid": os.getpid(),
+            "pools": {nome: cls._estado(engine) for nome, engine in engines.items()},
+            "conexoes_abertas": cls.conexoes_abertas,
+            "invalidacoes": cls.invalidacoes,
+            "timeouts": cls.timeouts,
+            "espera": cls.espera.resumo(),
+            "uso": cls.uso.resumo(),
+        }
+
+
+class _EsperaMedida:
+    """Mede quanto cada checkout esperou por uma conexão."""
+
+    def _do_get(self):
+        inicio = perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            MetricasPool.contar("timeouts")
+            raise
+        finally:
+            MetricasPool.espera.registrar(perf_counter() - inicio)
+
+
+class QueuePoolMedido(_EsperaMedida, QueuePool):
+    pass
+
+
+class AsyncQueuePoolMedido(_EsperaMedida, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrumentar(engine: Engine):
+    """Liga os eventos do pool de `engine` às `MetricasPool`."""
+
+    @event.listens_for(engine, "connect")
+    def _conectou(dbapi_connection, connection_record):
+        MetricasPool.contar("conexoes_abertas")
+
+    @event.listens_for(engine, "checkout")
+    def _emprestou(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["emprestada_em"] = perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _devolveu(dbapi_connection, connection_record):
+        emprestada_em = connection_record.info.pop("emprestada_em", None)
+        if emprestada_em is not None:
+            MetricasPool.uso.registrar(perf_counter() - emprestada_em)
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidou(dbapi_connection, connection_record, exception):
+        MetricasPool.contar("invalidacoes")
@@ -0,0 +1,187 @@
+from contextvars import ContextVar
+import logging
+import os
+import random
+import threading
+from time import perf_counter
+import dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+dotenv.load_dotenv()
+
+# Comandos SQL a partir desse tempo (ms) vão para o log como lentos
+SQL_LENTA_MS = float(os.getenv("SQL_LENTA_MS", 200))
+# Fração dos demais comandos registrada no log como amostra (0 desliga)
+SQL_AMOSTRA = float(os.getenv("SQL_AMOSTRA", 0))
+# Tamanho máximo do SQL no log (INSERTs em lote chegam a dezenas de KB)
+SQL_LOG_MAX_CHARS = 2000
+
+FORA_DE_REQUISICAO = "(fora de requisição)"
+
+logger = logging.getLogger("src.sql")
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class _Requisicao:
+    """Comandos e tempo de banco de uma requisição em andamento."""
+
+    __slots__ = ("scope", "comandos", "tempo_s")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.comandos = 0
+        self.tempo_s = 0.0
+
+    def rota(self) -> str:
+        # O roteador grava a rota e os parâmetros de path no scope antes de
+        # chamar o endpoint. O molde sai do path com cada parâmetro trocado
+        # pelo nome (/match/pedidos/{id_pedidos_mentoria}); sem rota (404)
+        # o path não entra, para não abrir um agregado por URL
+        metodo = self.scope.get("method")
+        if "route" not in self.scope:
+            return f"{metodo} (sem rota)"
+        nomes = {str(valor): f"{{{nome}}}" for nome, valor in self.scope.get("path_params", {}).items()}
+        path = "/".join(nomes.get(parte, parte) for parte in self.scope.get("path", "").split("/"))
+        return f"{metodo} {path}"
+
+
+_requisicao: ContextVar[_Requisicao | None] = ContextVar("requisicao_sql", default=None)
+
+
+class _Agregado:
+    __slots__ = ("requisicoes", "comandos", "tempo_s", "max_comandos", "max_tempo_s")
+
+    def __init__(self):
+        self.requisicoes = 0
+        self.comandos = 0
+        self.tempo_s = 0.0
+        self.max_comandos = 0
+        self.max_tempo_s = 0.0
+
+    def resumo(self) -> dict:
+        return {
+            "requisicoes": self.requisicoes,
+            "comandos": self.comandos,
+            "tempo_sql_ms": round(self.tempo_s * 1000, 2),
+            "comandos_por_requisicao": round(self.comandos / self.requisicoes, 2) if self.requisicoes else None,
+            "tempo_sql_medio_ms": round(self.tempo_s * 1000 / self.requisicoes, 2) if self.requisicoes else None,
+            "max_comandos": self.max_comandos,
+            "max_tempo_sql_ms": round(self.max_tempo_s * 1000, 2),
+        }
+
+
+class MonitorSql:
+    """
+    Tempo de cada comando SQL, pelos eventos de cursor do engine. Só os
+    lentos (`SQL_LENTA_MS`) e uma amostra (`SQL_AMOSTRA`) dos demais vão
+    para o log, sem os valores dos parâmetros e com a rota de origem. Por
+    rota fica o total de comandos e de tempo no banco.
+    """
+
+    _lock = threading.Lock()
+    _rotas: dict[str, _Agregado] = {}
+
+    @classmethod
+    def _agregado(cls, rota: str) -> _Agregado:
+        agregado = cls._rotas.get(rota)
+        if agregado is None:
+            agregado = cls._rotas.setdefault(rota, _Agregado())
+        return agregado
+
+    @classmethod
+    def registrar_requisicao(cls, requisicao: _Requisicao):
+        with cls._lock:
+            agregado = cls._agregado(requisicao.rota())
+            agregado.requisicoes += 1
+            agregado.comandos += requisicao.comandos
+            agregado.tempo_s += requisicao.tempo_s
+            agregado.max_comandos = max(agregado.max_comandos, requisicao.comandos)
+            agregado.max_tempo_s = max(agregado.max_tempo_s, requisicao.tempo_s)
+
+    @classmethod
+    def registrar_comando(cls, statement: str, parameters, executemany: bool, duracao_s: float):
+        requisicao = _requisicao.get()
+        if requisicao is not None:
+            requisicao.comandos += 1
+            requisicao.tempo_s += duracao_s
+            rota = requisicao.rota()
+        else:
+            rota = FORA_DE_REQUISICAO
+            with cls._lock:
+                agregado = cls._agregado(rota)
+                agregado.comandos += 1
+                agregado.tempo_s += duracao_s
+        duracao_ms = duracao_s * 1000
+        if duracao_ms >= SQL_LENTA_MS:
+            nivel = logging.WARNING
+        elif SQL_AMOSTRA > 0 and random.random() < SQL_AMOSTRA:
+            nivel = logging.INFO
+        else:
+            return
+        if logger.isEnabledFor(nivel):
+            logger.log(
+                nivel, "%s %.1f ms [%s] %s | parâmetros: %s",
+                "SQL lenta" if nivel == logging.WARNING else "SQL amostra",
+                duracao_ms, rota, statement[:SQL_LOG_MAX_CHARS], _redigir(parameters, executemany),
+            )
+
+    @classmethod
+    def resumo(cls) -> dict:
+        with cls._lock:
+            rotas = {rota: agregado.resumo() for rota, agregado in cls._rotas.items()}
+        return {
+            "pid": os.getpid(),
+            "lenta_ms": SQL_LENTA_MS,
+            "amostra": SQL_AMOSTRA,
+            "rotas": dict(sorted(rotas.items(), key=lambda item: item[1]["tempo_sql_ms"], reverse=True)),
+        }
+
+
+def _redigir(parameters, executemany: bool) -> str:
+    """Só nomes e tipos dos parâmetros: valores (senhas, CPFs, e-mails) nunca vão para o log."""
+    if executemany:
+        return f"{len(parameters)} linhas"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{nome}: {type(valor).__name__}" for nome, valor in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(type(valor).__name__ for valor in parameters) + ")"
+    return type(parameters).__name__
+
+
+def instrumentar(engine: Engine):
+    """Liga os eventos de cursor de `engine` ao `MonitorSql`."""
+
+    # O início fica no contexto de execução, que é de cada comando: um
+    # comando que falha não deixa nada para trás
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        context._inicio_sql = perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _depois(conn, cursor, statement, parameters, context, executemany):
+        duracao_s = perf_counter() - context._inicio_sql
+        MonitorSql.registrar_comando(statement, parameters, executemany, duracao_s)
+
+
+class MonitorSqlMiddleware:
+    """Middleware ASGI: abre a contagem de SQL de cada requisição e soma à rota no fim."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        requisicao = _Requisicao(scope)
+        token = _requisicao.set(requisicao)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _requisicao.reset(token)
+            MonitorSql.registrar_requisicao(requisicao)
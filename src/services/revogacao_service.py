@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+import os
+import threading
+from uuid import UUID
+import dotenv
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, col, delete, func, select
+from src.schemas.tables import TokenRevogado, UsuarioRevogado
+from src.services.bloom_filter import BloomFilter
+
+dotenv.load_dotenv()
+
+# De quanto em quanto tempo os tokens revogados por outros processos entram no filtro
+TOKEN_REVOGADO_REFRESH_S = float(os.getenv("TOKEN_REVOGADO_REFRESH_S", 30))
+# Capacidade mínima do filtro de tokens revogados
+TOKEN_REVOGADO_CAPACIDADE = int(os.getenv("TOKEN_REVOGADO_CAPACIDADE", 10_000))
+
+
+class RevogacaoService:
+    """
+    Tokens revogados no logout, guardados em `token_revogado` pelo jti.
+    Um filtro de Bloom em memória com os jtis ainda válidos responde o
+    caso comum (não revogado) sem ir ao banco; só um "talvez" consulta a
+    tabela. O filtro é montado na subida do servidor e recebe a cada
+    `TOKEN_REVOGADO_REFRESH_S` os revogados por outros processos, que até
+    lá podem seguir aceitos por eles. Enquanto não for carregado, toda
+    checagem vai ao banco.
+
+    Usuários removidos têm todos os tokens revogados de uma vez, por um
+    corte em `usuario_revogado`: vale só o token emitido depois dele. Os
+    cortes são poucos e ficam inteiros em memória, carregados e
+    atualizados junto com o filtro.
+    """
+
+    _lock = threading.Lock()
+    _filtro: BloomFilter | None = None
+    _cortes: dict[UUID, float] | None = None
+    _atualizado_em: datetime | None = None
+
+    @classmethod
+    def carregar(cls, session: Session):
+        """Apaga os revogados já expirados e monta o filtro com os demais"""
+        agora = datetime.now()
+        session.exec(delete(TokenRevogado).where(col(TokenRevogado.expira_em) < agora))
+        session.exec(delete(UsuarioRevogado).where(col(UsuarioRevogado.expira_em) < agora))
+        session.commit()
+        total = session.exec(select(func.count()).select_from(TokenRevogado)).one()
+        filtro = BloomFilter(max(TOKEN_REVOGADO_CAPACIDADE, total * 2))
+        for jti in session.exec(select(TokenRevogado.jti).execution_options(yield_per=10_000)):
+            filtro.add(str(jti))
+        cortes = {
+            id_usuario: revogado_em.timestamp()
+            for id_usuario, revogado_em in session.exec(select(UsuarioRevogado.id_usuario, UsuarioRevogado.revogado_em))
+        }
+        with cls._lock:
+            cls._filtro = filtro
+            cls._cortes = cortes
+            cls._atualizado_em = agora
+
+    @classmethod
+    def atualizar(cls, session: Session):
+        """Traz para o filtro os tokens revogados desde a última carga"""
+        if cls._filtro is None:
+            return cls.carregar(session)
+        agora = datetime.now()
+        # Margem para revogações cujo commit terminou depois do horário gravado
+        desde = cls._atualizado_em - timedelta(seconds=TOKEN_REVOGADO_REFRESH_S)
+        for jti in session.exec(select(TokenRevogado.jti).where(col(TokenRevogado.revogado_em) >= desde)):
+            cls._filtro.add(str(jti))
+        usuarios = session.exec(
+            select(UsuarioRevogado.id_usuario, UsuarioRevogado.revogado_em)
+            .where(col(UsuarioRevogado.revogado_em) >= desde)
+        )
+        for id_usuario, revogado_em in usuarios:
+            cls._cortar(id_usuario, revogado_em.timestamp())
+        with cls._lock:
+            cls._atualizado_em = agora
+
+    @classmethod
+    def revogar(cls, jti: UUID, id_usuario: UUID, expira_em: datetime, session: Session):
+        session.execute(
+            pg_insert(TokenRevogado)
+            .values(jti=jti, id_usuario=id_usuario, expira_em=expira_em, revogado_em=datetime.now())
+            .on_conflict_do_nothing()
+        )
+        session.commit()
+        filtro = cls._filtro
+        if filtro is not None:
+            filtro.add(str(jti))
+
+    @classmethod
+    def talvez_revogado(cls, jti: UUID) -> bool:
+        """False só quando o filtro garante que o token não foi revogado"""
+        filtro = cls._filtro
+        return filtro is None or str(jti) in filtro
+
+    @classmethod
+    def revogado(cls, jti: UUID, session: Session) -> bool:
+        if not cls.talvez_revogado(jti):
+            return False
+        return session.get(TokenRevogado, jti) is not None
+
+    @classmethod
+    def _cortar(cls, id_usuario: UUID, corte: float):
+        with cls._lock:
+            if cls._cortes is not None:
+                cls._cortes[id_usuario] = max(corte, cls._cortes.get(id_usuario, corte))
+
+    @classmethod
+    def revogar_usuario(cls, id_usuario: UUID, expira_em: datetime, session: Session):
+        """Revoga todos os tokens do usuário emitidos até agora; `expira_em` é o exp do último deles"""
+        agora = datetime.now()
+        session.merge(UsuarioRevogado(id_usuario=id_usuario, revogado_em=agora, expira_em=expira_em))
+        session.commit()
+        cls._cortar(id_usuario, agora.timestamp())
+
+    @classmethod
+    def talvez_usuario_revogado(cls, id_usuario: UUID, emitido_em: float | None) -> bool:
+        """
+        False quando o usuário não tem corte posterior ao `emitido_em` (iat)
+        do token. Tokens sem iat (antigos) caem em qualquer corte.
+        """
+        cortes = cls._cortes
+        if cortes is None:
+            return True
+        corte = cortes.get(id_usuario)
+        return corte is not None and (emitido_em is None or emitido_em < corte)
+
+    @classmethod
+    def usuario_revogado(cls, id_usuario: UUID, emitido_em: float | None, session: Session) -> bool:
+        if not cls.talvez_usuario_revogado(id_usuario, emitido_em):
+            return False
+        if cls._cortes is not None:
+            return True
+        revogado = session.get(UsuarioRevogado, id_usuario)
+        return revogado is not None and (emitido_em is None or emitido_em < revogado.revogado_em.timestamp())
@@ -0,0 +1,64 @@
+import hashlib
+import os
+import dotenv
+import jwt
+from fastapi import Request
+from src.services.ttl_cache import TTLCache
+
+dotenv.load_dotenv()
+
+# Por quanto tempo (s) depois de uma escrita as leituras do mesmo usuário
+# continuam no primário; precisa cobrir o atraso de replicação
+REPLICA_STICKY_S = float(os.getenv("REPLICA_STICKY_S", 5))
+# Usuários com escrita recente lembrados por processo
+REPLICA_STICKY_MAX = int(os.getenv("REPLICA_STICKY_MAX", 50_000))
+
+METODOS_LEITURA = ("GET", "HEAD")
+
+
+class RoteamentoReplicas:
+    """
+    Decide, por requisição, se a sessão lê de uma réplica. GET e HEAD vão
+    para a réplica; os demais métodos, para o primário, e deixam o
+    usuário preso ao primário por `REPLICA_STICKY_S`, para que ele leia o
+    que acabou de escrever. A marcação é por processo: com vários workers,
+    a leitura seguinte pode cair num worker que não viu a escrita.
+    """
+
+    _escritas_recentes: TTLCache[str, bool] = TTLCache(REPLICA_STICKY_MAX, REPLICA_STICKY_S)
+
+    @staticmethod
+    def _chave(request: Request) -> str | None:
+        # O usuário sai das claims do token sem conferir a assinatura: a
+        # chave só decide entre réplica e primário, não dá acesso a nada.
+        # Sem token, fica o IP
+        cabecalho = request.headers.get("authorization", "")
+        if cabecalho.lower().startswith("bearer "):
+            token = cabecalho[7:].strip()
+            try:
+                payload = jwt.decode(token, options={"verify_signature": False})
+                usuario = payload.get("sub") or payload.get("email")
+                if usuario:
+                    return f"usuario:{usuario}"
+            except jwt.InvalidTokenError:
+                pass
+            return "token:" + hashlib.sha256(token.encode()).hexdigest()
+        if request.client is not None:
+            return f"ip:{request.client.host}"
+        return None
+
+    @classmethod
+    def usar_replica(cls, request: Request) -> bool:
+        """True se a requisição pode ler de uma réplica; marca as escritas."""
+        chave = cls._chave(request)
+        if request.method not in METODOS_LEITURA:
+            cls.marcar_escrita(request, chave)
+            return False
+        return chave is None or cls._escritas_recentes.get(chave) is None
+
+    @classmethod
+    def marcar_escrita(cls, request: Request, chave: str | None = None):
+        """Começa (ou renova) a janela em que o usuário só lê do primário."""
+        chave = chave or cls._chave(request)
+        if chave is not None:
+            cls._escritas_recentes.set(chave, True)
@@ -0,0 +1,186 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+import multiprocessing
+import os
+import threading
+from time import perf_counter
+import bcrypt
+import dotenv
+from fastapi import HTTPException
+from starlette.status import HTTP_503_SERVICE_UNAVAILABLE
+
+dotenv.load_dotenv()
+
+# Processos dedicados ao bcrypt (0 roda na própria thread da requisição)
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", min(4, os.cpu_count() or 1)))
+# Quantos hashes podem esperar na fila além dos que estão rodando
+BCRYPT_QUEUE_MAX = int(os.getenv("BCRYPT_QUEUE_MAX", max(BCRYPT_WORKERS, 1) * 8))
+# Custo dos hashes novos; senhas com outro custo são refeitas no login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+
+def _hash(senha: bytes, rounds: int) -> tuple[bytes, float]:
+    inicio = perf_counter()
+    return bcrypt.hashpw(senha, bcrypt.gensalt(rounds)), perf_counter() - inicio
+
+
+def _verificar(senha: bytes, hash_senha: bytes) -> tuple[bool, float]:
+    inicio = perf_counter()
+    return bcrypt.checkpw(senha, hash_senha), perf_counter() - inicio
+
+
+def custo_hash(hash_senha: str) -> int | None:
+    """Custo de um hash bcrypt (`$2b$12$...` -> 12)."""
+    partes = hash_senha.split("$")
+    if len(partes) < 4 or not partes[2].isdigit():
+        return None
+    return int(partes[2])
+
+
+class _Metrica:
+    def __init__(self):
+        self.total = 0
+        self.soma_s = 0.0
+        self.max_s = 0.0
+        self.soma_espera_s = 0.0
+
+    def registrar(self, duracao_s: float, espera_s: float):
+        self.total += 1
+        self.soma_s += duracao_s
+        self.max_s = max(self.max_s, duracao_s)
+        self.soma_espera_s += espera_s
+
+    def resumo(self) -> dict:
+        return {
+            "total": self.total,
+            "media_ms": round(self.soma_s / self.total * 1000, 2) if self.total else None,
+            "max_ms": round(self.max_s * 1000, 2),
+            "espera_media_ms": round(self.soma_espera_s / self.total * 1000, 2) if self.total else None,
+        }
+
+
+class SenhaService:
+    """
+    Hash e verificação de senhas num pool de processos próprio, para que
+    uma leva de logins não ocupe todas as threads do servidor. Cabem
+    `BCRYPT_WORKERS` rodando mais `BCRYPT_QUEUE_MAX` na fila; além
+    disso a requisição é recusada na hora com 503.
+    """
+
+    _lock = threading.Lock()
+    _pool: ProcessPoolExecutor | None = None
+    _vagas = threading.BoundedSemaphore(max(BCRYPT_WORKERS, 1) + BCRYPT_QUEUE_MAX)
+    _em_andamento = 0
+    _recusados = 0
+    _rehashes = 0
+    _metricas = {"hash": _Metrica(), "verificacao": _Metrica()}
+
+    @classmethod
+    def _get_pool(cls) -> ProcessPoolExecutor:
+        with cls._lock:
+            if cls._pool is None:
+                # spawn, como no match: o servidor tem várias threads
+                cls._pool = ProcessPoolExecutor(
+                    max_workers=BCRYPT_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return cls._pool
+
+    @classmethod
+    def _executar(cls, operacao: str, funcao, *args):
+        if not cls._vagas.acquire(blocking=False):
+            with cls._lock:
+                cls._recusados += 1
+            raise HTTPException(
+                status_code=HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Muitas autenticações em andamento, tente novamente",
+                headers={"Retry-After": "1"},
+            )
+        with cls._lock:
+            cls._em_andamento += 1
+        inicio = perf_counter()
+        try:
+            if BCRYPT_WORKERS <= 0:
+                resultado, duracao = funcao(*args)
+            else:
+                futuro: Future = cls._get_pool().submit(funcao, *args)
+                resultado, duracao = futuro.result()
+        finally:
+            with cls._lock:
+                cls._em_andamento -= 1
+            cls._vagas.release()
+        with cls._lock:
+            cls._metricas[operacao].registrar(duracao, perf_counter() - inicio - duracao)
+        return resultado
+
+    @classmethod
+    def gerar_hash(cls, senha: str) -> str:
+        return cls._executar("hash", _hash, senha.encode("utf-8"), BCRYPT_ROUNDS).decode("utf-8")
+
+    @classmethod
+    def gerar_hashes(cls, senhas: list[str]) -> list[str]:
+        """
+        Hashes em lote (importação), na ordem de `senhas`. Ocupa no máximo
+        `BCRYPT_WORKERS` vagas por vez e espera por elas em vez de recusar,
+        para que a fila continue com espaço para os logins.
+        """
+        if BCRYPT_WORKERS <= 0:
+            return [cls.gerar_hash(senha) for senha in senhas]
+        pool = cls._get_pool()
+        resultado: list[str] = []
+        for inicio_janela in range(0, len(senhas), BCRYPT_WORKERS):
+            janela = senhas[inicio_janela:inicio_janela + BCRYPT_WORKERS]
+            for _ in janela:
+                cls._vagas.acquire()
+            with cls._lock:
+                cls._em_andamento += len(janela)
+            inicio = perf_counter()
+            try:
+                futuros = [pool.submit(_hash, senha.encode("utf-8"), BCRYPT_ROUNDS) for senha in janela]
+                for futuro in futuros:
+                    hash_senha, duracao = futuro.result()
+                    resultado.append(hash_senha.decode("utf-8"))
+                    with cls._lock:
+                        cls._metricas["hash"].registrar(duracao, max(perf_counter() - inicio - duracao, 0.0))
+            finally:
+                with cls._lock:
+                    cls._em_andamento -= len(janela)
+                for _ in janela:
+                    cls._vagas.release()
+        return resultado
+
+    @classmethod
+    def verificar(cls, senha: str, hash_senha: str) -> bool:
+        return cls._executar("verificacao", _verificar, senha.encode("utf-8"), hash_senha.encode("utf-8"))
+
+    @classmethod
+    def precisa_rehash(cls, hash_senha: str) -> bool:
+        return custo_hash(hash_senha) != BCRYPT_ROUNDS
+
+    @classmethod
+    def rehash(cls, senha: str, hash_senha: str) -> str | None:
+        """
+        Novo hash com o custo atual, se o guardado tiver outro custo. É
+        oportunista: com o pool cheio fica para o próximo login.
+        """
+        if not cls.precisa_rehash(hash_senha):
+            return None
+        try:
+            novo = cls.gerar_hash(senha)
+        except HTTPException:
+            return None
+        with cls._lock:
+            cls._rehashes += 1
+        return novo
+
+    @classmethod
+    def metricas(cls) -> dict:
+        with cls._lock:
+            return {
+                "workers": BCRYPT_WORKERS,
+                "fila_max": BCRYPT_QUEUE_MAX,
+                "custo": BCRYPT_ROUNDS,
+                "em_andamento": cls._em_andamento,
+                "recusados": cls._recusados,
+                "rehashes": cls._rehashes,
+                **{operacao: metrica.resumo() for operacao, metrica in cls._metricas.items()},
+            }
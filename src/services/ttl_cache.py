@@ -0,0 +1,59 @@
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Cache LRU limitado a `maxsize` entradas, cada uma válida por `ttl_s`
+    segundos (ou pelo prazo passado em `set`). Seguro entre threads.
+    """
+
+    def __init__(self, maxsize: int, ttl_s: float):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._dados: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, chave: K) -> V | None:
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                return None
+            expira_em, valor = item
+            if expira_em <= monotonic():
+                del self._dados[chave]
+                return None
+            self._dados.move_to_end(chave)
+            return valor
+
+    def set(self, chave: K, valor: V, ttl_s: float | None = None):
+        ttl_s = self.ttl_s if ttl_s is None else ttl_s
+        if ttl_s <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._dados[chave] = (monotonic() + ttl_s, valor)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.maxsize:
+                self._dados.popitem(last=False)
+
+    def discard(self, chave: K):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def discard_where(self, condicao: Callable[[K, V], bool]):
+        """Tira todas as entradas para as quais `condicao(chave, valor)` é verdadeira"""
+        with self._lock:
+            for chave in [chave for chave, (_, valor) in self._dados.items() if condicao(chave, valor)]:
+                del self._dados[chave]
+
+    def clear(self):
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self) -> int:
+        return len(self._dados)
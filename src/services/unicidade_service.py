@@ -0,0 +1,74 @@
+import os
+import threading
+import dotenv
+from fastapi import HTTPException, status
+from sqlmodel import Session, func, select
+from src.schemas.tables import Usuario
+from src.services.bloom_filter import BloomFilter
+
+dotenv.load_dotenv()
+
+# Capacidade mínima do filtro; na carga ele é dimensionado para o dobro dos usuários
+UNICIDADE_CAPACIDADE = int(os.getenv("UNICIDADE_CAPACIDADE", 100_000))
+
+
+def _chave_email(email: str) -> str:
+    return "email:" + email
+
+
+def _chave_cpf(cpf: str) -> str:
+    return "cpf:" + cpf
+
+
+class UnicidadeService:
+    """
+    Recusa e-mail ou CPF repetido no cadastro antes do bcrypt. Um filtro
+    de Bloom em memória com os que já existem descarta a maioria dos
+    cadastros novos sem ir ao banco; um "talvez" é confirmado pelos
+    índices únicos de `usuario`. Até a carga inicial, toda checagem vai
+    ao banco. Cadastros feitos por outro processo só entram no filtro
+    dele: nesse caso quem barra é a própria constraint no INSERT.
+    """
+
+    _lock = threading.Lock()
+    _filtro: BloomFilter | None = None
+
+    @classmethod
+    def carregar(cls, session: Session):
+        """Monta o filtro com os e-mails e CPFs já cadastrados"""
+        total = session.exec(select(func.count()).select_from(Usuario)).one()
+        filtro = BloomFilter(max(UNICIDADE_CAPACIDADE, total * 2))
+        for email, cpf in session.exec(select(Usuario.email, Usuario.cpf).execution_options(yield_per=10_000)):
+            filtro.add(_chave_email(email))
+            filtro.add(_chave_cpf(cpf))
+        with cls._lock:
+            cls._filtro = filtro
+
+    @classmethod
+    def registrar(cls, email: str, cpf: str):
+        """Inclui no filtro um usuário recém-cadastrado"""
+        filtro = cls._filtro
+        if filtro is not None:
+            filtro.add(_chave_email(email))
+            filtro.add(_chave_cpf(cpf))
+
+    @classmethod
+    def verificar(cls, email: str, cpf: str, session: Session):
+        """409 se o e-mail ou o CPF já estiverem cadastrados"""
+        filtro = cls._filtro
+        if filtro is None or _chave_email(email) in filtro:
+            existe = session.exec(
+                select(Usuario.id_usuario).where(Usuario.email == email)
+            ).first()
+            if existe is not None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT, detail="E-mail já cadastrado"
+                )
+        if filtro is None or _chave_cpf(cpf) in filtro:
+            existe = session.exec(
+                select(Usuario.id_usuario).where(Usuario.cpf == cpf)
+            ).first()
+            if existe is not None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT, detail="CPF já cadastrado"
+                )
@@ -0,0 +1,5 @@
+import os
+
+# `src.database` cria os engines na importação; os testes não abrem conexão,
+# então um SQLite em memória basta quando não houver .env
+os.environ.setdefault("DATABASE_URL", "sqlite://")
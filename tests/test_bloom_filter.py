@@ -0,0 +1,45 @@
+import random
+import string
+import pytest
+from uuid import UUID
+from src.services.bloom_filter import BloomFilter
+
+
+def _itens(seed: int, quantidade: int) -> list[str]:
+    rng = random.Random(seed)
+    return ["".join(rng.choices(string.ascii_letters + string.digits + "@.çã", k=rng.randint(1, 30))) for _ in range(quantidade)]
+
+
+@pytest.mark.parametrize("capacidade", [0, 1, 100, 10_000])
+def test_sem_falso_negativo(capacidade):
+    filtro = BloomFilter(capacidade)
+    # Inclusive acima da capacidade: passa a errar mais, mas só para o lado positivo
+    itens = _itens(capacidade, max(capacidade, 1) * 3)
+    for item in itens:
+        filtro.add(item)
+    assert all(item in filtro for item in itens)
+    assert filtro.itens == len(itens)
+
+
+def test_sem_falso_negativo_com_jti():
+    # O uso da revogação de tokens: jti (UUID) em texto
+    rng = random.Random(7)
+    jtis = [str(UUID(int=rng.getrandbits(128))) for _ in range(5_000)]
+    filtro = BloomFilter(len(jtis), 0.001)
+    for jti in jtis:
+        filtro.add(jti)
+    assert all(jti in filtro for jti in jtis)
+
+
+def test_falsos_positivos_perto_da_taxa():
+    filtro = BloomFilter(10_000, 0.01)
+    for item in _itens(1, 10_000):
+        filtro.add(item)
+    ausentes = set(_itens(2, 20_000)) - set(_itens(1, 10_000))
+    taxa = sum(item in filtro for item in ausentes) / len(ausentes)
+    assert taxa < 0.02
+
+
+def test_vazio_nao_contem_nada():
+    filtro = BloomFilter(100)
+    assert not any(item in filtro for item in _itens(3, 1_000))
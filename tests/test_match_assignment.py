@@ -0,0 +1,79 @@
+import random
+from functools import lru_cache
+import numpy as np
+import pytest
+from src.services.match_assignment import _poda_por_mentora, optimal_assignment
+
+
+def _instancia(seed: int, total_mentoradas: int, total_mentoras: int, densidade: float = 0.6):
+    rng = random.Random(seed)
+    arestas = [
+        (i, j, rng.randint(1, 20))
+        for i in range(total_mentoradas)
+        for j in range(total_mentoras)
+        if rng.random() < densidade
+    ]
+    rng.shuffle(arestas)
+    return tuple(np.array([aresta[k] for aresta in arestas], dtype=np.int64) for k in range(3))
+
+
+def _forca_bruta(total_mentoradas: int, mentoradas, mentoras, pesos) -> int:
+    """Peso máximo por programação dinâmica sobre as mentoras já usadas."""
+    peso = {}
+    for i, j, p in zip(mentoradas.tolist(), mentoras.tolist(), pesos.tolist()):
+        peso[i, j] = max(p, peso.get((i, j), 0))
+
+    @lru_cache(maxsize=None)
+    def melhor(i: int, usadas: int) -> int:
+        if i == total_mentoradas:
+            return 0
+        resultado = melhor(i + 1, usadas)
+        for (mentorada, j), p in peso.items():
+            if mentorada == i and not usadas & (1 << j):
+                resultado = max(resultado, p + melhor(i + 1, usadas | (1 << j)))
+        return resultado
+
+    return melhor(0, 0)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_optimal_assignment_igual_a_forca_bruta(seed):
+    rng = random.Random(seed)
+    total_mentoradas, total_mentoras = rng.randint(1, 7), rng.randint(1, 6)
+    mentoradas, mentoras, pesos = _instancia(seed, total_mentoradas, total_mentoras)
+    peso = dict(zip(zip(mentoradas.tolist(), mentoras.tolist()), pesos.tolist()))
+
+    pares = optimal_assignment(total_mentoradas, total_mentoras, mentoradas, mentoras, pesos)
+
+    assert pares == sorted(pares)
+    assert len({i for i, _ in pares}) == len(pares)
+    assert len({j for _, j in pares}) == len(pares)
+    assert all(par in peso for par in pares)
+    assert sum(peso[par] for par in pares) == _forca_bruta(total_mentoradas, mentoradas, mentoras, pesos)
+
+
+def test_optimal_assignment_sem_arestas():
+    vazio = np.empty(0, dtype=np.int64)
+    assert optimal_assignment(3, 2, vazio, vazio, vazio) == []
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_poda_por_mentora_mantem_o_otimo(seed):
+    # Mais mentoradas que mentoras e grafo denso: a poda descarta arestas
+    total_mentoradas, total_mentoras = 7, 3
+    mentoradas, mentoras, pesos = _instancia(seed, total_mentoradas, total_mentoras, densidade=0.9)
+
+    podadas = _poda_por_mentora(mentoradas, mentoras, pesos, total_mentoras)
+
+    assert np.bincount(podadas[1], minlength=total_mentoras).max() <= total_mentoras
+    assert _forca_bruta(total_mentoradas, *podadas) == _forca_bruta(total_mentoradas, mentoradas, mentoras, pesos)
+
+
+def test_poda_por_mentora_fica_com_as_melhores():
+    mentoradas = np.array([0, 1, 2, 3, 0, 1], dtype=np.int64)
+    mentoras = np.array([0, 0, 0, 0, 1, 1], dtype=np.int64)
+    pesos = np.array([5, 9, 1, 7, 3, 4], dtype=np.int64)
+
+    podadas = _poda_por_mentora(mentoradas, mentoras, pesos, 2)
+
+    assert sorted(zip(*(coluna.tolist() for coluna in podadas))) == [(0, 1, 3), (1, 0, 9), (1, 1, 4), (3, 0, 7)]
@@ -0,0 +1,102 @@
+import random
+from types import SimpleNamespace
+from uuid import uuid4
+import numpy as np
+import pytest
+from src.controllers.match_controller import MatchController
+from src.services import match_cache
+from src.services.match_cache import MatchScoreCache
+from src.services.match_index import MentorTermIndex
+
+COMPETENCIAS = [f"c{i}" for i in range(10)] + ["Engenharia", "Computação"]
+HOBBIES = [f"h{i}" for i in range(8)]
+
+
+def _termos(rng: random.Random, vocabulario: list[str], maximo: int) -> list[str] | None:
+    if rng.random() < 0.1:
+        return None
+    return [rng.choice(vocabulario) for _ in range(rng.randint(0, maximo))]
+
+
+def _mentora(rng: random.Random, id_mentora=None, versao: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(
+        id_mentora=id_mentora or uuid4(),
+        competencias=_termos(rng, COMPETENCIAS, 5),
+        hobbies=_termos(rng, HOBBIES, 4),
+        versao_perfil=versao,
+    )
+
+
+def _mentorada(rng: random.Random, id_mentorada=None, versao: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(
+        id_mentorada=id_mentorada or uuid4(),
+        competencias_interesse=_termos(rng, COMPETENCIAS, 5),
+        hobbies=_termos(rng, HOBBIES, 4),
+        curso=rng.choice(COMPETENCIAS + ["Letras", None]),
+        versao_perfil=versao,
+    )
+
+
+def _rodada(rng: random.Random, perfis: list, novo, editar_de: float, sair_de: float, entrar: int) -> tuple[list, int]:
+    """Perfis da próxima rodada: alguns editados (nova versão), alguns saem, alguns entram"""
+    proximos, alterados = [], 0
+    for perfil in perfis:
+        sorteio = rng.random()
+        if sorteio < sair_de:
+            continue
+        if sorteio < sair_de + editar_de:
+            id_perfil = perfil.id_mentora if hasattr(perfil, "id_mentora") else perfil.id_mentorada
+            perfil = novo(rng, id_perfil, perfil.versao_perfil + 1)
+            alterados += 1
+        proximos.append(perfil)
+    for _ in range(rng.randint(0, entrar)):
+        proximos.insert(rng.randint(0, len(proximos)), novo(rng))
+        alterados += 1
+    return proximos, alterados
+
+
+def _ranking_completo(mentoradas, mentoras, permitidas, universidades_mentoras, universidades_mentoradas, same_university):
+    resultado = []
+    for i, mentorada in enumerate(mentoradas):
+        esperado = []
+        for j, mentora in enumerate(mentoras):
+            if not permitidas[j] or (same_university and universidades_mentoras[j] != universidades_mentoradas[i]):
+                continue
+            score = MatchController._score_match(
+                mentora.competencias or [], mentora.hobbies or [],
+                mentorada.competencias_interesse or [], mentorada.hobbies or [], mentorada.curso,
+            )[0]
+            if score > 0:
+                esperado.append((-score, j))
+        esperado.sort()
+        resultado.append(([j for _, j in esperado], [-score for score, _ in esperado]))
+    return resultado
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_atualizar_igual_a_repontuar_tudo(seed, monkeypatch):
+    # O índice global de mentoras não é compartilhado com outros testes
+    monkeypatch.setattr(match_cache, "mentor_index", MentorTermIndex())
+    rng = random.Random(seed)
+    cache = MatchScoreCache()
+    mentoras = [_mentora(rng) for _ in range(25)]
+    mentoradas = [_mentorada(rng) for _ in range(40)]
+    alteradas = {"mentoradas": len(mentoradas), "mentoras": len(mentoras)}
+
+    for _ in range(30):
+        # Só o que mudou (ou entrou) desde a rodada anterior é repontuado
+        assert cache.atualizar(mentoradas, mentoras) == alteradas
+
+        permitidas = np.array([rng.random() < 0.8 for _ in mentoras], dtype=bool)
+        universidades_mentoras = np.array([rng.randrange(3) for _ in mentoras], dtype=np.int64)
+        universidades_mentoradas = np.array([rng.randrange(3) for _ in mentoradas], dtype=np.int64)
+        same_university = rng.random() < 0.3
+        contexto = (mentoradas, mentoras, permitidas, universidades_mentoras, universidades_mentoradas, same_university)
+
+        ranking = cache.ranking(*contexto)
+
+        assert [(c.tolist(), s.tolist()) for c, s in ranking] == _ranking_completo(*contexto)
+
+        mentoras, mentoras_alteradas = _rodada(rng, mentoras, _mentora, editar_de=0.1, sair_de=0.05, entrar=3)
+        mentoradas, mentoradas_alteradas = _rodada(rng, mentoradas, _mentorada, editar_de=0.1, sair_de=0.05, entrar=4)
+        alteradas = {"mentoradas": mentoradas_alteradas, "mentoras": mentoras_alteradas}
@@ -0,0 +1,85 @@
+import random
+from types import SimpleNamespace
+import numpy as np
+import pytest
+from uuid import uuid4
+from src.controllers.match_controller import MatchController
+from src.services.match_index import MentorTermIndex
+from src.services.match_scoring import MatchScoringEngine, RankingContext, rank_perfis
+
+COMPETENCIAS = [f"c{i}" for i in range(12)] + ["Engenharia", "Computação"]
+HOBBIES = [f"h{i}" for i in range(10)]
+
+
+def _termos(rng: random.Random, vocabulario: list[str], maximo: int) -> list[str] | None:
+    if rng.random() < 0.1:
+        return None
+    # Com repetição: a mentorada que lista um termo duas vezes pontua duas
+    return [rng.choice(vocabulario) for _ in range(rng.randint(0, maximo))]
+
+
+def _coorte(seed: int, total_mentoras: int, total_mentoradas: int):
+    rng = random.Random(seed)
+    mentoras = [
+        (uuid4(), _termos(rng, COMPETENCIAS, 5), _termos(rng, HOBBIES, 4), rng.randrange(3))
+        for _ in range(total_mentoras)
+    ]
+    mentoradas = [
+        (_termos(rng, COMPETENCIAS, 5), _termos(rng, HOBBIES, 4), rng.choice(COMPETENCIAS + ["Letras", None]), rng.randrange(3))
+        for _ in range(total_mentoradas)
+    ]
+    livres = np.array([rng.random() < 0.8 for _ in mentoras], dtype=bool)
+    return mentoras, mentoradas, livres
+
+
+def _score_original(mentora, mentorada) -> int:
+    return MatchController._score_match(
+        mentora[1] or [], mentora[2] or [], mentorada[0] or [], mentorada[1] or [], mentorada[2],
+    )[0]
+
+
+def _engine(mentoras) -> MatchScoringEngine:
+    return MatchScoringEngine([m[1] for m in mentoras], [m[2] for m in mentoras])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_score_matrix_igual_ao_score_match(seed):
+    mentoras, mentoradas, _ = _coorte(seed, 40, 60)
+    engine = _engine(mentoras)
+    scores = np.vstack([
+        bloco for _, bloco in engine.iter_score_blocks(
+            [m[0] for m in mentoradas], [m[1] for m in mentoradas], [m[2] for m in mentoradas], block_size=7,
+        )
+    ])
+    esperado = np.array([[_score_original(mentora, mentorada) for mentora in mentoras] for mentorada in mentoradas])
+    np.testing.assert_array_equal(scores, esperado)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("same_university", [False, True])
+def test_rank_perfis_igual_ao_score_match(seed, same_university):
+    mentoras, mentoradas, livres = _coorte(seed, 40, 60)
+    indice = MentorTermIndex()
+    indice.sync(SimpleNamespace(id_mentora=m[0], competencias=m[1], hobbies=m[2]) for m in mentoras)
+    universidades = np.array([m[3] for m in mentoras], dtype=np.int64)
+    contexto = RankingContext(
+        _engine(mentoras),
+        *indice.postings({m[0]: j for j, m in enumerate(mentoras)}),
+        livres,
+        universidades,
+        same_university,
+    )
+
+    ranking = rank_perfis(contexto, mentoradas)
+
+    for mentorada, (candidatas, scores) in zip(mentoradas, ranking):
+        esperado = []
+        for j, mentora in enumerate(mentoras):
+            if not livres[j] or (same_university and mentora[3] != mentorada[3]):
+                continue
+            score = _score_original(mentora, mentorada)
+            if score > 0:
+                esperado.append((-score, j))
+        esperado.sort()
+        assert candidatas.tolist() == [j for _, j in esperado]
+        assert scores.tolist() == [-score for score, _ in esperado]
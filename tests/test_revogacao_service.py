@@ -0,0 +1,35 @@
+from datetime import datetime
+from uuid import uuid4
+import pytest
+from src.services.revogacao_service import RevogacaoService
+
+
+@pytest.fixture
+def cortes(monkeypatch):
+    cortes = {}
+    monkeypatch.setattr(RevogacaoService, "_cortes", cortes)
+    return cortes
+
+
+def test_corte_revoga_so_tokens_anteriores(cortes):
+    id_usuario = uuid4()
+    corte = datetime(2026, 1, 1, 12).timestamp()
+    RevogacaoService._cortar(id_usuario, corte)
+    assert RevogacaoService.talvez_usuario_revogado(id_usuario, corte - 1)
+    assert not RevogacaoService.talvez_usuario_revogado(id_usuario, corte + 1)
+    # Tokens sem iat (antigos) caem em qualquer corte
+    assert RevogacaoService.talvez_usuario_revogado(id_usuario, None)
+    assert not RevogacaoService.talvez_usuario_revogado(uuid4(), None)
+
+
+def test_corte_so_avanca(cortes):
+    id_usuario = uuid4()
+    RevogacaoService._cortar(id_usuario, 200.0)
+    # Uma atualização atrasada não traz de volta tokens já revogados
+    RevogacaoService._cortar(id_usuario, 100.0)
+    assert cortes[id_usuario] == 200.0
+
+
+def test_sem_carga_toda_checagem_vai_ao_banco(monkeypatch):
+    monkeypatch.setattr(RevogacaoService, "_cortes", None)
+    assert RevogacaoService.talvez_usuario_revogado(uuid4(), datetime.now().timestamp())
@@ -0,0 +1,81 @@
+import pytest
+from src.services import ttl_cache
+from src.services.ttl_cache import TTLCache
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(ttl_cache, "monotonic", lambda: agora[0])
+    return agora
+
+
+def test_expira_depois_do_ttl(relogio):
+    cache = TTLCache(10, ttl_s=5)
+    cache.set("a", 1)
+    relogio[0] += 4.9
+    assert cache.get("a") == 1
+    relogio[0] += 0.1
+    assert cache.get("a") is None
+    # A entrada vencida sai do cache na leitura
+    assert len(cache) == 0
+
+
+def test_ttl_por_entrada(relogio):
+    cache = TTLCache(10, ttl_s=5)
+    cache.set("curto", 1, ttl_s=1)
+    cache.set("longo", 2, ttl_s=60)
+    relogio[0] += 10
+    assert cache.get("curto") is None
+    assert cache.get("longo") == 2
+
+
+def test_ttl_zero_nao_guarda(relogio):
+    cache = TTLCache(10, ttl_s=5)
+    cache.set("a", 1, ttl_s=0)
+    assert cache.get("a") is None
+    assert len(TTLCache(0, ttl_s=5)) == 0
+
+
+def test_lru_descarta_o_menos_usado(relogio):
+    cache = TTLCache(3, ttl_s=60)
+    for chave in "abc":
+        cache.set(chave, chave)
+    # Ler "a" o torna o mais recente: quem sai é "b"
+    assert cache.get("a") == "a"
+    cache.set("d", "d")
+    assert len(cache) == 3
+    assert cache.get("b") is None
+    assert [cache.get(chave) for chave in "acd"] == ["a", "c", "d"]
+
+
+def test_set_renova_posicao_e_prazo(relogio):
+    cache = TTLCache(2, ttl_s=5)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    relogio[0] += 4
+    cache.set("a", 3)
+    cache.set("c", 4)
+    assert cache.get("b") is None
+    relogio[0] += 4
+    assert cache.get("a") == 3
+
+
+def test_discard_e_clear(relogio):
+    cache = TTLCache(5, ttl_s=5)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.discard("a")
+    cache.discard("inexistente")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_discard_where(relogio):
+    cache = TTLCache(5, ttl_s=5)
+    for chave, valor in [("a", 1), ("b", 2), ("c", 3)]:
+        cache.set(chave, valor)
+    cache.discard_where(lambda chave, valor: valor % 2 == 1)
+    assert [cache.get(chave) for chave in "abc"] == [None, 2, None]
+    assert len(cache) == 1